@@ -77,11 +77,17 @@ class CmdsCommonTexts:
     LOGS_STORING_CONFIRMATION_FILE_EXISTS = "Logs from the {experiment_name} {instance_type} will be stored in the " \
                                             "{filename} file. The file with this name already exists. Should the app " \
                                             "proceed?"
+    LOGS_STORING_RESUME_CONFIRMATION = "Storing of logs from the {experiment_name} {instance_type} in the " \
+                                       "{filename} file was interrupted. Should the app resume it?"
     LOGS_STORING_ERROR = "Some problems occurred during storing a file with logs. {exception_message}"
     LOGS_STORING_FINAL_MESSAGE = "Logs have been written to the file mentioned above."
     LOGS_STORING_CANCEL_MESSAGE = "Logs have not been written to the file mentioned above - cancelled by user."
     MORE_EXP_LOGS_MESSAGE = "There is more than one log to be stored. Each log will be stored in a separate file."
     SAVING_LOGS_TO_FILE_PROGRESS_MSG = "Saving logs to a file..."
+    LOGS_STATS_TOTAL_MSG = "Number of logs: {total}"
+    LOGS_STATS_PODS_HEADERS = ["Pod", "Logs"]
+    LOGS_STATS_SEVERITIES_HEADERS = ["Severity", "Logs"]
+    LOGS_STATS_HISTOGRAM_HEADERS = ["Minute", "Logs"]
 
 
 class VerifyCmdTexts:
@@ -183,6 +189,8 @@ class UserDeleteCmdTexts:
     DELETION_DELETING_NAMESPACE = "- deleting user's namespace"
     DELETION_DELETING_USERS_OBJECTS = "- deleting user's objects"
     DELETION_DELETING_USERS_EXPERIMENTS = "- deleting user experiments' logs"
+    DELETION_DELETING_USERS_EXPERIMENTS_COUNT = "- deleting user experiments' logs ({deleted}/{total} log entries " \
+                                                "deleted)"
 
 
 class LaunchCmdTexts:
@@ -209,6 +217,7 @@ class LaunchCmdTexts:
     TB_WAITING_FOR_TB_MSG = "Tensorboard instance: {tb_id} still in {tb_status_value} status, waiting for " \
                             "RUNNING..."
     TB_TIMEOUT_ERROR_MSG = "Tensorboard failed to run - timeout."
+    TB_POD_STATE_CHECK_ERROR_MSG = "Failed to check state of tensorboard pods."
 
 
 class PredictCmdTexts:
@@ -351,8 +360,12 @@ class ExperimentLogsCmdTexts:
     HELP_M = "If given, command searches for logs from experiments matching the value of this option. " \
              "This option cannot be used along with the NAME argument."
     HELP_O = "If given - logs are stored in a file with a name derived from a name of an experiment."
-    HELP_F = "Specify if logs should be streamed. Only logs from a single experiment can be streamed."
+    HELP_C = "If given together with -o option - logs are stored in a gzip-compressed file. If storing of logs " \
+             "is interrupted, it is resumed when the command is run again."
+    HELP_F = "Specify if logs should be streamed. If more than one experiment matches, logs of all of them " \
+             "are streamed together."
     HELP_PAGER = "Display logs in interactive pager."
+    HELP_STATS = "If given - instead of logs, numbers of logs per pod, per severity and per minute are displayed."
 
 
 class PredictLogsCmdTexts:
@@ -371,7 +384,8 @@ class PredictLogsCmdTexts:
     HELP_M = "If given, command searches for logs from prediction instances matching the value of this option. " \
              "This option cannot be used along with the NAME argument."
     HELP_O = "If given - logs are stored in a file with a name derived from a name of a prediction instance."
-    HELP_F = "Specify if logs should be streamed. Only logs from a single prediction instance can be streamed."
+    HELP_F = "Specify if logs should be streamed. If more than one prediction instance matches, logs of all of " \
+             "them are streamed together."
     HELP_PAGER = "Display logs in interactive pager."
 
 
@@ -399,6 +413,8 @@ class ExperimentSubmitCmdTexts:
              "needed - each variable should be in such case passed as a separate -e parameter."
     HELP_R = "Path to file with experiment's pip requirements." \
              " Dependencies listed in this file will be automatically installed using pip."
+    HELP_PARALLEL = "Maximal number of experiments (created with -pr/-ps options) that are prepared and submitted " \
+                    "concurrently. By default, experiments are submitted one by one."
     SCRIPT_NOT_FOUND_ERROR_MSG = "Cannot find: {script_location}. Make sure that provided path is correct."
     DEFAULT_SCRIPT_NOT_FOUND_ERROR_MSG = "Cannot find script: {default_script_name} in directory: " \
                                          "{script_directory}. If path to directory was passed as submit command " \
@@ -521,7 +537,8 @@ class ExperimentCancelCmdTexts:
     OTHER_POD_CANCELLING_ERROR_MSG = "Error during deleting the pod."
     UNINITIALIZED_EXPERIMENT_CANCEL_MSG = "Experiment {experiment_name} has no resources submitted for creation."
     PURGING_PROGRESS_MSG = 'Purging experiment {run_name}...'
-    PURGING_LOGS_PROGRESS_MSG = 'Purging experiment {run_name} logs...'
+    PURGING_LOGS_PROGRESS_MSG = 'Purging experiments logs...'
+    PURGING_LOGS_PROGRESS_COUNT_MSG = 'Purging experiments logs... ({deleted}/{total} log entries deleted)'
 
 
 class ExperimentViewCmdTexts:
@@ -597,6 +614,8 @@ class ExperimentCommonTexts:
     CLUSTER_CONNECTION_MSG = "Connecting to the cluster..."
     CREATING_ENVIRONMENT_MSG = "Creating {run_name} environment..."
     CREATING_RESOURCES_MSG = "Creating {run_name} resources..."
+    CREATING_ENVIRONMENTS_MSG = "Creating environments of {runs_count} experiments..."
+    CREATING_RESOURCES_OF_RUNS_MSG = "Creating resources of {runs_count} experiments..."
     CLUSTER_CONNECTION_CLOSING_MSG = "Closing tunnel to the cluster..."
     INCORRECT_TEMPLATE_NAME = "Incorrect template name."
     INCORRECT_ENV_PARAMETER = "-e/--env option must be in <KEY>=<VALUE> format."
@@ -604,6 +623,7 @@ class ExperimentCommonTexts:
     ERROR_WHILE_REMOVING_EXPERIMENT = "Error occured during removal of unsubmitted experiment."
     ERROR_WHILE_REMOVING_RUNS = "Error occured during removal of unsubmitted runs."
     CTRL_C_PURGING_PROGRESS_MSG = "System removes already submitted experiments as a result of pressing Ctrl-C."
+    SUBMISSION_CANCELLED_ERROR_MSG = "Submission of experiments has been cancelled."
 
 
 class DraftCmdTexts:
@@ -663,6 +683,7 @@ class TensorboardClientTexts:
 class UtilDockerTexts:
     TAGS_GET_ERROR_MSG = "Error during getting list of tags for an image."
     IMAGE_DELETE_ERROR_MSG = "Error during deletion of an image."
+    IMAGE_DIGEST_GET_ERROR_MSG = "Error during getting digest of an image."
 
 
 class UtilDependenciesCheckerTexts:
@@ -731,6 +752,12 @@ class UtilKubectlTexts:
                                     "proxy settings."
 
 
+class UtilPortForwarderTexts:
+    MISSING_PORT_ERROR_MSG = "Missing port during creation of port proxy."
+    NO_RUNNING_POD_ERROR_MSG = "There is no running pod of {service_name} service."
+    MISSING_POD_PORT_ERROR_MSG = "Port {port_name} is not exposed by {pod_name} pod."
+
+
 class UtilK8sInfoTexts:
     OTHER_FIND_NAMESPACE_ERROR_MSG = "Other find_namespace error"
     NAMESPACE_DELETE_ERROR_MSG = "Error during deleting namespace {namespace}"
@@ -15,16 +15,26 @@
 #
 
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import dateutil.parser
+from functools import partial
+import gzip
+import hashlib
+import heapq
+import json
+from operator import attrgetter
 import os
-from typing import List, Generator
+import queue
+import re
+import threading
+from typing import Callable, Dict, List, Generator, Tuple
 from sys import exit
 
 import click
 from tabulate import tabulate
 
 from util.app_names import NAUTAAppNames
-from logs_aggregator.k8s_es_client import K8sElasticSearchClient
+from logs_aggregator.k8s_es_client import K8sElasticSearchClient, LogsStats
 from logs_aggregator.k8s_log_entry import LogEntry
 from logs_aggregator.log_filters import SeverityLevel
 from platform_resources.run import RunStatus, Run, RunKinds
@@ -40,6 +50,19 @@ from cli_text_consts import CmdsCommonTexts as Texts, SPINNER_COLOR
 
 logger = initialize_logger(__name__)
 
+# maximal number of files with logs of runs written concurrently
+LOGS_SAVING_THREADS = 4
+# size of a write buffer of files with logs
+LOGS_FILE_BUFFER_SIZE = 1024 * 1024
+# compressed files with logs are stored with this extension, their checkpoints with an additional one
+COMPRESSED_LOGS_FILE_EXTENSION = '.log.gz'
+LOGS_CHECKPOINT_FILE_EXTENSION = '.checkpoint'
+LOGS_COMPRESSION_LEVEL = 6
+# maximal number of pages of logs waiting for compression
+LOGS_EXPORT_QUEUE_SIZE = 4
+# ISO 8601 timestamps of logs stored by fluentd, e.g. 2018-04-17T09:28:39.123456789+00:00
+LOG_DATE_REGEX = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.\d+)?(Z|[+-]\d{2}:\d{2})?')
+
 """
 A namedtuple representing uninitialized experiments in CLI.
 """
@@ -79,7 +102,7 @@ def list_unitialized_experiments_in_cli(verbosity_lvl: int, all_users: bool,
                                                state=ExperimentStatus.CREATING,
                                                run_kinds_filter=listed_runs_kinds,
                                                name_filter=name)
-        runs = Run.list(namespace=namespace, name_filter=name, run_kinds_filter=listed_runs_kinds)
+        runs = Run.list(namespace=namespace, name_filter=name, run_kinds_filter=listed_runs_kinds, use_cache=True)
 
         # Get Experiments without associated Runs
         names_of_experiment_with_runs = set()
@@ -115,7 +138,8 @@ def list_runs_in_cli(verbosity_lvl: int, all_users: bool, name: str, status: Run
     :param listed_runs_kinds: list of kinds of runs that will be listed out
     :param runs_list_headers: headers which will be displayed on top of a table shown in the cli
     :param with_metrics: whether to show metrics column or not
-    :param count: number of rows displayed on a list. If not given - content of a list is not limited
+    :param count: number of the most recently submitted runs displayed on a list. If not given - content of a list
+                  is not limited
     :param brief: when true only experiment name, submission date, owner and state will be print
     """
 
@@ -125,8 +149,18 @@ def list_runs_in_cli(verbosity_lvl: int, all_users: bool, name: str, status: Run
 
         # List experiments command is actually listing Run resources instead of Experiment resources with one
         # exception - if run is initialized - nctl displays data of an experiment instead of data of a run
-        runs = replace_initializing_runs(
-            Run.list(namespace=namespace, state_list=[status], name_filter=name, run_kinds_filter=listed_runs_kinds))
+        if count:
+            # only the most recently created runs are displayed, so there is no need to keep the whole list
+            runs = sorted(heapq.nlargest(count, Run.list_generator(namespace=namespace, state_list=[status],
+                                                                   name_filter=name,
+                                                                   run_kinds_filter=listed_runs_kinds,
+                                                                   use_cache=True),
+                                         key=attrgetter('creation_timestamp')),
+                          key=attrgetter('creation_timestamp'))
+        else:
+            runs = Run.list(namespace=namespace, state_list=[status], name_filter=name,
+                            run_kinds_filter=listed_runs_kinds, use_cache=True)
+        runs = replace_initializing_runs(runs)
         runs_representations = [run.cli_representation for run in runs]
         if brief:
             runs_table_data = [
@@ -143,8 +177,7 @@ def list_runs_in_cli(verbosity_lvl: int, all_users: bool, name: str, status: Run
                  run_representation.submitter, run_representation.status, run_representation.template_name)
                 for run_representation in runs_representations
             ]
-        click.echo(tabulate(runs_table_data if not count else runs_table_data[-count:],
-                            headers=runs_list_headers, tablefmt="orgtbl"))
+        click.echo(tabulate(runs_table_data, headers=runs_list_headers, tablefmt="orgtbl"))
     except InvalidRegularExpressionError:
         handle_error(logger, Texts.INVALID_REGEX_ERROR_MSG, Texts.INVALID_REGEX_ERROR_MSG,
                      add_verbosity_msg=verbosity_lvl == 0)
@@ -162,13 +195,17 @@ def replace_initializing_runs(run_list: List[Run]):
     :param run_list: list of runs to be checked
     :return: list without runs that are initialized at the moment
     """
+    experiments = get_initializing_experiments(run_list)
     initializing_experiments = set()
     ret_list = []
     for run in run_list:
         exp_name = run.experiment_name
         if (run.state is None or run.state == '') and exp_name not in initializing_experiments:
-            experiment = Experiment.get(name=exp_name, namespace=run.namespace)
-            ret_list.append(create_fake_run(experiment))
+            experiment = experiments.get((run.namespace, exp_name))
+            if experiment:
+                ret_list.append(create_fake_run(experiment))
+            else:
+                logger.debug(f'Experiment {exp_name} of initializing run {run.name} not found.')
             initializing_experiments.add(exp_name)
         elif exp_name not in initializing_experiments:
             ret_list.append(run)
@@ -176,6 +213,22 @@ def replace_initializing_runs(run_list: List[Run]):
     return ret_list
 
 
+def get_initializing_experiments(run_list: List[Run]) -> Dict[Tuple[str, str], Experiment]:
+    """
+    Fetches experiments of all initializing runs with a single list call.
+    :param run_list: list of runs to be checked
+    :return: dictionary of experiments indexed by (namespace, experiment name)
+    """
+    namespaces = {run.namespace for run in run_list if run.state is None or run.state == ''}
+    if not namespaces:
+        return {}
+    # runs from many namespaces are listed only with --all-users option, then experiments from all
+    # namespaces are fetched
+    namespace = next(iter(namespaces)) if len(namespaces) == 1 else None
+    return {(experiment.namespace, experiment.name): experiment
+            for experiment in Experiment.list(namespace=namespace)}
+
+
 def create_fake_run(experiment: Experiment) -> Run:
     return Run(name=experiment.name, experiment_name=experiment.name, metrics={},
                parameters=experiment.parameters_spec, pod_count=0,
@@ -186,7 +239,7 @@ def create_fake_run(experiment: Experiment) -> Run:
 
 def get_logs(experiment_name: str, min_severity: SeverityLevel, start_date: str,
              end_date: str, pod_ids: str, pod_status: PodStatus, match: str, output: bool, pager: bool, follow: bool,
-             runs_kinds: List[RunKinds], instance_type: str):
+             runs_kinds: List[RunKinds], instance_type: str, compress: bool = False, stats: bool = False):
     """
     Show logs for a given experiment.
     """
@@ -199,7 +252,7 @@ def get_logs(experiment_name: str, min_severity: SeverityLevel, start_date: str,
         exit(1)
 
     try:
-        with K8sProxy(NAUTAAppNames.ELASTICSEARCH) as proxy:
+        with K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True) as proxy:
             es_client = K8sElasticSearchClient(host="127.0.0.1", port=proxy.tunnel_port,
                                                verify_certs=False, use_ssl=False)
             namespace = get_kubectl_current_context_namespace()
@@ -207,8 +260,8 @@ def get_logs(experiment_name: str, min_severity: SeverityLevel, start_date: str,
                 experiment_name = match
                 name_filter = match
             else:
-                name_filter = f'^{experiment_name}$'
-            runs = Run.list(namespace=namespace, name_filter=name_filter, run_kinds_filter=runs_kinds)
+                name_filter = f'^{re.escape(experiment_name)}$'
+            runs = Run.list(namespace=namespace, name_filter=name_filter, run_kinds_filter=runs_kinds, use_cache=True)
             if not runs:
                 raise ValueError(f'Run with given name: {experiment_name} does not exists in namespace {namespace}.')
 
@@ -217,24 +270,50 @@ def get_logs(experiment_name: str, min_severity: SeverityLevel, start_date: str,
             pod_status = PodStatus[pod_status] if pod_status else None
             follow_logs = True if follow and not output else False
 
-            if output and len(runs) > 1:
-                click.echo(Texts.MORE_EXP_LOGS_MESSAGE)
-
-            for run in runs:
-                start_date = start_date if start_date else run.creation_timestamp
-
-                run_logs_generator = es_client.get_experiment_logs_generator(run=run, namespace=namespace,
-                                                                             min_severity=min_severity,
-                                                                             start_date=start_date, end_date=end_date,
-                                                                             pod_ids=pod_ids, pod_status=pod_status,
-                                                                             follow=follow_logs)
-
-                if output:
-                    save_logs_to_file(run=run, run_logs_generator=run_logs_generator, instance_type=instance_type)
-                else:
-                    if len(runs) > 1:
-                        click.echo(f'Experiment : {run.name}')
-                    print_logs(run_logs_generator=run_logs_generator, pager=pager)
+            def get_run_logs_generator(run: Run) -> Generator[LogEntry, None, None]:
+                return es_client.get_experiment_logs_generator(run=run, namespace=namespace,
+                                                               min_severity=min_severity,
+                                                               start_date=start_date if start_date
+                                                               else run.creation_timestamp,
+                                                               end_date=end_date, pod_ids=pod_ids,
+                                                               pod_status=pod_status, follow=follow_logs)
+
+            def get_run_logs_writer(run: Run) -> Callable[[str], None]:
+                if not compress:
+                    return partial(write_logs_to_file, run_logs_generator=get_run_logs_generator(run))
+
+                query_body, filters = es_client.get_runs_logs_query(runs=[run], namespace=namespace,
+                                                                    min_severity=min_severity,
+                                                                    start_date=start_date if start_date
+                                                                    else run.creation_timestamp,
+                                                                    end_date=end_date, pod_ids=pod_ids,
+                                                                    pod_status=pod_status)
+                return partial(write_compressed_logs_to_file, es_client=es_client, query_body=query_body,
+                               filters=filters)
+
+            if stats:
+                # logs are counted by ElasticSearch, so they are not fetched at all
+                logs_stats = es_client.get_runs_logs_stats(
+                    runs=runs, namespace=namespace, min_severity=min_severity,
+                    start_date=start_date if start_date else min(run.creation_timestamp for run in runs),
+                    end_date=end_date, pod_ids=pod_ids, pod_status=pod_status)
+                print_logs_stats(logs_stats)
+            elif output:
+                if len(runs) > 1:
+                    click.echo(Texts.MORE_EXP_LOGS_MESSAGE)
+                save_logs_to_files(runs_logs_writers=[(run, get_run_logs_writer(run)) for run in runs],
+                                   instance_type=instance_type, compress=compress)
+            elif len(runs) > 1:
+                # logs of all runs are fetched with a single query, ordered by their timestamps - when followed,
+                # logs of all runs are streamed at once
+                runs_logs_generator = es_client.get_runs_logs_generator(
+                    runs=runs, namespace=namespace, min_severity=min_severity,
+                    start_date=start_date if start_date else min(run.creation_timestamp for run in runs),
+                    end_date=end_date, pod_ids=pod_ids, pod_status=pod_status, follow=follow_logs)
+                click.echo(f'Experiments : {", ".join(run.name for run in runs)}')
+                print_logs(run_logs_generator=runs_logs_generator, pager=pager)
+            else:
+                print_logs(run_logs_generator=get_run_logs_generator(runs[0]), pager=pager)
 
     except K8sProxyCloseError:
         handle_error(logger, Texts.PROXY_CLOSE_LOG_ERROR_MSG, Texts.PROXY_CLOSE_USER_ERROR_MSG)
@@ -259,51 +338,188 @@ def get_logs(experiment_name: str, min_severity: SeverityLevel, start_date: str,
 
 
 def format_log_date(date: str):
+    # ISO timestamps are formatted without parsing them, only a fraction of a second is dropped
+    date_match = LOG_DATE_REGEX.fullmatch(date)
+    if date_match:
+        time_zone = date_match.group(2)
+        return date_match.group(1) + ('+00:00' if time_zone == 'Z' else time_zone or '')
+
     log_date = dateutil.parser.parse(date)
     log_date = log_date.replace(microsecond=0)
     formatted_date = log_date.isoformat()
     return formatted_date
 
 
+def format_logs(run_logs_generator: Generator[LogEntry, None, None]) -> Generator[str, None, None]:
+    for log_entry in run_logs_generator:
+        if not log_entry.content.isspace():
+            formatted_date = format_log_date(log_entry.date)
+            yield f'{formatted_date} {log_entry.pod_name} {log_entry.content}'
+
+
 def print_logs(run_logs_generator: Generator[LogEntry, None, None], pager=False):
-    def formatted_logs():
-        for log_entry in run_logs_generator:
-            if not log_entry.content.isspace():
-                formatted_date = format_log_date(log_entry.date)
-                yield f'{formatted_date} {log_entry.pod_name} {log_entry.content}'
+    formatted_logs = format_logs(run_logs_generator)
 
     if pager:
         # set -K option for less, so ^C will be respected
         os.environ['LESS'] = os.environ.get('LESS', '') + ' -K'
         click.echo_via_pager(formatted_logs)
     else:
-        for formatted_log in formatted_logs():
+        for formatted_log in formatted_logs:
             click.echo(formatted_log, nl=False)
 
 
-def save_logs_to_file(run: Run, run_logs_generator: Generator[LogEntry, None, None], instance_type: str):
-    filename = run.name + '.log'
-    confirmation_message = Texts.LOGS_STORING_CONFIRMATION.format(filename=filename,
-                                                                  experiment_name=run.name,
-                                                                  instance_type=instance_type)
-    if os.path.isfile(filename):
-        confirmation_message = Texts.LOGS_STORING_CONFIRMATION_FILE_EXISTS.format(filename=filename,
-                                                                                  experiment_name=run.name,
-                                                                                  instance_type=instance_type)
+def print_logs_stats(logs_stats: LogsStats):
+    click.echo(Texts.LOGS_STATS_TOTAL_MSG.format(total=logs_stats.total))
+    click.echo(tabulate(list(logs_stats.pods.items()), headers=Texts.LOGS_STATS_PODS_HEADERS, tablefmt="orgtbl"))
+    click.echo()
+    click.echo(tabulate(list(logs_stats.severities.items()), headers=Texts.LOGS_STATS_SEVERITIES_HEADERS,
+                        tablefmt="orgtbl"))
+    click.echo()
+    click.echo(tabulate(logs_stats.histogram, headers=Texts.LOGS_STATS_HISTOGRAM_HEADERS, tablefmt="orgtbl"))
+
+
+def write_logs_to_file(filename: str, run_logs_generator: Generator[LogEntry, None, None]):
+    # text mode, so line endings are converted to the platform's ones
+    with open(filename, 'w', encoding='utf-8', buffering=LOGS_FILE_BUFFER_SIZE) as file:
+        file.writelines(format_logs(run_logs_generator))
+
+
+def get_logs_checkpoint_file_path(filename: str) -> str:
+    return filename + LOGS_CHECKPOINT_FILE_EXTENSION
+
+
+def load_logs_checkpoint(filename: str, query_digest: str = None) -> dict:
+    """
+    Returns checkpoint of an interrupted export of logs to a given file. If a digest of a query is given,
+    checkpoint is returned only if it was stored by export of logs matching the same query.
+    :return: checkpoint with 'query', 'offset' and 'search_after' keys or None, if export can't be resumed
+    """
+    try:
+        with open(get_logs_checkpoint_file_path(filename), mode='r', encoding='utf-8') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception(f'Failed to read checkpoint of logs stored in {filename}.')
+        return None
+
+    if (query_digest and checkpoint.get('query') != query_digest) or \
+            not os.path.isfile(filename) or os.path.getsize(filename) < checkpoint.get('offset', 0):
+        return None
+    return checkpoint
+
+
+def save_logs_checkpoint(filename: str, checkpoint: dict):
+    checkpoint_file_path = get_logs_checkpoint_file_path(filename)
+    temporary_file_path = f'{checkpoint_file_path}.tmp'
+    with open(temporary_file_path, mode='w', encoding='utf-8') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+    # replacing is atomic, so checkpoint is never partially written
+    os.replace(temporary_file_path, checkpoint_file_path)
+
+
+def write_compressed_logs_to_file(filename: str, es_client: K8sElasticSearchClient, query_body: dict,
+                                  filters: List[Callable[[LogEntry], bool]] = None):
+    """
+    Exports logs matching a given query to a gzip file. Logs are fetched page by page, while previous pages are
+    compressed and written by a background thread - each page as a separate gzip member. After each page, its
+    position in the file and a cursor of its last log are stored in a checkpoint file next to the exported file.
+    If the export is interrupted, it is resumed from the checkpoint next time, and the checkpoint is removed once
+    all logs are exported.
+    :param filename: name of a gzip file
+    :param es_client: client used to fetch logs
+    :param query_body: ES query of exported logs
+    :param filters: List of filter functions with signatures f(LogEntry) -> Bool
+    """
+    query_digest = hashlib.sha1(json.dumps(query_body, sort_keys=True).encode('utf-8')).hexdigest()
+    checkpoint = load_logs_checkpoint(filename, query_digest=query_digest)
+    offset, search_after = (checkpoint['offset'], checkpoint['search_after']) if checkpoint else (0, None)
+    if checkpoint:
+        logger.debug(f'Resuming export of logs to {filename} from {search_after}.')
 
-    if click.confirm(confirmation_message, default=True):
+    pages_queue = queue.Queue(maxsize=LOGS_EXPORT_QUEUE_SIZE)
+    writer_errors = []
+
+    def write_pages():
         try:
-            with open(filename, 'w') as file, spinner(spinner=NctlSpinner,
-                                                      text=Texts.SAVING_LOGS_TO_FILE_PROGRESS_MSG, color=SPINNER_COLOR):
-                for log_entry in run_logs_generator:
-                    if not log_entry.content.isspace():
-                        formatted_date = format_log_date(log_entry.date)
-                        file.write(f'{formatted_date} {log_entry.pod_name} {log_entry.content}')
-            click.echo(Texts.LOGS_STORING_FINAL_MESSAGE)
+            with open(filename, 'r+b' if offset else 'wb') as file:
+                # file may end with a part of a page written after the checkpoint
+                file.seek(offset)
+                file.truncate()
+                for log_entries, cursor in iter(pages_queue.get, None):
+                    formatted_logs = ''.join(format_logs(log_entries)).encode('utf-8')
+                    if formatted_logs:
+                        file.write(gzip.compress(formatted_logs, compresslevel=LOGS_COMPRESSION_LEVEL))
+                        file.flush()
+                    save_logs_checkpoint(filename, {'query': query_digest, 'offset': file.tell(),
+                                                    'search_after': cursor})
         except Exception as exe:
-            handle_error(logger,
-                         Texts.LOGS_STORING_ERROR.format(exception_message=exe.message),
-                         Texts.LOGS_STORING_ERROR.format(exception_message=exe.message))
-            exit(1)
-    else:
-        click.echo(Texts.LOGS_STORING_CANCEL_MESSAGE)
+            writer_errors.append(exe)
+            # remaining pages are consumed, so fetching of logs is not blocked
+            for _ in iter(pages_queue.get, None):
+                pass
+
+    writer = threading.Thread(target=write_pages, daemon=True)
+    writer.start()
+    try:
+        for page in es_client.get_log_pages_generator(query_body=query_body, filters=filters,
+                                                      search_after=search_after):
+            if writer_errors:
+                break
+            pages_queue.put(page)
+    finally:
+        pages_queue.put(None)
+        writer.join()
+
+    if writer_errors:
+        raise writer_errors[0]
+    checkpoint_file_path = get_logs_checkpoint_file_path(filename)
+    if os.path.isfile(checkpoint_file_path):
+        os.remove(checkpoint_file_path)
+
+
+def save_logs_to_files(runs_logs_writers: List[Tuple[Run, Callable[[str], None]]], instance_type: str,
+                       compress: bool = False):
+    """
+    Stores logs of each run in a separate file. Storing of each file is confirmed by a user first, then
+    all confirmed files are written concurrently.
+    :param runs_logs_writers: list of runs and functions writing their logs to a file with a given name
+    :param instance_type: type of runs displayed in messages
+    :param compress: if True, logs are stored in gzip files and their interrupted storing is resumed
+    """
+    confirmed_files = []
+    for run, run_logs_writer in runs_logs_writers:
+        filename = run.name + (COMPRESSED_LOGS_FILE_EXTENSION if compress else '.log')
+        confirmation_message = Texts.LOGS_STORING_CONFIRMATION.format(filename=filename,
+                                                                      experiment_name=run.name,
+                                                                      instance_type=instance_type)
+        if compress and load_logs_checkpoint(filename):
+            confirmation_message = Texts.LOGS_STORING_RESUME_CONFIRMATION.format(filename=filename,
+                                                                                 experiment_name=run.name,
+                                                                                 instance_type=instance_type)
+        elif os.path.isfile(filename):
+            confirmation_message = Texts.LOGS_STORING_CONFIRMATION_FILE_EXISTS.format(filename=filename,
+                                                                                      experiment_name=run.name,
+                                                                                      instance_type=instance_type)
+        if click.confirm(confirmation_message, default=True):
+            confirmed_files.append((filename, run_logs_writer))
+        else:
+            click.echo(Texts.LOGS_STORING_CANCEL_MESSAGE)
+
+    if not confirmed_files:
+        return
+
+    try:
+        with spinner(spinner=NctlSpinner, text=Texts.SAVING_LOGS_TO_FILE_PROGRESS_MSG, color=SPINNER_COLOR), \
+                ThreadPoolExecutor(max_workers=min(len(confirmed_files), LOGS_SAVING_THREADS)) as executor:
+            futures = [executor.submit(run_logs_writer, filename=filename)
+                       for filename, run_logs_writer in confirmed_files]
+            for future in futures:
+                future.result()
+        click.echo(Texts.LOGS_STORING_FINAL_MESSAGE)
+    except Exception as exe:
+        handle_error(logger,
+                     Texts.LOGS_STORING_ERROR.format(exception_message=str(exe)),
+                     Texts.LOGS_STORING_ERROR.format(exception_message=str(exe)))
+        exit(1)
@@ -96,7 +96,7 @@ def cancel(state: State, name: str, match: str, purge: bool, pod_ids: str, pod_s
         if exp_to_be_cancelled:
             search_for_experiment = True
         else:
-            name = f"^{name}$"
+            name = f"^{re.escape(name)}$"
     else:
         name = match
 
@@ -110,10 +110,10 @@ def cancel(state: State, name: str, match: str, purge: bool, pod_ids: str, pod_s
     try:
         if search_for_experiment:
             list_of_all_runs = Run.list(namespace=current_namespace, exp_name_filter=[name],
-                                        run_kinds_filter=listed_runs_kinds)
+                                        run_kinds_filter=listed_runs_kinds, use_cache=True)
         else:
             list_of_all_runs = Run.list(namespace=current_namespace, name_filter=name,
-                                        run_kinds_filter=listed_runs_kinds)
+                                        run_kinds_filter=listed_runs_kinds, use_cache=True)
     except Exception:
         handle_error(logger, Texts.LIST_RUNS_ERROR_MSG.format(experiment_name_plural=experiment_name_plural),
                      Texts.LIST_RUNS_ERROR_MSG.format(experiment_name_plural=experiment_name_plural))
@@ -214,20 +214,22 @@ def cancel(state: State, name: str, match: str, purge: bool, pod_ids: str, pod_s
     if purge:
         # Connect to elasticsearch in order to purge run logs
         try:
-            with K8sProxy(NAUTAAppNames.ELASTICSEARCH) as proxy:
+            with K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True) as proxy:
                 es_client = K8sElasticSearchClient(host="127.0.0.1", port=proxy.tunnel_port,
                                                    verify_certs=False, use_ssl=False)
                 for exp_name, run_list in exp_with_runs.items():
                     try:
                         exp_del_runs, exp_not_del_runs = purge_experiment(exp_name=exp_name,
                                                                           runs_to_purge=run_list,
-                                                                          namespace=current_namespace,
-                                                                          k8s_es_client=es_client)
+                                                                          namespace=current_namespace)
                         deleted_runs.extend(exp_del_runs)
                         not_deleted_runs.extend(exp_not_del_runs)
                     except Exception:
                         handle_error(logger, Texts.OTHER_CANCELLING_ERROR_MSG)
                         not_deleted_runs.extend(run_list)
+
+                if deleted_runs:
+                    purge_runs_logs(runs=deleted_runs, namespace=current_namespace, k8s_es_client=es_client)
         except K8sProxyCloseError:
             handle_error(logger, Texts.PROXY_CLOSING_ERROR_LOG_MSG, Texts.PROXY_CLOSING_ERROR_USER_MSG)
             exit(1)
@@ -269,8 +271,27 @@ def cancel(state: State, name: str, match: str, purge: bool, pod_ids: str, pod_s
         sys.exit(1)
 
 
+def purge_runs_logs(runs: List[Run], namespace: str, k8s_es_client: K8sElasticSearchClient):
+    """
+    Clears logs of given runs with a single query, displaying a progress of their deletion.
+    Errors are only logged, as runs themselves are already purged.
+    :param runs: list of purged runs
+    :param namespace: namespace where runs are located
+    :param k8s_es_client: Kubernetes ElasticSearch client
+    """
+    logger.debug(f"Clearing logs for {len(runs)} runs.")
+    try:
+        with spinner(text=Texts.PURGING_LOGS_PROGRESS_MSG) as logs_spinner:
+            def show_progress(deleted: int, total: int):
+                logs_spinner.text = Texts.PURGING_LOGS_PROGRESS_COUNT_MSG.format(deleted=deleted, total=total)
+
+            k8s_es_client.delete_logs_for_runs(runs=[run.name for run in runs], namespace=namespace,
+                                               progress_callback=show_progress)
+    except Exception:
+        logger.exception("Error during clearing run logs.")
+
+
 def purge_experiment(exp_name: str, runs_to_purge: List[Run],
-                     k8s_es_client: K8sElasticSearchClient,
                      namespace: str) -> Tuple[List[Run], List[Run]]:
     """
        Purge experiment with a given name by cancelling runs given as a parameter. If given experiment
@@ -278,7 +299,6 @@ def purge_experiment(exp_name: str, runs_to_purge: List[Run],
 
        :param exp_name: name of an experiment to which belong runs passed in run_list parameter
        :param runs_to_purge: list of runs that should be purged, they have to belong to exp_name experiment
-       :param k8s_es_client: Kubernetes ElasticSearch client
        :param namespace: namespace where experiment is located
        :return: two list - first contains runs that were cancelled successfully, second - those which weren't
        """
@@ -318,13 +338,6 @@ def purge_experiment(exp_name: str, runs_to_purge: List[Run],
                 if "NotFound" not in str(exe):
                     click.echo(Texts.INCOMPLETE_PURGE_ERROR_MSG.format(experiment_name=experiment_name))
                     raise exe
-            try:
-                # clear run logs
-                logger.debug(f"Clearing logs for {run.name} run.")
-                with spinner(text=Texts.PURGING_LOGS_PROGRESS_MSG.format(run_name=run.name)):
-                    k8s_es_client.delete_logs_for_run(run=run.name, namespace=namespace)
-            except Exception:
-                logger.exception("Error during clearing run logs.")
 
             # CAN-1099 - docker garbage collector has errors that prevent from correct removal of images
             # try:
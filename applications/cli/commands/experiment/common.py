@@ -15,7 +15,7 @@
 #
 
 from collections import namedtuple
-from distutils.dir_util import copy_tree
+from concurrent.futures import Future, ThreadPoolExecutor
 import itertools
 import os
 import psutil
@@ -24,25 +24,28 @@ import shutil
 import signal
 from sys import exit
 import textwrap
+import threading
 import yaml
 
 import click
 
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Callable, Iterable, Any
 from pathlib import Path
 from tabulate import tabulate
 from marshmallow import ValidationError
 
 import draft.cmd as cmd
 from platform_resources.experiment_utils import generate_exp_name_and_labels
-from packs.tf_training import update_configuration, get_pod_count
+from packs.tf_training import update_configuration, get_pod_count, pull_pack_base_image
 import platform_resources.experiment as experiments_model
 from platform_resources.run import Run, RunStatus, RunKinds
 from util.config import EXPERIMENTS_DIR_NAME, FOLDER_DIR_NAME, Config
+from util.content_cache import ContentCache
+from util.filesystem import get_directory_digest
 from util.helm import delete_helm_release
 from util.k8s.kubectl import delete_k8s_object
 from util.logger import initialize_logger
-from util.spinner import spinner
+from util.spinner import spinner, progress_spinner
 from util.system import get_current_os, OS
 from util import socat
 from util.exceptions import K8sProxyOpenError, K8sProxyCloseError, LocalPortOccupiedError, \
@@ -73,6 +76,9 @@ JUPYTER_NOTEBOOK_TEMPLATES_NAMES = ["jupyter", "jupyter-py2"]
 
 EXP_SUB_SEMAPHORE_FILENAME = ".underSubmission"
 
+# number of characters of a build context digest used as a tag of an experiment's image
+IMAGE_TAG_DIGEST_LENGTH = 16
+
 EXPERIMENTS_LIST_HEADERS = [RUN_NAME, RUN_PARAMETERS, RUN_METRICS, RUN_SUBMISSION_DATE, RUN_START_DATE, RUN_END_DATE,
                             RUN_SUBMITTER, RUN_STATUS, RUN_TEMPLATE_NAME]
 
@@ -82,19 +88,34 @@ TEMPL_FOLDER_NAME = "templates"
 log = initialize_logger('commands.common')
 
 
-PrepareExperimentResult = namedtuple('PrepareExperimentResult', ['folder_name', 'script_name', 'pod_count'])
+PrepareExperimentResult = namedtuple('PrepareExperimentResult', ['folder_name', 'script_name', 'pod_count',
+                                                                 'image_name'])
+
+# files and directories of a run environment which are not a part of an image's build context
+BUILD_CONTEXT_IGNORED_OBJECTS = ['charts', EXP_SUB_SEMAPHORE_FILENAME]
 
 submitted_runs = []
 submitted_experiment = ""
 submitted_namespace = ""
+# futures of runs prepared/submitted concurrently (--parallel option), cancelled on ctrl-c
+submission_futures: List[Future] = []
+# set on ctrl-c, worker threads check it before each step of a submission and stop if it is set
+submission_cancelled = threading.Event()
+# guards submitted_runs - runs created by workers after ctrl-c aren't added to it, workers remove them on their own
+submitted_runs_lock = threading.RLock()
 
 
 def ctrl_c_handler_for_submit(sig, frame):
     log.debug("ctrl-c pressed while submitting")
+    submission_cancelled.set()
+    for future in submission_futures:
+        future.cancel()
+    with submitted_runs_lock:
+        runs_to_purge = list(submitted_runs)
     try:
         with spinner(text=Texts.CTRL_C_PURGING_PROGRESS_MSG):
-            if submitted_runs:
-                for run in submitted_runs:
+            if runs_to_purge:
+                for run in runs_to_purge:
                     try:
                         # delete run
                         delete_k8s_object("run", run.name)
@@ -178,10 +199,10 @@ def create_environment(experiment_name: str, file_location: str, folder_location
             log.exception("Create environment - copying training script error.")
             raise SubmitExperimentError(message_prefix.format(reason=Texts.TRAINING_SCRIPT_CANT_BE_CREATED))
 
-    # copy folder content
+    # copy folder content - through the cache, so only files changed since previous submission are copied
     if folder_location:
         try:
-            copy_tree(folder_location, folder_path)
+            ContentCache().copy_tree(folder_location, folder_path)
         except Exception:
             log.exception("Create environment - copying training folder error.")
             raise SubmitExperimentError(message_prefix.format(reason=Texts.DIR_CANT_BE_COPIED_ERROR_TEXT))
@@ -222,13 +243,36 @@ def convert_to_number(s: str) -> int or float:
         return float(s)
 
 
+def map_concurrently(function: Callable[[Any], Any], items: Iterable[Any], parallel: int = 1) -> List[Any]:
+    """
+    Calls a function for each of given items. If parallel is greater than 1, calls are executed concurrently
+    by a pool of parallel worker threads.
+    :param function: function to be called
+    :param items: items passed to the function
+    :param parallel: maximal number of concurrent calls
+    :return: list of results, in the same order as items. If any call raised an exception, it is re-raised
+             after all calls are finished.
+    """
+    if parallel <= 1:
+        return [function(item) for item in items]
+
+    global submission_futures
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        submission_futures = [executor.submit(function, item) for item in items]
+        try:
+            return [future.result() for future in submission_futures]
+        finally:
+            submission_futures = []
+
+
 def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunKinds.TRAINING,
                       script_location: str = None, script_parameters: Tuple[str, ...] = None,
                       pack_params: List[Tuple[str, str]] = None, parameter_range: List[Tuple[str, str]] = None,
                       parameter_set: Tuple[str, ...] = None,
                       script_folder_location: str = None,
                       env_variables: List[str] = None,
-                      requirements_file: str = None) -> (List[Run], Dict[str, str], str):
+                      requirements_file: str = None,
+                      parallel: int = 1) -> (List[Run], Dict[str, str], str):
 
     script_parameters = script_parameters if script_parameters else ()
     parameter_set = parameter_set if parameter_set else ()
@@ -263,6 +307,7 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
     submitted_experiment = experiment_name
 
     # Ctrl-C handling
+    submission_cancelled.clear()
     signal.signal(signal.SIGINT, ctrl_c_handler_for_submit)
     signal.signal(signal.SIGTERM, ctrl_c_handler_for_submit)
 
@@ -277,6 +322,7 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
                 config.local_registry_port = proxy.tunnel_port
 
             experiment_run_folders = []  # List of local directories used by experiment's runs
+            experiment_run_images = {}  # Names of images used by experiment's runs
             try:
                 # run socat if on Windows or Mac OS
                 if get_current_os() in (OS.WINDOWS, OS.MACOS):
@@ -289,10 +335,20 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
                         log.exception(error_msg)
                         raise SubmitExperimentError(error_msg)
 
+                # base image of a pack is pulled in background, while environments of runs are prepared
+                pull_pack_base_image(pack_type=template, local_registry_port=proxy.tunnel_port)
+
                 cluster_registry_port = get_app_service_node_port(nauta_app_name=NAUTAAppNames.DOCKER_REGISTRY)
 
-                # prepare environments for all experiment's runs
-                for experiment_run in runs_list:
+                if parallel > 1:
+                    # user can't be asked about removal of existing environments from worker threads
+                    for experiment_run in runs_list:
+                        check_run_environment(get_run_environment_path(experiment_run.name))
+
+                def prepare_run_environment(experiment_run: Run) -> PrepareExperimentResult:
+                    if submission_cancelled.is_set():
+                        raise SubmitExperimentError(Texts.SUBMISSION_CANCELLED_ERROR_MSG)
+
                     if script_parameters and experiment_run.parameters:
                         current_script_parameters = script_parameters + experiment_run.parameters
                     elif script_parameters:
@@ -302,17 +358,25 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
                     else:
                         current_script_parameters = ""
 
-                    run_folder, script_location, pod_count = \
-                        prepare_experiment_environment(experiment_name=experiment_name,
-                                                       run_name=experiment_run.name,
-                                                       local_script_location=script_location,
-                                                       script_folder_location=script_folder_location,  # noqa: E501
-                                                       script_parameters=current_script_parameters,
-                                                       pack_type=template, pack_params=pack_params,
-                                                       local_registry_port=proxy.tunnel_port,
-                                                       cluster_registry_port=cluster_registry_port,
-                                                       env_variables=env_variables,
-                                                       requirements_file=requirements_file)
+                    return prepare_experiment_environment(experiment_name=experiment_name,
+                                                          run_name=experiment_run.name,
+                                                          local_script_location=script_location,
+                                                          script_folder_location=script_folder_location,
+                                                          script_parameters=current_script_parameters,
+                                                          pack_type=template, pack_params=pack_params,
+                                                          local_registry_port=proxy.tunnel_port,
+                                                          cluster_registry_port=cluster_registry_port,
+                                                          env_variables=env_variables,
+                                                          requirements_file=requirements_file,
+                                                          show_spinner=parallel <= 1)
+
+                # prepare environments for all experiment's runs
+                with progress_spinner(text=Texts.CREATING_ENVIRONMENTS_MSG.format(runs_count=len(runs_list)),
+                                      visible=parallel > 1):
+                    prepare_results = map_concurrently(prepare_run_environment, runs_list, parallel=parallel)
+
+                for experiment_run, prepare_result in zip(runs_list, prepare_results):
+                    run_folder, script_location, pod_count, image_name = prepare_result
                     # Set correct pod count
                     if not pod_count or pod_count < 1:
                         raise SubmitExperimentError('Unable to determine pod count: make sure that values.yaml '
@@ -320,6 +384,7 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
                     experiment_run.pod_count = pod_count
 
                     experiment_run_folders.append(run_folder)
+                    experiment_run_images[experiment_run.name] = image_name
                     script_name = None
                     if script_location is not None:
                         script_name = os.path.basename(script_location)
@@ -369,19 +434,32 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
 
             # submit runs
             run_errors = {}
-            for run, run_folder in zip(runs_list, experiment_run_folders):
+
+            def submit_run(run_with_folder: Tuple[Run, str]):
+                run, run_folder = run_with_folder
+                if submission_cancelled.is_set():
+                    return
                 try:
                     run.state = RunStatus.QUEUED
-                    with spinner(text=Texts.CREATING_RESOURCES_MSG.format(run_name=run.name)):
+                    with progress_spinner(text=Texts.CREATING_RESOURCES_MSG.format(run_name=run.name),
+                                          visible=parallel <= 1):
                         # Add Run object with runKind label and pack params as annotations
                         run.create(namespace=namespace, labels={'runKind': run_kind.value},
                                    annotations={pack_param_name: pack_param_value
                                                 for pack_param_name, pack_param_value in pack_params})
-                        submitted_runs.append(run)
+                        with submitted_runs_lock:
+                            cancelled = submission_cancelled.is_set()
+                            if not cancelled:
+                                submitted_runs.append(run)
+                        if cancelled:
+                            # ctrl-c handler has already taken a list of runs to purge
+                            delete_k8s_object("run", run.name)
+                            return
                         submit_draft_pack(run_name=run.name,
                                           run_folder=run_folder,
                                           namespace=namespace,
-                                          local_registry_port=proxy.tunnel_port)
+                                          local_registry_port=proxy.tunnel_port,
+                                          image_name=experiment_run_images.get(run.name))
                 except Exception as exe:
                     delete_environment(run_folder)
                     try:
@@ -392,6 +470,10 @@ def submit_experiment(template: str, name: str = None, run_kind: RunKinds = RunK
                         # update of non-existing run may fail
                         log.debug(Texts.ERROR_DURING_PATCHING_RUN.format(str(rexe)))
 
+            with progress_spinner(text=Texts.CREATING_RESOURCES_OF_RUNS_MSG.format(runs_count=len(runs_list)),
+                                  visible=parallel > 1):
+                map_concurrently(submit_run, list(zip(runs_list, experiment_run_folders)), parallel=parallel)
+
             # Delete experiment if no Runs were submitted
             if not submitted_runs:
                 click.echo(Texts.SUBMISSION_FAIL_ERROR_MSG)
@@ -475,7 +557,8 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
                                    script_folder_location: str = None,
                                    pack_params: List[Tuple[str, str]] = None,
                                    env_variables: List[str] = None,
-                                   requirements_file: str = None) -> PrepareExperimentResult:
+                                   requirements_file: str = None,
+                                   show_spinner: bool = True) -> PrepareExperimentResult:
     """
     Prepares draft's environment for a certain run based on provided parameters
     :param experiment_name: name of an experiment
@@ -489,8 +572,9 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
     :param pack_params: additional pack params
     :param env_variables: environmental variables to be passed to training
     :param requirements_file: path to a file with experiment requirements
-    :return: name of folder with an environment created for this run, a name of script used for training purposes
-            and count of Pods
+    :param show_spinner: if False, progress of creation of an environment is not displayed
+    :return: name of folder with an environment created for this run, a name of script used for training purposes,
+            count of Pods and a name of an image used by this run
     In case of any problems - an exception with a description of a problem is thrown
     """
     log.debug(f'Prepare run {run_name} environment - start')
@@ -498,7 +582,7 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
     try:
         # check environment directory
         check_run_environment(run_folder)
-        with spinner(text=Texts.CREATING_ENVIRONMENT_MSG.format(run_name=run_name)):
+        with progress_spinner(text=Texts.CREATING_ENVIRONMENT_MSG.format(run_name=run_name), visible=show_spinner):
             # create an environment
             create_environment(run_name, local_script_location, script_folder_location)
             # generate draft's data
@@ -506,6 +590,10 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
             # copy requirements file if it was provided, create empty requirements file otherwise
             dest_requirements_file = os.path.join(run_folder, 'requirements.txt')
             if requirements_file:
+                # requirements file copied from a script folder is shared with the content cache, so it is replaced
+                # instead of being overwritten
+                if os.path.lexists(dest_requirements_file):
+                    os.remove(dest_requirements_file)
                 shutil.copyfile(requirements_file, dest_requirements_file)
             else:
                 Path(dest_requirements_file).touch()
@@ -522,6 +610,11 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
                 ipynb_file_name = convert_py_to_ipynb(py_script_location, os.path.join(run_folder, FOLDER_DIR_NAME))
                 local_script_location = ipynb_file_name
 
+        # runs with identical build contexts (e.g. runs of a sweep, which differ only in parameters passed to
+        # a script) share one image, tagged with a digest of the context
+        build_context_digest = get_directory_digest(run_folder, ignored_objects=BUILD_CONTEXT_IGNORED_OBJECTS)
+        image_name = f'{experiment_name}:{build_context_digest[:IMAGE_TAG_DIGEST_LENGTH]}'
+
         # reconfigure draft's templates
         update_configuration(run_folder=run_folder, script_location=remote_script_location,
                              script_parameters=script_parameters,
@@ -529,14 +622,15 @@ def prepare_experiment_environment(experiment_name: str, run_name: str, local_sc
                              local_registry_port=local_registry_port, cluster_registry_port=cluster_registry_port,
                              pack_type=pack_type, pack_params=pack_params,
                              script_folder_location=script_folder_location,
-                             env_variables=env_variables)
+                             env_variables=env_variables, image_name=image_name, show_spinner=show_spinner)
 
         pod_count = get_pod_count(run_folder=run_folder, pack_type=pack_type)
     except Exception as exe:
         delete_environment(run_folder)
         raise SubmitExperimentError('Problems during creation of environments.') from exe
     log.debug(f'Prepare run {run_name} environment - finish')
-    return PrepareExperimentResult(folder_name=run_folder, script_name=local_script_location, pod_count=pod_count)
+    return PrepareExperimentResult(folder_name=run_folder, script_name=local_script_location, pod_count=pod_count,
+                                   image_name=image_name)
 
 
 def get_log_filename(log_output: str):
@@ -552,13 +646,15 @@ def get_log_filename(log_output: str):
     return None
 
 
-def submit_draft_pack(run_folder: str, run_name: str, local_registry_port: int, namespace: str = None):
+def submit_draft_pack(run_folder: str, run_name: str, local_registry_port: int, namespace: str = None,
+                      image_name: str = None):
     """
     Submits one run using draft's environment located in a folder given as a parameter.
     :param run_folder: location of a folder with a description of an environment
     :param run_name: run's name
     :param local_registry_port: port of destination local registry where pack should be submitted
     :param namespace: namespace where tiller used during deployment is located
+    :param image_name: name of an image used by a run, if not given - image is named after the run
     In case of any problems it throws an exception with a description of a problem
     """
     log.debug(f'Submit one run: {run_folder} - start')
@@ -567,7 +663,8 @@ def submit_draft_pack(run_folder: str, run_name: str, local_registry_port: int,
     output, exit_code = cmd.up(run_name=run_name,
                                local_registry_port=local_registry_port,
                                working_directory=run_folder,
-                               namespace=namespace)
+                               namespace=namespace,
+                               image_name=image_name)
 
     if exit_code:
         delete_environment(run_folder)
@@ -15,7 +15,6 @@
 #
 
 import sys
-import time
 from pathlib import Path
 from typing import List, Tuple
 
@@ -24,7 +23,8 @@ from tabulate import tabulate
 
 from util.cli_state import common_options, pass_state, State
 from util.aliascmd import AliasCmd
-from util.k8s.k8s_info import get_kubectl_current_context_namespace, check_pods_status, PodStatus
+from util.k8s.k8s_info import get_kubectl_current_context_namespace, PodStatus
+from util.k8s.k8s_watch import wait_for_pods_status
 from util.launcher import launch_app
 from util.app_names import NAUTAAppNames
 from commands.experiment.common import submit_experiment, RUN_MESSAGE, RUN_NAME, RUN_PARAMETERS, RUN_STATUS, \
@@ -38,7 +38,8 @@ from cli_text_consts import ExperimentInteractCmdTexts as Texts
 from platform_resources.experiment import ExperimentStatus, Experiment
 from platform_resources.experiment_utils import generate_name, list_k8s_experiments_by_label
 
-JUPYTER_CHECK_POD_READY_TRIES = 60
+# time (in seconds) of waiting for jupyter pods
+JUPYTER_POD_READY_TIMEOUT = 60
 
 ACCEPTED_NUMBER_OF_NOTEBOOKS = 2
 
@@ -159,15 +160,13 @@ def interact(state: State, name: str, filename: str, pack_param: List[Tuple[str,
         url_end = url_end + Path(filename).name
 
     # wait until all jupyter pods are ready
-    for i in range(JUPYTER_CHECK_POD_READY_TRIES):
-        try:
-            if check_pods_status(run_name=name, namespace=current_namespace, status=PodStatus.RUNNING):
-                break
-        except Exception:
-            handle_error(logger, Texts.NOTEBOOK_STATE_CHECK_ERROR_MSG)
-            sys.exit(1)
-        time.sleep(1)
-    else:
+    try:
+        pods_ready = wait_for_pods_status(run_name=name, namespace=current_namespace, status=PodStatus.RUNNING,
+                                          timeout=JUPYTER_POD_READY_TIMEOUT)
+    except Exception:
+        handle_error(logger, Texts.NOTEBOOK_STATE_CHECK_ERROR_MSG)
+        sys.exit(1)
+    if not pods_ready:
         handle_error(user_msg=Texts.NOTEBOOK_NOT_READY_ERROR_MSG)
         sys.exit(1)
 
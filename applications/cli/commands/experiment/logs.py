@@ -40,16 +40,20 @@ LOG_RUNS_KINDS = [RunKinds.TRAINING, RunKinds.JUPYTER]
               help=Texts.HELP_P)
 @click.option('-m', '--match', help=Texts.HELP_M)
 @click.option('-o', '--output', help=Texts.HELP_O, is_flag=True)
+@click.option('-c', '--compress', help=Texts.HELP_C, is_flag=True, default=False)
 @click.option('-pa', '--pager', help=Texts.HELP_PAGER, is_flag=True, default=False)
 @click.option('-f', '--follow', help=Texts.HELP_F, is_flag=True, default=False)
+@click.option('-st', '--stats', help=Texts.HELP_STATS, is_flag=True, default=False)
 @common_options(admin_command=False)
 @pass_state
 def logs(state: State, experiment_name: str, min_severity: SeverityLevel, start_date: str,
-         end_date: str, pod_ids: str, pod_status: PodStatus, match: str, output: bool, pager: bool, follow: bool):
+         end_date: str, pod_ids: str, pod_status: PodStatus, match: str, output: bool, compress: bool, pager: bool,
+         follow: bool, stats: bool):
     """
     Show logs for a given experiment.
     """
     # check whether we have runs with a given name
     get_logs(experiment_name=experiment_name, min_severity=min_severity, start_date=start_date, end_date=end_date,
              pod_ids=pod_ids, pod_status=pod_status, match=match, output=output, pager=pager, follow=follow,
-             runs_kinds=LOG_RUNS_KINDS, instance_type="experiment")
+             runs_kinds=LOG_RUNS_KINDS, instance_type="experiment", compress=compress,
+             stats=stats)
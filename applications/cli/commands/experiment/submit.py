@@ -118,12 +118,13 @@ def format_run_message(run_message: Optional[str]) -> str:
 @click.option("-ps", "--parameter-set", multiple=True, help=Texts.HELP_PS)
 @click.option("-e", "--env", multiple=True, help=Texts.HELP_E, callback=validate_env_paramater)
 @click.option("-r", "--requirements", type=click.Path(exists=True, dir_okay=False), required=False, help=Texts.HELP_R)
+@click.option("--parallel", type=click.IntRange(min=1), default=1, help=Texts.HELP_PARALLEL)
 @click.argument("script-parameters", nargs=-1, metavar='[-- script-parameters]', callback=clean_script_parameters)
 @common_options(admin_command=False)
 @pass_state
 def submit(state: State, script_location: str, script_folder_location: str, template: str, name: str,
            pack_param: List[Tuple[str, str]], parameter_range: List[Tuple[str, str]], parameter_set: Tuple[str, ...],
-           env: List[str], script_parameters: Tuple[str, ...], requirements: str):
+           env: List[str], script_parameters: Tuple[str, ...], requirements: str, parallel: int):
     logger.debug(Texts.SUBMIT_START_LOG_MSG)
     validate_script_location(script_location)
     validate_pack_params(pack_param)
@@ -147,7 +148,8 @@ def submit(state: State, script_location: str, script_folder_location: str, temp
                                                       template=template, name=name, pack_params=pack_param,
                                                       parameter_range=parameter_range, parameter_set=parameter_set,
                                                       script_parameters=script_parameters,
-                                                      env_variables=env, requirements_file=requirements)
+                                                      env_variables=env, requirements_file=requirements,
+                                                      parallel=parallel)
     except K8sProxyCloseError as exe:
         handle_error(user_msg=exe.message)
         click.echo(exe.message)
@@ -368,8 +368,7 @@ def test_cancel_experiment_success_with_purge(prepare_cancel_experiment_mocks: C
     prepare_cancel_experiment_mocks.list_runs.return_value = [RUN_QUEUED_COPY]
     update_run_mock = prepare_cancel_experiment_mocks.mocker.patch.object(RUN_QUEUED_COPY, 'update')
     update_exp_mock = prepare_cancel_experiment_mocks.mocker.patch.object(TEST_EXPERIMENTS[0], 'update')
-    cancel.purge_experiment(exp_name="experiment-1", runs_to_purge=[RUN_QUEUED_COPY], namespace="namespace",
-                            k8s_es_client=prepare_cancel_experiment_mocks.k8s_es_client)
+    cancel.purge_experiment(exp_name="experiment-1", runs_to_purge=[RUN_QUEUED_COPY], namespace="namespace")
 
     assert update_exp_mock.call_count == 1
     assert update_run_mock.call_count == 0
@@ -387,8 +386,7 @@ def test_cancel_experiment_purge_failure(prepare_cancel_experiment_mocks: Cancel
     update_run_mock = prepare_cancel_experiment_mocks.mocker.patch.object(RUN_QUEUED_COPY, 'update')
     update_exp_mock = prepare_cancel_experiment_mocks.mocker.patch.object(TEST_EXPERIMENTS[0], 'update')
     del_list, not_del_list = cancel.purge_experiment(exp_name="experiment-1", runs_to_purge=[RUN_QUEUED_COPY],
-                                                     namespace="namespace",
-                                                     k8s_es_client=prepare_cancel_experiment_mocks.k8s_es_client)
+                                                     namespace="namespace")
 
     assert len(del_list) == 0
     assert len(not_del_list) == 1
@@ -407,8 +405,7 @@ def test_cancel_experiment_with_purge_delete_failure(prepare_cancel_experiment_m
     update_exp_mock = prepare_cancel_experiment_mocks.mocker.patch.object(TEST_EXPERIMENTS[0], 'update')
     # CAN-1099 - it should be uncommented after repairing docker gc
     # prepare_cancel_experiment_mocks.delete_images_for_experiment.side_effect = RuntimeError()
-    cancel.purge_experiment(exp_name="experiment-1", runs_to_purge=[RUN_QUEUED_COPY], namespace="namespace",
-                            k8s_es_client=prepare_cancel_experiment_mocks.k8s_es_client)
+    cancel.purge_experiment(exp_name="experiment-1", runs_to_purge=[RUN_QUEUED_COPY], namespace="namespace")
 
     assert update_run_mock.call_count == 0
     assert update_exp_mock.call_count == 1
@@ -461,3 +458,23 @@ def test_cancel_pods(mocker):
     cancel.cancel_pods_mode(fake_user_namespace_name, 'fake-name', 'podid1,podid2', pod_status='running')
 
     assert fake_k8s_pods[0].delete.call_count == 1
+
+
+def test_purge_runs_logs(mocker):
+    es_client_mock = mocker.MagicMock()
+    es_client_mock.delete_logs_for_runs.side_effect = lambda runs, namespace, progress_callback: \
+        progress_callback(5, 10)
+
+    cancel.purge_runs_logs(runs=[RUN_QUEUED, RUN_COMPLETE], namespace='namespace', k8s_es_client=es_client_mock)
+
+    es_client_mock.delete_logs_for_runs.assert_called_once_with(runs=[RUN_QUEUED.name, RUN_COMPLETE.name],
+                                                                namespace='namespace', progress_callback=mocker.ANY)
+
+
+def test_purge_runs_logs_failure(mocker):
+    es_client_mock = mocker.MagicMock()
+    es_client_mock.delete_logs_for_runs.side_effect = RuntimeError
+
+    cancel.purge_runs_logs(runs=[RUN_QUEUED], namespace='namespace', k8s_es_client=es_client_mock)
+
+    assert es_client_mock.delete_logs_for_runs.call_count == 1
@@ -15,15 +15,21 @@
 #
 
 
+from concurrent.futures import ThreadPoolExecutor
 import os
+import signal
+import threading
+import time
 
 import pytest
 from unittest.mock import patch, mock_open
 
+from commands.experiment import common
 from commands.experiment.common import submit_experiment, values_range, \
     analyze_ps_parameters_list, analyze_pr_parameters_list, prepare_list_of_values, prepare_list_of_runs, \
     check_enclosing_brackets, delete_environment, create_environment, get_run_environment_path, check_run_environment, \
-    RunKinds, validate_pack_params_names, get_log_filename, validate_pack, prepare_experiment_environment
+    RunKinds, validate_pack_params_names, get_log_filename, validate_pack, prepare_experiment_environment, \
+    map_concurrently
 
 from util.exceptions import SubmitExperimentError
 import util.config
@@ -90,7 +96,7 @@ def test_create_environment_success(config_mock, mocker):
     mocker.patch("os.chmod")
     sem_file_creation_mock = mocker.patch("commands.experiment.common.Path.touch")
     sh_copy_mock = mocker.patch("shutil.copy2")
-    sh_copytree_mock = mocker.patch("commands.experiment.common.copy_tree")
+    sh_copytree_mock = mocker.patch("commands.experiment.common.ContentCache").return_value.copy_tree
 
     experiment_path = create_environment(EXPERIMENT_NAME, SCRIPT_LOCATION, EXPERIMENT_FOLDER)
 
@@ -105,7 +111,7 @@ def test_create_environment_makedir_error(config_mock, mocker):
     os_pexists_mock = mocker.patch("os.path.exists", side_effect=[False])
     mocker.patch("os.makedirs", side_effect=Exception("Test exception"))
     sh_copy_mock = mocker.patch("shutil.copy2")
-    copytree_mock = mocker.patch("commands.experiment.common.copy_tree")
+    copytree_mock = mocker.patch("commands.experiment.common.ContentCache").return_value.copy_tree
 
     with pytest.raises(SubmitExperimentError):
         create_environment(EXPERIMENT_NAME, SCRIPT_LOCATION, EXPERIMENT_FOLDER)
@@ -132,7 +138,7 @@ def test_create_environment_copy_error(config_mock, mocker):
     os_pexists_mock = mocker.patch("os.path.exists", side_effect=[False])
     mocker.patch("os.makedirs")
     sh_copy_mock = mocker.patch("shutil.copy2", side_effect=Exception("Test exception"))
-    copytree_mock = mocker.patch("commands.experiment.common.copy_tree")
+    copytree_mock = mocker.patch("commands.experiment.common.ContentCache").return_value.copy_tree
     mocker.patch("commands.experiment.common.Path.touch")
 
     with pytest.raises(SubmitExperimentError):
@@ -161,6 +167,7 @@ class SubmitExperimentMocks:
         self.cmd_create = mocker.patch("draft.cmd.create", side_effect=[("", 0)])
         self.submit_one = mocker.patch("commands.experiment.common.submit_draft_pack")
         self.update_conf = mocker.patch("commands.experiment.common.update_configuration", side_effect=[0])
+        self.pull_base_image = mocker.patch("commands.experiment.common.pull_pack_base_image")
         self.create_env = mocker.patch("commands.experiment.common.create_environment",
                                        side_effect=[(EXPERIMENT_FOLDER, "")])
         self.check_run_env = mocker.patch("commands.experiment.common.check_run_environment",
@@ -315,6 +322,23 @@ def test_submit_with_name_success(prepare_mocks: SubmitExperimentMocks):
     check_asserts(prepare_mocks)
 
 
+def test_submit_cancelled_while_run_created(prepare_mocks: SubmitExperimentMocks):
+    prepare_mocks.mocker.patch('commands.experiment.common.submitted_runs', [])
+    prepare_mocks.add_run.side_effect = lambda *args, **kwargs: common.submission_cancelled.set()
+
+    try:
+        runs_list, _, _ = submit_experiment(script_location=SCRIPT_LOCATION, script_folder_location=None,
+                                            pack_params=[], template=None, name=None, parameter_range=[],
+                                            parameter_set=[], script_parameters=[], run_kind=RunKinds.TRAINING)
+    finally:
+        common.submission_cancelled.clear()
+
+    # run created after ctrl-c isn't purged by the handler, so it is removed by a worker
+    prepare_mocks.delete_k8s_object_mock.assert_any_call('run', runs_list[0].name)
+    assert common.submitted_runs == []
+    assert prepare_mocks.submit_one.call_count == 0
+
+
 def test_values_range_int():
     list_to_check_1 = ["1", "3", "5", "7", "9"]
     list_to_check_2 = ["2", "4", "6", "8", "10"]
@@ -656,3 +680,68 @@ def test_prepare_experiment_environment_requirements_file_not_provided(tmpdir, c
 
     assert exp_env_mocks.copy_requirements_file_mock.call_count == 0
     assert exp_env_mocks.create_requirements_file_mock.call_count == 1
+
+
+def test_prepare_experiment_environment_image_name(tmpdir, config_mock, exp_env_mocks: ExpEnvMocks, mocker):
+    mocker.patch('commands.experiment.common.get_directory_digest', return_value='0123456789abcdef0123')
+
+    result = prepare_experiment_environment(requirements_file=None, experiment_name='bla', run_name='bla-1',
+                                            script_folder_location=None, local_registry_port=1,
+                                            cluster_registry_port=1, local_script_location=tmpdir.strpath,
+                                            pack_type='fake_pack', script_parameters=('experiment.py',))
+
+    assert result.image_name == 'bla:0123456789abcdef'
+    assert exp_env_mocks.update_configuration_mock.call_args[1]['image_name'] == 'bla:0123456789abcdef'
+
+
+@pytest.mark.parametrize('parallel', [1, 3])
+def test_map_concurrently(parallel):
+    assert map_concurrently(lambda x: x * 2, range(10), parallel=parallel) == [x * 2 for x in range(10)]
+
+
+def test_map_concurrently_failure():
+    processed_items = []
+
+    def process_item(item: int):
+        if item == 0:
+            raise SubmitExperimentError('failure')
+        processed_items.append(item)
+
+    with pytest.raises(SubmitExperimentError):
+        map_concurrently(process_item, range(5), parallel=2)
+
+    assert sorted(processed_items) == [1, 2, 3, 4]
+
+
+def test_ctrl_c_handler_for_submit_doesnt_wait_for_workers(mocker):
+    mocker.patch('commands.experiment.common.psutil.Process')
+    mocker.patch('commands.experiment.common.exit')
+    delete_k8s_object_mock = mocker.patch('commands.experiment.common.delete_k8s_object')
+    delete_helm_release_mock = mocker.patch('commands.experiment.common.delete_helm_release')
+    run = Run(name='exp-1', experiment_name='exp')
+    mocker.patch('commands.experiment.common.submitted_runs', [run])
+    mocker.patch('commands.experiment.common.submitted_experiment', 'exp')
+
+    worker_started = threading.Event()
+    worker_released = threading.Event()
+
+    def submit_run():
+        worker_started.set()
+        worker_released.wait(timeout=5)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        running_future = executor.submit(submit_run)
+        pending_future = executor.submit(submit_run)
+        mocker.patch('commands.experiment.common.submission_futures', [running_future, pending_future])
+        worker_started.wait()
+        try:
+            common.ctrl_c_handler_for_submit(signal.SIGINT, None)
+            assert common.submission_cancelled.is_set()
+            assert not running_future.done()
+        finally:
+            worker_released.set()
+            common.submission_cancelled.clear()
+
+    assert pending_future.cancelled()
+    delete_k8s_object_mock.assert_any_call('run', 'exp-1')
+    delete_helm_release_mock.assert_called_once_with('exp-1', namespace=mocker.ANY, purge=True)
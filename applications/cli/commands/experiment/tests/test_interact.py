@@ -57,7 +57,8 @@ class InteractMocks:
         self.submit_experiment = mocker.patch("commands.experiment.interact.submit_experiment",
                                               return_value=(SUBMITTED_RUNS, {}, ""))
         self.launch_app = mocker.patch("commands.experiment.interact.launch_app")
-        self.check_pods_status = mocker.patch("commands.experiment.interact.check_pods_status", return_value=True)
+        self.wait_for_pods_status = mocker.patch("commands.experiment.interact.wait_for_pods_status",
+                                                 return_value=True)
         self.calc_number = mocker.patch("commands.experiment.interact.calculate_number_of_running_jupyters",
                                         return_value=1)
 
@@ -141,8 +142,7 @@ def test_full_interact_without_name(prepare_mocks: InteractMocks):
 
 
 def test_interact_pods_not_created(prepare_mocks: InteractMocks):
-    interact.JUPYTER_CHECK_POD_READY_TRIES = 1
-    prepare_mocks.check_pods_status.return_value = False
+    prepare_mocks.wait_for_pods_status.return_value = False
 
     result = CliRunner().invoke(interact.interact, ["-n", CORRECT_INTERACT_NAME], input="y")
 
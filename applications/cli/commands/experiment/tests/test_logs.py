@@ -20,6 +20,7 @@ import pytest
 
 from commands import common
 from commands.experiment import logs
+from logs_aggregator.k8s_es_client import LogsStats
 from logs_aggregator.k8s_log_entry import LogEntry
 from util.exceptions import K8sProxyOpenError, K8sProxyCloseError
 from platform_resources.run import Run
@@ -136,12 +137,12 @@ def test_show_logs_from_two_experiments(mocker):
     runner = CliRunner()
     m = mock_open()
     with patch("builtins.open", m) as open_mock:
-        exception = RuntimeError()
-        exception.message = "Cause of an error"
+        # exceptions raised while writing files (e.g. OSError) have no message attribute
+        exception = OSError("Cause of an error")
         open_mock.return_value.__enter__.side_effect = exception
         result = runner.invoke(logs.logs, ['fake-experiment', '-o'], input='y')
 
-    assert CmdsCommonTexts.LOGS_STORING_ERROR.format(exception_message=exception.message) in result.output
+    assert CmdsCommonTexts.LOGS_STORING_ERROR.format(exception_message=str(exception)) in result.output
     assert proxy_mock.call_count == 1, "port forwarding was not initiated"
     assert get_current_namespace_mock.call_count == 1, "namespace was not retrieved"
     assert list_runs_mock.call_count == 1, "run was not retrieved"
@@ -176,7 +177,7 @@ def test_show_logs_match(mocker):
     es_client_mock = mocker.patch("commands.common.K8sElasticSearchClient")
 
     es_client_instance = es_client_mock.return_value
-    es_client_instance.get_experiment_logs_generator.return_value = TEST_LOG_ENTRIES
+    es_client_instance.get_runs_logs_generator.return_value = TEST_LOG_ENTRIES
 
     proxy_mock = mocker.patch.object(common, 'K8sProxy')
 
@@ -184,8 +185,10 @@ def test_show_logs_match(mocker):
     fake_experiment_1_name = 'fake-experiment-1'
     fake_experiment_2_name = 'fake-experiment-2'
     list_runs_mock = mocker.patch('commands.common.Run.list')
-    list_runs_mock.return_value = [Run(name=fake_experiment_1_name, experiment_name=fake_experiment_1_name),
-                                   Run(name=fake_experiment_2_name, experiment_name=fake_experiment_2_name)]
+    list_runs_mock.return_value = [Run(name=fake_experiment_1_name, experiment_name=fake_experiment_1_name,
+                                       creation_timestamp='2018-04-26T13:43:01Z'),
+                                   Run(name=fake_experiment_2_name, experiment_name=fake_experiment_2_name,
+                                       creation_timestamp='2018-04-26T13:42:01Z')]
 
     runner = CliRunner()
     result = runner.invoke(logs.logs, ['-m', 'fake-experiment'])
@@ -193,7 +196,97 @@ def test_show_logs_match(mocker):
     assert proxy_mock.call_count == 1, 'port forwarding was not initiated'
     assert get_current_namespace_mock.call_count == 1, 'namespace was not retrieved'
     assert list_runs_mock.call_count == 1, 'run was not retrieved'
-    assert es_client_instance.get_experiment_logs_generator.call_count == 2, 'Experiment logs were not retrieved'
+    assert es_client_instance.get_runs_logs_generator.call_count == 1, 'Experiment logs were not retrieved'
+    assert es_client_instance.get_runs_logs_generator.call_args[1]['follow'] is False
 
     assert fake_experiment_1_name in result.output
     assert fake_experiment_2_name in result.output
+
+
+def test_show_logs_match_follow(mocker):
+    es_client_mock = mocker.patch("commands.common.K8sElasticSearchClient")
+    es_client_instance = es_client_mock.return_value
+    es_client_instance.get_runs_logs_generator.return_value = TEST_LOG_ENTRIES
+
+    mocker.patch.object(common, 'K8sProxy')
+    mocker.patch('commands.common.get_kubectl_current_context_namespace')
+    list_runs_mock = mocker.patch('commands.common.Run.list')
+    list_runs_mock.return_value = [Run(name='fake-experiment-1', experiment_name='fake-experiment-1',
+                                       creation_timestamp='2018-04-26T13:43:01Z'),
+                                   Run(name='fake-experiment-2', experiment_name='fake-experiment-2',
+                                       creation_timestamp='2018-04-26T13:42:01Z')]
+
+    runner = CliRunner()
+    result = runner.invoke(logs.logs, ['-m', 'fake-experiment', '--follow'])
+
+    assert es_client_instance.get_experiment_logs_generator.call_count == 0
+    assert es_client_instance.get_runs_logs_generator.call_count == 1, 'Experiment logs were not retrieved'
+    assert es_client_instance.get_runs_logs_generator.call_args[1]['start_date'] == '2018-04-26T13:42:01Z'
+    assert TEST_LOG_ENTRIES[0].content in result.output
+
+
+def test_show_logs_match_to_files(mocker):
+    es_client_mock = mocker.patch("commands.common.K8sElasticSearchClient")
+    es_client_instance = es_client_mock.return_value
+    es_client_instance.get_experiment_logs_generator.return_value = TEST_LOG_ENTRIES
+
+    mocker.patch.object(common, 'K8sProxy')
+    mocker.patch('commands.common.get_kubectl_current_context_namespace')
+    list_runs_mock = mocker.patch('commands.common.Run.list')
+    list_runs_mock.return_value = [Run(name='fake-experiment-1', experiment_name='fake-experiment-1'),
+                                   Run(name='fake-experiment-2', experiment_name='fake-experiment-2'),
+                                   Run(name='fake-experiment-3', experiment_name='fake-experiment-3')]
+
+    runner = CliRunner()
+    m = mock_open()
+    with patch("builtins.open", m) as open_mock:
+        result = runner.invoke(logs.logs, ['-m', 'fake-experiment', '-o'], input='y\nn\ny\n')
+
+    assert es_client_instance.get_experiment_logs_generator.call_count == 3, "Experiment logs were not retrieved"
+    assert sorted(open_call[0][0] for open_call in open_mock.call_args_list) == ['fake-experiment-1.log',
+                                                                                 'fake-experiment-3.log']
+    assert CmdsCommonTexts.LOGS_STORING_CANCEL_MESSAGE in result.output
+    assert CmdsCommonTexts.LOGS_STORING_FINAL_MESSAGE in result.output
+
+
+def test_show_logs_to_compressed_file(mocker):
+    es_client_mock = mocker.patch("commands.common.K8sElasticSearchClient")
+    es_client_instance = es_client_mock.return_value
+    es_client_instance.get_runs_logs_query.return_value = ({'query': {}}, [])
+    write_mock = mocker.patch('commands.common.write_compressed_logs_to_file')
+
+    mocker.patch.object(common, 'K8sProxy')
+    mocker.patch('commands.common.get_kubectl_current_context_namespace')
+    mocker.patch('commands.common.Run.list').return_value = [Run(name='fake-experiment',
+                                                                 experiment_name='fake-experiment')]
+
+    runner = CliRunner()
+    result = runner.invoke(logs.logs, ['fake-experiment', '-o', '-c'], input='y')
+
+    assert write_mock.call_count == 1, "File wasn't saved."
+    assert write_mock.call_args[1]['filename'] == 'fake-experiment.log.gz'
+    assert write_mock.call_args[1]['query_body'] == {'query': {}}
+    assert CmdsCommonTexts.LOGS_STORING_FINAL_MESSAGE in result.output
+
+
+def test_show_logs_stats(mocker):
+    es_client_mock = mocker.patch("commands.common.K8sElasticSearchClient")
+    es_client_instance = es_client_mock.return_value
+    es_client_instance.get_runs_logs_stats.return_value = LogsStats(
+        total=2, pods={'understood-gnat-mysql-868b556f8f-lwdr9': 2}, severities={'ERROR': 1, 'INFO': 0},
+        histogram=[('2018-04-17T09:28:00+0000', 2)])
+
+    mocker.patch.object(common, 'K8sProxy')
+    mocker.patch('commands.common.get_kubectl_current_context_namespace')
+    list_runs_mock = mocker.patch('commands.common.Run.list')
+    list_runs_mock.return_value = [Run(name='fake-experiment', experiment_name='fake-experiment',
+                                       creation_timestamp='2018-04-26T13:43:01Z')]
+
+    runner = CliRunner()
+    result = runner.invoke(logs.logs, ['fake-experiment', '--stats'])
+
+    assert result.exit_code == 0
+    assert es_client_instance.get_runs_logs_stats.call_count == 1
+    assert es_client_instance.get_experiment_logs_generator.call_count == 0
+    assert 'understood-gnat-mysql-868b556f8f-lwdr9' in result.output
+    assert '2018-04-17T09:28:00+0000' in result.output
@@ -235,6 +235,21 @@ def test_submit_requirements(prepare_mocks: SubmitMocks, tmpdir):
     assert result.exit_code == 0
 
 
+def test_submit_parallel(prepare_mocks: SubmitMocks):
+    result = CliRunner().invoke(submit, [SCRIPT_LOCATION, '--parallel', '4'])
+
+    _, submit_experiment_kwargs = prepare_mocks.submit_experiment.call_args
+    assert submit_experiment_kwargs.get('parallel') == 4
+    assert result.exit_code == 0
+
+
+def test_submit_parallel_wrong_value(prepare_mocks: SubmitMocks):
+    result = CliRunner().invoke(submit, [SCRIPT_LOCATION, '--parallel', '0'])
+
+    assert prepare_mocks.submit_experiment.call_count == 0
+    assert result.exit_code == 2
+
+
 def test_submit_requirements_wrong_path(prepare_mocks: SubmitMocks, tmpdir):
     empty_dir = tmpdir.mkdir("text-exp")
     wrong_requirements_file_path = os.path.join(empty_dir.strpath, 'requirements.txt')
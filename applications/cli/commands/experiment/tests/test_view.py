@@ -263,6 +263,15 @@ def test_sum_cpu_resources_example_list_with_mixed():
     assert result == expected_result
 
 
+def test_sum_cpu_resources_example_list_with_nano_and_micro_cpus():
+    cpu_resources = ["30m", "2435978n", "1000n", "1500u"]
+    expected_result = "36m"
+
+    result = view.sum_cpu_resources(cpu_resources)
+
+    assert result == expected_result
+
+
 def test_sum_mem_resources_empty_list():
     mem_resources = []
     expected_result = "0KiB"
@@ -28,6 +28,7 @@ from util.aliascmd import AliasCmd, AliasGroup
 from util.app_names import NAUTAAppNames
 from util.exceptions import LaunchError, ProxyClosingError
 from util.k8s.k8s_info import get_kubectl_current_context_namespace
+from util.k8s.k8s_watch import wait_for_pods, are_pods_ready
 from util.k8s.k8s_proxy_context_manager import K8sProxy
 from util.launcher import launch_app
 from util.logger import initialize_logger
@@ -39,8 +40,11 @@ logger = initialize_logger('commands.launch')
 
 FORWARDED_URL = 'http://localhost:{}'
 
-TENSORBOARD_TRIES_COUNT = 20
-TENSORBOARD_CHECK_BACKOFF_SECONDS = 5
+# after pods of tensorboard are ready, tensorboard service is polled for 100 seconds until tensorboard is reachable
+TENSORBOARD_TRIES_COUNT = 100
+TENSORBOARD_CHECK_BACKOFF_SECONDS = 1
+# time (in seconds) of waiting for pods of tensorboard
+TENSORBOARD_POD_READY_TIMEOUT = 100
 
 
 # noinspection PyUnusedLocal
@@ -92,6 +96,7 @@ def tensorboard(state: State, no_launch: bool, tensorboard_service_client_port:
             handle_error(logger, err_message, err_message, add_verbosity_msg=state.verbosity == 0)
             sys.exit(1)
 
+        tensorboard_pods_ready = False
         for i in range(TENSORBOARD_TRIES_COUNT):
             # noinspection PyTypeChecker
             # tb.id is str
@@ -103,6 +108,20 @@ def tensorboard(state: State, no_launch: bool, tensorboard_service_client_port:
                                       app_name=f"tensorboard-{tb.id}")
                 return
             logger.warning(Texts.TB_WAITING_FOR_TB_MSG.format(tb_id=tb.id, tb_status_value=tb.status.value))
+            if not tensorboard_pods_ready:
+                # pods of tensorboard are watched until they are ready, afterwards tensorboard service is polled
+                # only until tensorboard is reachable
+                try:
+                    tensorboard_pods_ready = wait_for_pods(namespace=current_namespace,
+                                                           label_selector=f'type=nauta-tensorboard,id={tb.id}',
+                                                           condition=are_pods_ready,
+                                                           timeout=TENSORBOARD_POD_READY_TIMEOUT)
+                except Exception:
+                    handle_error(logger, Texts.TB_POD_STATE_CHECK_ERROR_MSG, Texts.TB_POD_STATE_CHECK_ERROR_MSG,
+                                 add_verbosity_msg=state.verbosity == 0)
+                    sys.exit(1)
+                if not tensorboard_pods_ready:
+                    break
             sleep(TENSORBOARD_CHECK_BACKOFF_SECONDS)
 
         click.echo(Texts.TB_TIMEOUT_ERROR_MSG)
@@ -214,6 +214,7 @@ def launch_tensorboard_command_mock(mocker):
     mocker.patch.object(launch, 'get_kubectl_current_context_namespace').return_value = "current-namespace"
 
     mocker.patch.object(launch, 'sleep')
+    mocker.patch.object(launch, 'wait_for_pods', return_value=True)
     mocker.patch('commands.launch.launch.launch_app_with_proxy')
 
 
@@ -268,6 +269,8 @@ def test_tensorboard_command_retries(mocker, launch_tensorboard_command_mock):
     assert launch.TensorboardServiceClient.get_tensorboard.call_count == 4
     assert commands.launch.launch.launch_app_with_proxy.call_count == 1
     assert launch.sleep.call_count == 3
+    assert launch.wait_for_pods.call_count == 1
+    assert launch.wait_for_pods.call_args[1]['label_selector'] == f'type=nauta-tensorboard,id={FAKE_TENSORBOARD_ID}'
     assert result.exit_code == 0
 
 
@@ -289,6 +292,38 @@ def test_tensorboard_command_too_many_retries(mocker, launch_tensorboard_command
     assert result.exit_code == 2
 
 
+# noinspection PyUnusedLocal,PyShadowingNames,PyUnresolvedReferences
+def test_tensorboard_command_pods_not_ready(mocker, launch_tensorboard_command_mock):
+    mocker.patch('tensorboard.client.TensorboardServiceClient.create_tensorboard').return_value = \
+        FAKE_CREATING_TENSORBOARD
+    mocker.patch('tensorboard.client.TensorboardServiceClient.get_tensorboard').return_value = \
+        FAKE_CREATING_TENSORBOARD
+    launch.wait_for_pods.return_value = False
+
+    runner = CliRunner()
+    result = runner.invoke(launch.launch, ['tensorboard', 'some-exp'])
+
+    assert launch.TensorboardServiceClient.get_tensorboard.call_count == 1
+    assert launch.sleep.call_count == 0
+    assert result.exit_code == 2
+
+
+# noinspection PyUnusedLocal,PyShadowingNames,PyUnresolvedReferences
+def test_tensorboard_command_pods_check_exception(mocker, launch_tensorboard_command_mock):
+    mocker.patch('tensorboard.client.TensorboardServiceClient.create_tensorboard').return_value = \
+        FAKE_CREATING_TENSORBOARD
+    mocker.patch('tensorboard.client.TensorboardServiceClient.get_tensorboard').return_value = \
+        FAKE_CREATING_TENSORBOARD
+    launch.wait_for_pods.side_effect = RuntimeError
+
+    runner = CliRunner()
+    result = runner.invoke(launch.launch, ['tensorboard', 'some-exp'])
+
+    assert Texts.TB_POD_STATE_CHECK_ERROR_MSG in result.output
+    assert launch.sleep.call_count == 0
+    assert result.exit_code == 1
+
+
 # noinspection PyUnusedLocal,PyShadowingNames
 def test_tensorboard_command_create_exception(mocker, launch_tensorboard_command_mock):
     mocker.patch('tensorboard.client.TensorboardServiceClient.create_tensorboard').side_effect = \
@@ -14,9 +14,14 @@
 # limitations under the License.
 #
 
+import gzip
+import os
+
 import dateutil
+import pytest
 
 from commands import common
+from logs_aggregator.k8s_log_entry import LogEntry
 from platform_resources.run import Run, RunStatus
 from platform_resources.experiment import Experiment
 
@@ -153,9 +158,9 @@ def test_list_experiments_failure(mocker):
 
 
 def test_list_experiments_one_user_success(mocker, capsys):
-    api_list_runs_mock = mocker.patch("commands.common.Run.list")
+    api_list_runs_mock = mocker.patch("commands.common.Run.list_generator")
     mocker.patch("dateutil.tz.tzlocal").return_value = dateutil.tz.UTC
-    api_list_runs_mock.return_value = TEST_RUNS
+    api_list_runs_mock.return_value = iter(TEST_RUNS)
 
     get_namespace_mock = mocker.patch("commands.common.get_kubectl_current_context_namespace")
 
@@ -174,6 +179,24 @@ def test_list_experiments_one_user_success(mocker, capsys):
     assert api_list_runs_mock.call_count == 1, "Runs were not retrieved"
 
 
+def test_list_experiments_count_newest_runs(mocker, capsys):
+    api_list_runs_mock = mocker.patch("commands.common.Run.list_generator")
+    api_list_runs_mock.return_value = iter(reversed(TEST_RUNS_CREATING[:2] + TEST_RUNS))
+
+    mocker.patch("commands.common.get_kubectl_current_context_namespace")
+
+    common.list_runs_in_cli(verbosity_lvl=0, all_users=True, name="", status=None, listed_runs_kinds=[],
+                            runs_list_headers=TEST_LIST_HEADERS, with_metrics=False, count=2, brief=True)
+
+    captured = capsys.readouterr()
+    output_lines = captured.out.splitlines()
+
+    assert len(output_lines) == 4
+    assert "test-experiment-2" in output_lines[2]
+    assert "test-experiment-2" in output_lines[3]
+    assert "test-experiment-1" not in captured.out
+
+
 def test_list_experiments_brief_success(mocker, capsys):
     api_list_runs_mock = mocker.patch("commands.common.Run.list")
     api_list_runs_mock.return_value = TEST_RUNS
@@ -200,6 +223,88 @@ def test_replace_initalizing_runs_no_changes():
 
 
 def test_replace_initializing_runs_two_not_ready(mocker):
-    get_experiment_mock = mocker.patch("commands.common.Experiment.get", return_value=TEST_EXPERIMENT)
-    assert len(common.replace_initializing_runs(TEST_RUNS_CREATING)) == 5
-    assert get_experiment_mock.call_count == 2
+    list_experiments_mock = mocker.patch("commands.common.Experiment.list", return_value=[
+        Experiment(name="test-experiment-2", parameters_spec=["param1"], namespace="namespace-1",
+                   creation_timestamp="2018-05-08T13:05:04Z", template_name="template_name",
+                   template_namespace="template_namespace"),
+        Experiment(name="test-experiment-3", parameters_spec=["param1"], namespace="namespace-2",
+                   creation_timestamp="2018-05-08T13:05:04Z", template_name="template_name",
+                   template_namespace="template_namespace")])
+
+    runs = common.replace_initializing_runs(TEST_RUNS_CREATING)
+
+    assert len(runs) == 5
+    assert [run.state for run in runs if run.experiment_name in ("test-experiment-2", "test-experiment-3")] == \
+        [RunStatus.CREATING, RunStatus.CREATING]
+    list_experiments_mock.assert_called_once_with(namespace=None)
+
+
+def test_replace_initializing_runs_one_namespace(mocker):
+    list_experiments_mock = mocker.patch("commands.common.Experiment.list", return_value=[])
+
+    runs = common.replace_initializing_runs(TEST_RUNS_CREATING[2:3])
+
+    assert runs == []
+    list_experiments_mock.assert_called_once_with(namespace="namespace-1")
+
+
+@pytest.mark.parametrize('date', ['2018-04-17T09:28:39+00:00', '2018-04-17T09:28:39.123456789+00:00',
+                                  '2018-04-17T09:28:39.123Z', '2018-04-17T09:28:39-05:30', '2018-04-17T09:28:39',
+                                  '2018-04-17 09:28:39.123+0000'])
+def test_format_log_date(date):
+    assert common.format_log_date(date) == dateutil.parser.parse(date).replace(microsecond=0).isoformat()
+
+
+def test_write_logs_to_file(tmpdir):
+    log_entries = [LogEntry(date='2018-04-17T09:28:39.123Z', content='Zażółć gęślą jaźń\n', pod_name='pod',
+                            namespace='namespace'),
+                   LogEntry(date='2018-04-17T09:28:40.123Z', content='\n', pod_name='pod', namespace='namespace')]
+    filename = tmpdir.join('run.log').strpath
+
+    common.write_logs_to_file(filename=filename, run_logs_generator=iter(log_entries))
+
+    with open(filename, encoding='utf-8', newline='') as file:
+        assert file.read() == f'2018-04-17T09:28:39+00:00 pod Zażółć gęślą jaźń{os.linesep}'
+
+
+def test_write_compressed_logs_to_file_resumed(mocker, tmpdir):
+    log_entries = [LogEntry(date=f'2018-04-17T09:28:3{i}Z', content=f'log {i}\n', pod_name='pod', namespace='ns')
+                   for i in range(4)]
+    query_body = {'query': {'match_all': {}}}
+    filename = tmpdir.join('run.log.gz').strpath
+    es_client = mocker.MagicMock()
+
+    def interrupted_pages(**kwargs):
+        yield log_entries[:2], ['cursor-1']
+        raise KeyboardInterrupt
+
+    es_client.get_log_pages_generator.side_effect = interrupted_pages
+    with pytest.raises(KeyboardInterrupt):
+        common.write_compressed_logs_to_file(filename=filename, es_client=es_client, query_body=query_body)
+    # part of a page written after the checkpoint
+    with open(filename, 'ab') as file:
+        file.write(b'\x1f\x8b')
+
+    assert common.load_logs_checkpoint(filename)['search_after'] == ['cursor-1']
+
+    es_client.get_log_pages_generator.side_effect = None
+    es_client.get_log_pages_generator.return_value = iter([(log_entries[2:], ['cursor-2'])])
+    common.write_compressed_logs_to_file(filename=filename, es_client=es_client, query_body=query_body)
+
+    assert es_client.get_log_pages_generator.call_args[1]['search_after'] == ['cursor-1']
+    with gzip.open(filename, 'rt') as file:
+        assert file.read() == ''.join(f'2018-04-17T09:28:3{i}+00:00 pod log {i}\n' for i in range(4))
+    assert common.load_logs_checkpoint(filename) is None
+
+
+def test_write_compressed_logs_to_file_other_query(mocker, tmpdir):
+    filename = tmpdir.join('run.log.gz').strpath
+    tmpdir.join('run.log.gz').write('old logs')
+    common.save_logs_checkpoint(filename, {'query': 'other-query', 'offset': 3, 'search_after': ['cursor-1']})
+    es_client = mocker.MagicMock()
+    es_client.get_log_pages_generator.return_value = iter([])
+
+    common.write_compressed_logs_to_file(filename=filename, es_client=es_client, query_body={})
+
+    assert es_client.get_log_pages_generator.call_args[1]['search_after'] is None
+    assert tmpdir.join('run.log.gz').read() == ''
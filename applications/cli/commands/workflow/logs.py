@@ -45,7 +45,7 @@ def logs(state: State, workflow_name: str):
             click.echo(Texts.NOT_FOUND_MSG.format(workflow_name=workflow_name))
             exit(0)
 
-        with K8sProxy(NAUTAAppNames.ELASTICSEARCH) as proxy:
+        with K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True) as proxy:
             es_client = K8sElasticSearchClient(host="127.0.0.1", port=proxy.tunnel_port,
                                                verify_certs=False, use_ssl=False)
             start_date = workflow.started_at
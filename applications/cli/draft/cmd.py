@@ -14,24 +14,42 @@
 # limitations under the License.
 #
 
+from collections import defaultdict
+import io
 import os
-from typing import Tuple
+import tarfile
+import threading
+from typing import Generator, List, Tuple
 
 import docker
+from docker.utils.build import exclude_paths
 from retry.api import retry_call
 from requests.exceptions import ConnectionError
 
 from cli_text_consts import DraftCmdTexts as Texts
 from util import helm
 from util.config import Config
-from util.filesystem import copytree_content
+from util.content_cache import ContentCache
 from util.logger import initialize_logger
+from util.system import get_current_os, OS
 
 logger = initialize_logger('draft.cmd')
 
 DOCKER_CONNECTION_MAX_TRIES = 100
 DOCKER_CONNECTION_DELAY_SECONDS = 5
 
+DOCKERIGNORE_FILE_NAME = '.dockerignore'
+# files and directories of a run environment which are never sent to Docker's daemon, helm chart of a run
+# isn't used by its image
+BUILD_CONTEXT_EXCLUSIONS = ['charts']
+# size of chunks in which files are sent to Docker's daemon
+BUILD_CONTEXT_CHUNK_SIZE = 1024 * 1024
+
+# images built and pushed by this process, runs with identical build contexts are installed using one image
+pushed_images = set()
+image_locks = defaultdict(threading.Lock)
+image_locks_lock = threading.Lock()
+
 
 class NoPackError(Exception):
     pass
@@ -51,8 +69,9 @@ def create(working_directory: str = None, pack_type: str = None) -> Tuple[str, i
         helm_chart_destination_dirpath = f"{working_directory}/charts/{pack_type}"
         os.makedirs(helm_chart_destination_dirpath)
 
-        copytree_content(f"{requested_pack_path}", f"{working_directory}", ignored_objects=['charts'])
-        copytree_content(f"{requested_pack_path}/charts", helm_chart_destination_dirpath)
+        content_cache = ContentCache()
+        content_cache.copy_tree(f"{requested_pack_path}", f"{working_directory}", ignored_objects=['charts'])
+        content_cache.copy_tree(f"{requested_pack_path}/charts", helm_chart_destination_dirpath)
     except NoPackError as ex:
         # TODO: these exceptions should be reraised instead caught here
         logger.exception(ex)
@@ -64,16 +83,57 @@ def create(working_directory: str = None, pack_type: str = None) -> Tuple[str, i
     return "", 0
 
 
-def up(run_name: str, local_registry_port: int, working_directory: str = None, namespace: str = None) -> \
-        Tuple[str, int]:
+def up(run_name: str, local_registry_port: int, working_directory: str = None, namespace: str = None,
+       image_name: str = None) -> Tuple[str, int]:
+    """
+    Builds and pushes an image of a run and installs its helm chart.
+    :param image_name: name (with tag) of an image used by a run. Runs with identical build contexts may share one
+     image - it is built and pushed only once by this process. If not given, an image is named after the run and
+     it is always built.
+    """
+    image_repository = f"127.0.0.1:{local_registry_port}/{image_name or run_name}"
+
+    if image_name:
+        with get_image_lock(image_repository):
+            if image_repository in pushed_images:
+                logger.debug(f'Image {image_repository} has been already pushed, skipping its build.')
+            else:
+                output, exit_code = build_and_push_image(image_repository, working_directory=working_directory)
+                if exit_code:
+                    return output, exit_code
+                pushed_images.add(image_repository)
+    else:
+        output, exit_code = build_and_push_image(image_repository, working_directory=working_directory)
+        if exit_code:
+            return output, exit_code
+
+    try:
+        dirs = os.listdir(f"{working_directory}/charts")
+        helm.install_helm_chart(f"{working_directory}/charts/{dirs[0]}",
+                                release_name=run_name,
+                                tiller_namespace=namespace)
+    except Exception as ex:
+        logger.exception(ex)
+        return Texts.APP_NOT_RELEASED, 102
+
+    return "", 0
+
+
+def get_image_lock(image_repository: str) -> threading.Lock:
+    with image_locks_lock:
+        return image_locks[image_repository]
+
+
+def build_and_push_image(image_repository: str, working_directory: str = None) -> Tuple[str, int]:
     try:
         docker_client = docker.from_env()
         # we've seen often a problems with connection to local Docker's daemon via socket.
         # here we retry a call to Docker in case of such problems
         # original call without retry_call:
-        # docker_client.images.build(path=working_directory, tag=f"127.0.0.1:{local_registry_port}/{run_name}")
-        retry_call(f=docker_client.images.build,
-                   fkwargs={"path": working_directory, "tag": f"127.0.0.1:{local_registry_port}/{run_name}"},
+        # docker_client.images.build(path=working_directory, tag=image_repository)
+        # build context is streamed, so it is created anew for every try
+        retry_call(f=lambda: docker_client.images.build(fileobj=stream_build_context(working_directory),
+                                                        custom_context=True, tag=image_repository),
                    exceptions=ConnectionError,
                    tries=DOCKER_CONNECTION_MAX_TRIES,
                    delay=DOCKER_CONNECTION_DELAY_SECONDS
@@ -87,9 +147,9 @@ def up(run_name: str, local_registry_port: int, working_directory: str = None, n
         # we've seen often a problems with connection to local Docker's daemon via socket.
         # here we retry a call to Docker in case of such problems
         # original call without retry_call:
-        # docker_client.images.push(repository=f"127.0.0.1:{local_registry_port}/{run_name}")
+        # docker_client.images.push(repository=image_repository)
         retry_call(f=docker_client.images.push,
-                   fkwargs={"repository": f"127.0.0.1:{local_registry_port}/{run_name}"},
+                   fkwargs={"repository": image_repository},
                    exceptions=ConnectionError,
                    tries=DOCKER_CONNECTION_MAX_TRIES,
                    delay=DOCKER_CONNECTION_DELAY_SECONDS
@@ -98,13 +158,66 @@ def up(run_name: str, local_registry_port: int, working_directory: str = None, n
         logger.exception(ex)
         return Texts.DOCKER_IMAGE_NOT_SENT, 101
 
-    try:
-        dirs = os.listdir(f"{working_directory}/charts")
-        helm.install_helm_chart(f"{working_directory}/charts/{dirs[0]}",
-                                release_name=run_name,
-                                tiller_namespace=namespace)
-    except Exception as ex:
-        logger.exception(ex)
-        return Texts.APP_NOT_RELEASED, 102
-
     return "", 0
+
+
+def get_build_context_exclusions(working_directory: str) -> List[str]:
+    """
+    Returns patterns of files excluded from a build context - default ones and those listed in .dockerignore file
+    (e.g. provided by a pack).
+    """
+    exclusions = list(BUILD_CONTEXT_EXCLUSIONS)
+    dockerignore_path = os.path.join(working_directory, DOCKERIGNORE_FILE_NAME)
+    if os.path.isfile(dockerignore_path):
+        with open(dockerignore_path, 'r') as dockerignore:
+            exclusions.extend(line.strip() for line in dockerignore
+                              if line.strip() and not line.strip().startswith('#'))
+    return exclusions
+
+
+def stream_build_context(working_directory: str) -> Generator[bytes, None, None]:
+    """
+    Generates an uncompressed tar archive with a build context of an image, reading files one chunk at a time.
+    Unlike path-based build of docker library, whole context isn't written to a temporary archive before it is
+    sent, so Docker's daemon starts to receive it at once.
+    :param working_directory: directory with a Dockerfile and all files used by it
+    """
+    root = os.path.abspath(working_directory)
+    # used only to create headers of archived files
+    tar = tarfile.open(fileobj=io.BytesIO(), mode='w')
+    archive_size = 0
+
+    for path in sorted(exclude_paths(root, get_build_context_exclusions(root), dockerfile='Dockerfile')):
+        full_path = os.path.join(root, path)
+        tar_info = tar.gettarinfo(full_path, arcname=path)
+        if tar_info is None:
+            # sockets can't be archived
+            continue
+        # workaround of https://bugs.python.org/issue32713, the same as in docker library
+        if tar_info.mtime < 0 or tar_info.mtime > 8**11 - 1:
+            tar_info.mtime = int(tar_info.mtime)
+        if get_current_os() == OS.WINDOWS:
+            # Windows doesn't keep track of the execute bit, so files are executable by default
+            tar_info.mode = tar_info.mode & 0o755 | 0o111
+
+        header = tar_info.tobuf(tar.format, tar.encoding, tar.errors)
+        archive_size += len(header)
+        yield header
+
+        if tar_info.isfile():
+            remaining_size = tar_info.size
+            with open(full_path, 'rb') as file:
+                while remaining_size > 0:
+                    chunk = file.read(min(BUILD_CONTEXT_CHUNK_SIZE, remaining_size))
+                    if not chunk:
+                        raise IOError(f'File {full_path} was truncated while sending build context.')
+                    remaining_size -= len(chunk)
+                    yield chunk
+            padding_size = -tar_info.size % tarfile.BLOCKSIZE
+            archive_size += tar_info.size + padding_size
+            yield tarfile.NUL * padding_size
+
+    # end of an archive is marked by two empty blocks, whole archive is padded to a size of a record
+    end_of_archive_size = 2 * tarfile.BLOCKSIZE
+    end_of_archive_size += -(archive_size + end_of_archive_size) % tarfile.RECORDSIZE
+    yield tarfile.NUL * end_of_archive_size
@@ -14,11 +14,14 @@
 # limitations under the License.
 #
 
+import io
+import tarfile
+
 import pytest
 
 from cli_text_consts import DraftCmdTexts
 import draft
-from draft.cmd import create, up
+from draft.cmd import create, up, stream_build_context
 import util.helm
 
 
@@ -27,7 +30,7 @@ def cmd_mock(mocker):
     # 'create' mock
     mocker.patch('draft.cmd.Config', return_value=mocker.MagicMock(get_config_path=lambda: '/home/user/config'))
     mocker.patch('os.path.isdir', return_value=True)
-    mocker.patch('draft.cmd.copytree_content')
+    mocker.patch('draft.cmd.ContentCache')
     mocker.patch('os.makedirs')
 
     # 'up' mock
@@ -46,7 +49,7 @@ def test_create(cmd_mock):
 
     assert output == ""
     assert exit_code == 0
-    assert draft.cmd.copytree_content.call_count == 2
+    assert draft.cmd.ContentCache.return_value.copy_tree.call_count == 2
 
 
 # noinspection PyUnusedLocal,PyUnresolvedReferences
@@ -57,18 +60,18 @@ def test_create_no_pack(mocker, cmd_mock):
 
     assert output == DraftCmdTexts.PACK_NOT_EXISTS
     assert exit_code == 1
-    assert draft.cmd.copytree_content.call_count == 0
+    assert draft.cmd.ContentCache.return_value.copy_tree.call_count == 0
 
 
 # noinspection PyUnusedLocal,PyUnresolvedReferences
 def test_create_other_error(mocker, cmd_mock):
-    mocker.patch('draft.cmd.copytree_content', side_effect=PermissionError)
+    mocker.patch('draft.cmd.ContentCache').return_value.copy_tree.side_effect = PermissionError
 
     output, exit_code = create('/home/fake_dir', 'fake_pack')
 
     assert output == DraftCmdTexts.DEPLOYMENT_NOT_CREATED
     assert exit_code == 100
-    assert draft.cmd.copytree_content.call_count == 1
+    assert draft.cmd.ContentCache.return_value.copy_tree.call_count == 1
 
 
 # noinspection PyUnusedLocal
@@ -116,3 +119,51 @@ def test_up_helm_install_error(mocker, cmd_mock):
 
     assert output == DraftCmdTexts.APP_NOT_RELEASED
     assert exit_code == 102
+
+
+# noinspection PyUnusedLocal
+def test_up_shared_image(mocker, cmd_mock):
+    mocker.patch('draft.cmd.pushed_images', new=set())
+
+    for run_name in ('my-run-1', 'my-run-2'):
+        output, exit_code = up(run_name, local_registry_port=12345, working_directory=f'/home/user/{run_name}',
+                               namespace='user', image_name='my-run:0123456789abcdef')
+
+        assert output == ""
+        assert exit_code == 0
+
+    assert cmd_mock.images.build.call_count == 1
+    assert cmd_mock.images.build.call_args[1]['tag'] == '127.0.0.1:12345/my-run:0123456789abcdef'
+    assert cmd_mock.images.push.call_count == 1
+    # noinspection PyUnresolvedReferences
+    assert util.helm.install_helm_chart.call_count == 2
+
+
+# noinspection PyUnusedLocal
+def test_up_shared_image_build_error(mocker, cmd_mock):
+    mocker.patch('draft.cmd.pushed_images', new=set())
+    cmd_mock.images.build.side_effect = [RuntimeError, None]
+
+    output, exit_code = up('my-run-1', local_registry_port=12345, working_directory='/home/user/my-run-1',
+                           namespace='user', image_name='my-run:0123456789abcdef')
+    assert exit_code == 100
+
+    output, exit_code = up('my-run-2', local_registry_port=12345, working_directory='/home/user/my-run-2',
+                           namespace='user', image_name='my-run:0123456789abcdef')
+    assert exit_code == 0
+    assert cmd_mock.images.build.call_count == 2
+
+
+def test_stream_build_context(tmpdir):
+    tmpdir.join('Dockerfile').write('FROM nauta/tensorflow-py3')
+    tmpdir.join('.dockerignore').write('# logs\n*.log\n')
+    tmpdir.join('training.log').write('log')
+    tmpdir.mkdir('folder').join('training.py').write('print("training")' * 1000)
+    tmpdir.mkdir('charts').join('values.yaml').write('podCount: 1')
+
+    archive = b''.join(stream_build_context(tmpdir.strpath))
+
+    assert len(archive) % tarfile.RECORDSIZE == 0
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        assert sorted(tar.getnames()) == ['.dockerignore', 'Dockerfile', 'folder', 'folder/training.py']
+        assert tar.extractfile('folder/training.py').read() == b'print("training")' * 1000
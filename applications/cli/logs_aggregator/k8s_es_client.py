@@ -14,16 +14,16 @@
 # limitations under the License.
 #
 
+from collections import namedtuple
 from functools import partial
 import time
-from typing import List, Callable, Generator
+from typing import List, Callable, Generator, Iterable, Set, Tuple, Union
 
 import elasticsearch
 import elasticsearch.helpers
 import elasticsearch.client
 
-from logs_aggregator.log_filters import SeverityLevel, filter_log_by_severity, \
-    filter_log_by_pod_status, filter_log_by_pod_ids
+from logs_aggregator.log_filters import SeverityLevel, filter_log_by_pod_status, get_pods_statuses
 from logs_aggregator.k8s_log_entry import LogEntry
 from platform_resources.platform_resource import PlatformResource
 from platform_resources.workflow import ArgoWorkflow
@@ -35,6 +35,76 @@ logger = initialize_logger(__name__)
 
 ELASTICSEARCH_K8S_SERVICE = 'elasticsearch-svc'
 
+# number of logs fetched from ElasticSearch with a single search request
+LOG_PAGE_SIZE = 1000
+# field with unique ids of logs, generated by fluentd while logs are collected
+LOG_ID_FIELD = 'log_id'
+# field used to order logs with the same timestamp - fluentd timestamps have a resolution of one second. Unlike _id,
+# keyword field has doc values, so sorting by it doesn't load fielddata of all logs into ElasticSearch's memory
+SEARCH_AFTER_TIEBREAKER = f'{LOG_ID_FIELD}.keyword'
+# maximum time interval (in seconds) between attempts to get new logs, when logs are followed
+FOLLOW_MAX_TIME_INTERVAL = 5
+# number of slices in which logs are deleted in parallel - 'auto' means one slice per shard
+DELETE_BY_QUERY_SLICES = 'auto'
+# time interval (in seconds) between checks of a status of ElasticSearch tasks
+TASK_POLL_INTERVAL = 1
+# maximal number of pods returned in statistics of logs
+STATS_MAX_PODS = 1000
+# time interval of histograms of logs
+STATS_HISTOGRAM_INTERVAL = '1m'
+# fields of logs' documents used to construct LogEntry objects - other fields are not fetched from ElasticSearch
+LOG_ENTRY_SOURCE_FIELDS = ['@timestamp', 'log', 'kubernetes.pod_name', 'kubernetes.namespace_name']
+
+"""
+Statistics of logs - total number of logs, numbers of logs by pods' names (in descending order), numbers of logs
+by severity levels' names and a list of (time, number of logs) tuples of a histogram of logs.
+"""
+LogsStats = namedtuple('LogsStats', ['total', 'pods', 'severities', 'histogram'])
+
+
+def get_log_entry_query(query_body: dict = None) -> dict:
+    """
+    Returns a copy of passed query, which fetches only fields of documents used by LogEntry objects,
+    unless fetched fields are defined by the query itself.
+    """
+    query_body = dict(query_body or {})
+    query_body.setdefault('_source', LOG_ENTRY_SOURCE_FIELDS)
+    return query_body
+
+
+def get_search_after_sort(sort: Union[dict, list, None]) -> List[dict]:
+    """
+    Returns sort definition of a search_after query - logs have to be sorted by a unique combination of fields,
+    so passed sort definition is extended with a tiebreaker field.
+    :param sort: sort definition of a query, by default logs are sorted by their timestamps
+    :return: list of sort definitions ending with a tiebreaker field
+    """
+    if not sort:
+        sort = [{"@timestamp": {"order": "asc"}}]
+    elif isinstance(sort, dict):
+        sort = [{field: order} for field, order in sort.items()]
+    else:
+        sort = [field if isinstance(field, dict) else {field: {"order": "asc"}} for field in sort]
+
+    if not any(SEARCH_AFTER_TIEBREAKER in field for field in sort):
+        # logs collected before ids were generated (in indices where the field may be even not mapped) have
+        # an empty id, so they are sorted only by remaining fields - see search_after_pages_generator
+        sort.append({SEARCH_AFTER_TIEBREAKER: {"order": "asc", "missing": "", "unmapped_type": "keyword"}})
+    return sort
+
+
+def get_severity_query(severities: Iterable[str]) -> dict:
+    """
+    Returns ES query matching logs containing any of given severity levels. Terms of analyzed 'log' field are
+    lowercase, and severity may be glued to other characters (e.g. 'ERROR:root:message'), so each severity
+    is matched as a lowercase substring of a term.
+    :param severities: names of severity levels, e.g. value of SeverityLevel
+    :return: query_string query on 'log' field
+    """
+    return {"query_string": {"default_field": "log",
+                             "query": " OR ".join(f"*{severity.lower()}*" for severity in sorted(severities)),
+                             "allow_leading_wildcard": True}}
+
 
 class K8sElasticSearchClient(elasticsearch.Elasticsearch):
     def __init__(self, host: str, port: int,
@@ -43,56 +113,191 @@ class K8sElasticSearchClient(elasticsearch.Elasticsearch):
                   'port': port}]
         super().__init__(hosts=hosts, use_ssl=use_ssl, verify_certs=verify_certs, **kwargs)
 
-    def get_log_generator(self, query_body: dict = None, index='_all', scroll='1m',
-                          filters: List[Callable[[LogEntry], bool]] = None) -> Generator[LogEntry, None, None]:
+    @staticmethod
+    def _log_entry(log: dict) -> LogEntry:
+        return LogEntry(date=log['_source']['@timestamp'],
+                        content=log['_source']['log'],
+                        pod_name=log['_source']['kubernetes']['pod_name'],
+                        namespace=log['_source']['kubernetes']['namespace_name'])
+
+    def search_after_generator(self, query_body: dict = None, index='_all', page_size: int = LOG_PAGE_SIZE,
+                               search_after: list = None) -> Generator[dict, None, None]:
+        """
+        A generator that yields all hits of passed query, fetching them page by page with search_after
+        cursors. Unlike sorted scrolls, it doesn't keep any search context open in ElasticSearch.
+        Passed query is not modified.
+        :param query_body: ES search query
+        :param index: ElasticSearch index from which hits will be retrieved, defaults to all indices
+        :param page_size: number of hits fetched with a single search request
+        :param search_after: if provided, only hits sorted after these sort values will be returned
+        :return: Generator yielding raw ES hits
+        """
+        for hits in self.search_after_pages_generator(query_body=query_body, index=index, page_size=page_size,
+                                                      search_after=search_after):
+            yield from hits
+
+    def search_after_pages_generator(self, query_body: dict = None, index='_all', page_size: int = LOG_PAGE_SIZE,
+                                     search_after: list = None) -> Generator[List[dict], None, None]:
+        """
+        A generator that yields pages of hits of passed query, fetched with search_after cursors.
+        Passed query is not modified.
+        :param query_body: ES search query
+        :param index: ElasticSearch index from which hits will be retrieved, defaults to all indices
+        :param page_size: number of hits fetched with a single search request
+        :param search_after: if provided, only hits sorted after these sort values will be returned
+        :return: Generator yielding non-empty lists of raw ES hits
+        """
+        body = dict(query_body or {})
+        body['sort'] = get_search_after_sort(body.get('sort'))
+        body['size'] = page_size
+        if search_after:
+            body['search_after'] = search_after
+        while True:
+            hits = self.search(index=index, body=body)['hits']['hits']
+            if hits:
+                yield hits
+            if len(hits) < page_size:
+                return
+            last_sort = hits[-1]['sort']
+            if last_sort[-1] == '':
+                # logs without ids share sort values, so a cursor pointing at one of them skips all remaining
+                # logs with these values - they are fetched separately, skipping logs already returned
+                returned_ids = {hit['_id'] for hit in hits if hit['sort'] == last_sort}
+                yield from self.equal_sort_hits_pages_generator(query_body=body, index=index, page_size=page_size,
+                                                                sort_values=last_sort, skipped_ids=returned_ids)
+            body['search_after'] = last_sort
+
+    def equal_sort_hits_pages_generator(self, query_body: dict, index: str, page_size: int, sort_values: list,
+                                        skipped_ids: Set[str]) -> Generator[List[dict], None, None]:
+        """
+        A generator that yields pages of hits of passed search_after query, which have no id and are sorted
+        with given sort values (i.e. hits which can't be distinguished by a search_after cursor).
+        :param query_body: ES search query with a sort definition created by get_search_after_sort
+        :param index: ElasticSearch index from which hits will be retrieved
+        :param page_size: number of hits fetched with a single request
+        :param sort_values: sort values of hits
+        :param skipped_ids: ids (_id) of hits which shouldn't be returned
+        :return: Generator yielding non-empty lists of raw ES hits, with sort values set to given ones
+        """
+        value_filters = [{"term": {field: value}}
+                         for sort_field, value in zip(query_body['sort'][:-1], sort_values[:-1])
+                         for field in sort_field]
+        value_filters.append({"bool": {"must_not": {"exists": {"field": SEARCH_AFTER_TIEBREAKER}}}})
+        body = {key: value for key, value in query_body.items() if key not in ('sort', 'size', 'search_after')}
+        body['query'] = {"bool": {"must": query_body.get('query', {"match_all": {}}), "filter": value_filters}}
+
+        hits = []
+        for hit in elasticsearch.helpers.scan(self, query=body, index=index, size=page_size):
+            if hit['_id'] in skipped_ids:
+                continue
+            hits.append(dict(hit, sort=sort_values))
+            if len(hits) == page_size:
+                yield hits
+                hits = []
+        if hits:
+            yield hits
+
+    def get_log_generator(self, query_body: dict = None, index='_all', scroll: str = None,
+                          filters: List[Callable[[LogEntry], bool]] = None,
+                          page_size: int = LOG_PAGE_SIZE) -> Generator[LogEntry, None, None]:
         """
         A generator that yields LogEntry objects constructed from Kubernetes resource logs.
         Logs to be returned are defined by passed query and filtered according to passed
         filter functions, which have to accept LogEntry as argument and return a boolean value.
         :param query_body: ES search query
         :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
-        :param scroll: ElasticSearch scroll lifetime
+        :param scroll: ElasticSearch scroll lifetime - if provided, logs are retrieved with a sorted scroll instead
+         of search_after cursors
         :param filters: List of filter functions with signatures f(LogEntry) -> Bool
+        :param page_size: number of logs fetched with a single request
         :return: Generator yielding LogEntry (date, log_content, pod_name, namespace) named tuples.
         """
-        for log in elasticsearch.helpers.scan(self, query=query_body, index=index, scroll=scroll, size=1000,
-                                              preserve_order=True, clear_scroll=False):
-            log_entry = LogEntry(date=log['_source']['@timestamp'],
-                                 content=log['_source']['log'],
-                                 pod_name=log['_source']['kubernetes']['pod_name'],
-                                 namespace=log['_source']['kubernetes']['namespace_name'])
+        query_body = get_log_entry_query(query_body)
+        if scroll:
+            logs = elasticsearch.helpers.scan(self, query=query_body, index=index, scroll=scroll, size=page_size,
+                                              preserve_order=True)
+        else:
+            logs = self.search_after_generator(query_body=query_body, index=index, page_size=page_size)
+
+        for log in logs:
+            log_entry = self._log_entry(log)
             if not filters or all(f(log_entry) for f in filters):
                 yield log_entry
 
-    def get_stream_log_generator(self, query_body: dict = None, index='_all', scroll='1m', time_interval=0.5,
-                                 filters: List[Callable[[LogEntry], bool]] = None) -> Generator[LogEntry, None, None]:
+    def get_log_pages_generator(self, query_body: dict = None, index='_all',
+                                filters: List[Callable[[LogEntry], bool]] = None, page_size: int = LOG_PAGE_SIZE,
+                                search_after: list = None) -> Generator[Tuple[List[LogEntry], list], None, None]:
+        """
+        A generator that yields pages of LogEntry objects together with search_after cursors of their last logs,
+        which can be used to continue fetching of logs from a given page.
+        :param query_body: ES search query
+        :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
+        :param filters: List of filter functions with signatures f(LogEntry) -> Bool
+        :param page_size: number of logs fetched with a single request
+        :param search_after: if provided, only logs sorted after this cursor will be returned
+        :return: Generator yielding tuples of LogEntry list (possibly empty, if all logs were filtered out)
+                 and a cursor
+        """
+        for hits in self.search_after_pages_generator(query_body=get_log_entry_query(query_body), index=index,
+                                                      page_size=page_size, search_after=search_after):
+            log_entries = [self._log_entry(hit) for hit in hits]
+            if filters:
+                log_entries = [log_entry for log_entry in log_entries if all(f(log_entry) for f in filters)]
+            yield log_entries, hits[-1]['sort']
+
+    def get_stream_log_generator(self, query_body: dict = None, index='_all', time_interval=0.5,
+                                 filters: List[Callable[[LogEntry], bool]] = None,
+                                 page_size: int = LOG_PAGE_SIZE,
+                                 max_time_interval=FOLLOW_MAX_TIME_INTERVAL) -> Generator[LogEntry, None, None]:
         """
         A generator that yields LogEntry objects constructed from Kubernetes resource logs.
         Logs to be returned are defined by passed query and filtered according to passed
         filter functions, which have to accept LogEntry as argument and return a boolean value.
         Generator will always try to obtain new log entries, whenever it will be iterated over.
+        Query has to sort logs by their timestamps. Only logs newer than the last returned one are fetched - logs
+        with the same timestamp as the last returned log are fetched again, because new logs with that timestamp
+        may still arrive, and those already returned are skipped. Passed query is not modified.
         :param query_body: ES search query
         :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
-        :param scroll: ElasticSearch scroll lifetime
         :param time_interval: Time interval between attempting to get a new batch of logs
         :param filters: List of filter functions with signatures f(LogEntry) -> Bool
+        :param page_size: number of logs fetched with a single request
+        :param max_time_interval: If there are no new logs, time interval between attempts is doubled up to this value
         :return: Generator yielding LogEntry (date, log_content, pod_name, namespace) named tuples.
         """
+        query_body = get_log_entry_query(query_body)
         last_timestamp = None
+        # ids of already returned logs with the last timestamp
+        last_timestamp_log_ids = set()
+        current_time_interval = time_interval
         while True:
-            for log in self.get_log_generator(query_body=query_body, index=index, scroll=scroll, filters=filters):
-                last_timestamp = log.date
-                yield log
-            else:
-                # Scan is exhausted - try to fetch a new batch of logs
-                # Note that we expect specific query structure here
-                if last_timestamp:
-                    query_body['query']['bool']['filter']['range']['@timestamp']['gt'] = last_timestamp
-                time.sleep(time_interval)
+            # empty string is sorted before any id, so all logs with the last timestamp are fetched
+            search_after = [last_timestamp, ''] if last_timestamp is not None else None
+            new_logs_count = 0
+            for log in self.search_after_generator(query_body=query_body, index=index, page_size=page_size,
+                                                   search_after=search_after):
+                if log['_id'] in last_timestamp_log_ids:
+                    continue
+                if log['sort'][0] != last_timestamp:
+                    last_timestamp = log['sort'][0]
+                    last_timestamp_log_ids = set()
+                last_timestamp_log_ids.add(log['_id'])
+                new_logs_count += 1
+
+                log_entry = self._log_entry(log)
+                if not filters or all(f(log_entry) for f in filters):
+                    yield log_entry
+
+            if new_logs_count:
+                current_time_interval = time_interval
+            time.sleep(current_time_interval)
+            if not new_logs_count:
+                current_time_interval = min(current_time_interval * 2, max_time_interval)
 
     def get_experiment_logs_generator(self, run: Run, namespace: str, start_date: str, end_date: str = None,
                                       index='_all', pod_ids: List[str] = None, pod_status: PodStatus = None,
-                                      min_severity: SeverityLevel = None, follow=False) -> Generator[LogEntry, None, None]:
+                                      min_severity: SeverityLevel = None, follow=False,
+                                      page_size: int = LOG_PAGE_SIZE) -> Generator[LogEntry, None, None]:
         """
         Return logs for given experiment (interpreted as Run object).
         :param run: instance of Run resource
@@ -104,36 +309,139 @@ class K8sElasticSearchClient(elasticsearch.Elasticsearch):
         :param pod_status: filter logs by pod status
         :param min_severity: yield logs with minimum provided severity
         :param follow: if True, generator will stream logs tail
+        :param page_size: number of logs fetched with a single request
+        :return: Generator yielding LogEntry (date, log_content, pod_name, namespace) named tuples.
+        """
+        return self.get_runs_logs_generator(runs=[run], namespace=namespace, start_date=start_date,
+                                            end_date=end_date, index=index, pod_ids=pod_ids, pod_status=pod_status,
+                                            min_severity=min_severity, follow=follow, page_size=page_size)
+
+    def get_runs_logs_generator(self, runs: List[Run], namespace: str, start_date: str, end_date: str = None,
+                                index='_all', pod_ids: List[str] = None, pod_status: PodStatus = None,
+                                min_severity: SeverityLevel = None, follow=False,
+                                page_size: int = LOG_PAGE_SIZE) -> Generator[LogEntry, None, None]:
+        """
+        Return logs of all given runs, ordered by their timestamps.
+        :param runs: list of Run resources
+        :param namespace: Name of namespace where runs were started
+        :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
+        :param start_date: if provided, only logs produced after this date will be returned
+        :param end_date: if provided, only logs produced before this date will be returned
+        :param pod_ids: filter logs by pod ids
+        :param pod_status: filter logs by pod status
+        :param min_severity: yield logs with minimum provided severity
+        :param follow: if True, generator will stream logs tail of all runs
+        :param page_size: number of logs fetched with a single request
         :return: Generator yielding LogEntry (date, log_content, pod_name, namespace) named tuples.
         """
-        logger.debug(f'Searching for {run.name} Run logs.')
+        logger.debug(f'Searching for {", ".join(run.name for run in runs)} Run logs.')
+
+        query_body, filters = self.get_runs_logs_query(runs=runs, namespace=namespace, start_date=start_date,
+                                                       end_date=end_date, pod_ids=pod_ids, pod_status=pod_status,
+                                                       min_severity=min_severity)
+
+        log_generator = self.get_stream_log_generator if follow else self.get_log_generator
+
+        runs_logs_generator = log_generator(query_body=query_body, index=index, filters=filters, page_size=page_size)
+
+        return runs_logs_generator
+
+    def get_runs_logs_stats(self, runs: List[Run], namespace: str, start_date: str, end_date: str = None,
+                            index='_all', pod_ids: List[str] = None, pod_status: PodStatus = None,
+                            min_severity: SeverityLevel = None, interval: str = STATS_HISTOGRAM_INTERVAL) -> LogsStats:
+        """
+        Returns statistics of logs of given runs, computed by ElasticSearch aggregations, so logs themselves are
+        not transferred.
+        :param runs: list of Run resources
+        :param namespace: Name of namespace where runs were started
+        :param start_date: if provided, only logs produced after this date will be counted
+        :param end_date: if provided, only logs produced before this date will be counted
+        :param index: ElasticSearch index from which logs will be counted, defaults to all indices
+        :param pod_ids: count only logs of given pods
+        :param pod_status: count only logs of pods with a given status
+        :param min_severity: count only logs with minimum provided severity
+        :param interval: time interval of a histogram of logs, e.g. 1m or 1h
+        :return: statistics of logs
+        """
+        logger.debug(f'Getting statistics of {", ".join(run.name for run in runs)} Run logs.')
+
+        query_body, _ = self.get_runs_logs_query(runs=runs, namespace=namespace, start_date=start_date,
+                                                 end_date=end_date, pod_ids=pod_ids, min_severity=min_severity)
+        if pod_status:
+            # pods' statuses are not stored in ElasticSearch, so pods with a given status are counted by names
+            pods_statuses = get_pods_statuses(run_names=[run.name for run in runs], namespace=namespace)
+            query_body['query']['bool']['must'].append(
+                {'terms': {'kubernetes.pod_name.keyword': sorted(pod_name for pod_name, status
+                                                                 in pods_statuses.items() if status == pod_status)}})
+
+        query_body.pop('sort')
+        query_body['size'] = 0
+        query_body['aggs'] = {
+            "pods": {"terms": {"field": "kubernetes.pod_name.keyword", "size": STATS_MAX_PODS}},
+            "severities": {"filters": {"filters": {level.name: get_severity_query([level.name])
+                                                   for level in SeverityLevel}}},
+            "histogram": {"date_histogram": {"field": "@timestamp", "interval": interval, "min_doc_count": 1,
+                                             "format": "yyyy-MM-dd'T'HH:mm:ssZZ"}}
+        }
+
+        response = self.search(index=index, body=query_body)
+
+        aggregations = response['aggregations']
+        severities_buckets = aggregations['severities']['buckets']
+        return LogsStats(total=response['hits']['total'],
+                         pods={bucket['key']: bucket['doc_count'] for bucket in aggregations['pods']['buckets']},
+                         severities={level.name: severities_buckets[level.name]['doc_count']
+                                     for level in SeverityLevel},
+                         histogram=[(bucket['key_as_string'], bucket['doc_count'])
+                                    for bucket in aggregations['histogram']['buckets']])
+
+    @staticmethod
+    def get_runs_logs_query(runs: List[Run], namespace: str, start_date: str, end_date: str = None,
+                            pod_ids: List[str] = None, pod_status: PodStatus = None,
+                            min_severity: SeverityLevel = None) -> (dict, List[Callable[[LogEntry], bool]]):
+        """
+        Returns ES query of logs of given runs, ordered by their timestamps, and a list of filter functions,
+        which have to be applied to returned logs.
+        :param runs: list of Run resources
+        :param namespace: Name of namespace where runs were started
+        :param start_date: if provided, only logs produced after this date will be returned
+        :param end_date: if provided, only logs produced before this date will be returned
+        :param pod_ids: filter logs by pod ids
+        :param pod_status: filter logs by pod status
+        :param min_severity: yield logs with minimum provided severity
+        :return: ES search query and list of filter functions
+        """
+        run_names = [run.name for run in runs]
 
         timestamp_range_filter = {"range": {"@timestamp": {"gte": start_date}}}
         if end_date:
             timestamp_range_filter = {"range": {"@timestamp":{"gte": start_date, "lte": end_date}}}
 
-        filters = []
+        if len(run_names) == 1:
+            run_name_query = {'term': {'kubernetes.labels.runName.keyword': run_names[0]}}
+        else:
+            run_name_query = {'terms': {'kubernetes.labels.runName.keyword': run_names}}
+
+        # severity and pod ids are filtered by ElasticSearch, so only matching logs are transferred
+        must_clauses = [run_name_query,
+                        {'term': {'kubernetes.namespace_name.keyword': namespace}}]
         if min_severity:
-            filters.append(partial(filter_log_by_severity, min_severity=min_severity))
-        if pod_status:
-            filters.append(partial(filter_log_by_pod_status, pod_status=pod_status))
+            must_clauses.append(get_severity_query(min_severity.value))
         if pod_ids:
-            filters.append(partial(filter_log_by_pod_ids, pod_ids=set(pod_ids)))
+            must_clauses.append({'terms': {'kubernetes.pod_name.keyword': sorted(set(pod_ids))}})
 
+        filters = []
+        if pod_status:
+            # statuses of all pods of runs are fetched at once, before any log is filtered
+            filters.append(partial(filter_log_by_pod_status, pod_status=pod_status,
+                                   pods_statuses=get_pods_statuses(run_names=run_names, namespace=namespace)))
 
-        log_generator = self.get_stream_log_generator if follow else self.get_log_generator
-
-        experiment_logs_generator = log_generator(query_body={
-            "query": {"bool": {"must":
-                                   [{'term': {'kubernetes.labels.runName.keyword': run.name}},
-                                    {'term': {'kubernetes.namespace_name.keyword': namespace}}
-                                    ],
-                               "filter": timestamp_range_filter
-                               }},
-            "sort": {"@timestamp": {"order": "asc"}}},
-            index=index, filters=filters)
+        query_body = {"query": {"bool": {"must": must_clauses,
+                                         "filter": timestamp_range_filter
+                                         }},
+                      "sort": {"@timestamp": {"order": "asc"}}}
 
-        return experiment_logs_generator
+        return query_body, filters
 
     def get_argo_workflow_logs_generator(self, workflow: ArgoWorkflow, namespace: str,
                                          start_date: str, end_date: str = None,
@@ -171,19 +479,19 @@ class K8sElasticSearchClient(elasticsearch.Elasticsearch):
 
         return workflow_logs_generator
 
-    def delete_logs_for_namespace(self, namespace: str, index='_all'):
+    def delete_logs_for_namespace(self, namespace: str, index='_all',
+                                  progress_callback: Callable[[int, int], None] = None):
         """
         Removes logs for a given namespace.
         :param namespace: namespace for which logs should be deleted
         :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
+        :param progress_callback: function called with numbers of deleted and all logs, while logs are deleted
         Throws exception in case of any errors during removing of logs.
         """
         logger.debug(f'Deleting logs for {namespace} namespace.')
 
         delete_query = {"query": {"term": {'kubernetes.namespace_name.keyword': namespace}}}
-        output = self.delete_by_query(index=index, body=delete_query)
-
-        logger.debug(f"Deleting logs - result: {str(output)}")
+        self.delete_logs(delete_query=delete_query, index=index, progress_callback=progress_callback)
 
     def delete_logs_for_run(self, run: str, namespace: str, index='_all'):
         """
@@ -193,17 +501,74 @@ class K8sElasticSearchClient(elasticsearch.Elasticsearch):
         :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
         Throws exception in case of any errors during removing of logs.
         """
-        logger.debug(f'Deleting logs for {run} run and namespace {namespace}.')
+        self.delete_logs_for_runs(runs=[run], namespace=namespace, index=index)
+
+    def delete_logs_for_runs(self, runs: List[str], namespace: str, index='_all',
+                             progress_callback: Callable[[int, int], None] = None):
+        """
+        Removes logs for given runs with a single query.
+        :param runs: runs for which logs should be deleted
+        :param namespace: namespace for which logs should be deleted
+        :param index: ElasticSearch index from which logs will be retrieved, defaults to all indices
+        :param progress_callback: function called with numbers of deleted and all logs, while logs are deleted
+        Throws exception in case of any errors during removing of logs.
+        """
+        logger.debug(f'Deleting logs for {", ".join(runs)} runs and namespace {namespace}.')
+
+        if len(runs) == 1:
+            run_name_query = {"term": {'kubernetes.labels.runName.keyword': runs[0]}}
+        else:
+            run_name_query = {"terms": {'kubernetes.labels.runName.keyword': runs}}
 
         delete_query = {"query": {"bool": {"must":
             [
-                {"term": {'kubernetes.labels.runName.keyword': run}},
+                run_name_query,
                 {"term": {'kubernetes.namespace_name.keyword': namespace}}
             ]
         }
         }
         }
 
-        output = self.delete_by_query(index=index, body=delete_query)
+        self.delete_logs(delete_query=delete_query, index=index, progress_callback=progress_callback)
+
+    def delete_logs(self, delete_query: dict, index='_all', progress_callback: Callable[[int, int], None] = None):
+        """
+        Removes logs matching a given query. Deletion is started as a background task of ElasticSearch, split into
+        slices processed in parallel, and its progress is polled until it is finished. Logs modified during
+        the deletion are skipped instead of failing it.
+        :param delete_query: ES query of logs to be deleted
+        :param index: ElasticSearch index from which logs will be deleted, defaults to all indices
+        :param progress_callback: function called with numbers of deleted and all logs, while logs are deleted
+        Throws exception in case of any errors during removing of logs.
+        """
+        task_id = self.delete_by_query(index=index, body=delete_query, wait_for_completion=False,
+                                       conflicts='proceed', slices=DELETE_BY_QUERY_SLICES)['task']
+        logger.debug(f'Deleting logs - task {task_id} started.')
+
+        output = self.wait_for_task(task_id=task_id, progress_callback=progress_callback)
 
         logger.debug(f"Deleting logs - result: {str(output)}")
+
+    def wait_for_task(self, task_id: str, progress_callback: Callable[[int, int], None] = None,
+                      poll_interval=TASK_POLL_INTERVAL) -> dict:
+        """
+        Waits until a given ElasticSearch task (e.g. delete_by_query) is completed.
+        :param task_id: id of a task
+        :param progress_callback: function called with numbers of processed and all documents after each poll
+        :param poll_interval: time interval between checks of a task's status
+        :return: response of a completed task
+        Throws RuntimeError in case of failures of a task.
+        """
+        while True:
+            task = self.tasks.get(task_id=task_id)
+            if progress_callback:
+                status = task['task'].get('status', {})
+                progress_callback(status.get('deleted', 0) + status.get('updated', 0), status.get('total', 0))
+            if task.get('completed'):
+                break
+            time.sleep(poll_interval)
+
+        response = task.get('response', {})
+        if task.get('error') or response.get('failures'):
+            raise RuntimeError(f'Task {task_id} failed: {task.get("error") or response.get("failures")}')
+        return response
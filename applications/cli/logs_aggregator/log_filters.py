@@ -16,11 +16,11 @@
 
 from enum import Enum
 from functools import lru_cache
-from typing import Set
+from typing import Dict, List
 
 from logs_aggregator.k8s_log_entry import LogEntry
 from util.logger import initialize_logger
-from util.k8s.k8s_info import PodStatus, get_pod_status
+from util.k8s.k8s_info import PodStatus, get_pod_status, get_namespaced_pods
 
 log = initialize_logger(__name__)
 
@@ -36,11 +36,6 @@ class SeverityLevel(Enum):
     DEBUG = {'ERROR', 'CRITICAL', 'WARNING', 'INFO', 'DEBUG'}
 
 
-def filter_log_by_severity(log_entry: LogEntry,
-                           min_severity: SeverityLevel) -> bool:
-    return any(severity in log_entry.content.upper() for severity in min_severity.value)
-
-
 @lru_cache(maxsize=128)
 def cached_pod_status(pod_name: str, namespace: str) -> PodStatus:
     """
@@ -49,9 +44,24 @@ def cached_pod_status(pod_name: str, namespace: str) -> PodStatus:
     return get_pod_status(pod_name=pod_name, namespace=namespace)
 
 
-def filter_log_by_pod_status(log_entry: LogEntry, pod_status: PodStatus) -> bool:
-    return cached_pod_status(pod_name=log_entry.pod_name, namespace=log_entry.namespace) == pod_status
+def get_pods_statuses(run_names: List[str], namespace: str) -> Dict[str, PodStatus]:
+    """
+    Returns statuses of all pods of given runs, fetched with a single Kubernetes API call.
+    :param run_names: names of runs
+    :param namespace: namespace of runs
+    :return: dictionary of pods' statuses by pods' names
+    """
+    pods = get_namespaced_pods(label_selector=f'runName in ({",".join(run_names)})', namespace=namespace)
+    return {pod.metadata.name: PodStatus(pod.status.phase.upper()) for pod in pods}
 
 
-def filter_log_by_pod_ids(log_entry: LogEntry, pod_ids: Set[str]) -> bool:
-    return log_entry.pod_name in pod_ids
+def filter_log_by_pod_status(log_entry: LogEntry, pod_status: PodStatus,
+                             pods_statuses: Dict[str, PodStatus] = None) -> bool:
+    """
+    Checks status of a pod which produced a given log.
+    :param pods_statuses: statuses of pods by their names, fetched before logs - status of a pod which is not
+     present there (e.g. created later) is fetched separately
+    """
+    if pods_statuses and log_entry.pod_name in pods_statuses:
+        return pods_statuses[log_entry.pod_name] == pod_status
+    return cached_pod_status(pod_name=log_entry.pod_name, namespace=log_entry.namespace) == pod_status
@@ -14,11 +14,17 @@
 # limitations under the License.
 #
 
+import copy
+from itertools import islice
 from unittest.mock import MagicMock
 
-from logs_aggregator.k8s_es_client import K8sElasticSearchClient
+import pytest
+
+from logs_aggregator.k8s_es_client import K8sElasticSearchClient, LOG_PAGE_SIZE, LOG_ENTRY_SOURCE_FIELDS
 from logs_aggregator.k8s_log_entry import LogEntry
+from logs_aggregator.log_filters import SeverityLevel
 from platform_resources.run import Run
+from util.k8s.k8s_info import PodStatus
 
 TEST_SCAN_OUTPUT = [{'_index': 'fluentd-20180417',
                                     '_type': 'access_log',
@@ -96,30 +102,134 @@ TEST_SEARCH_OUTPUT_EMPTY = { "took": 6,
 
 def test_full_log_search(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
-    es_scan_mock = mocker.patch('logs_aggregator.k8s_es_client.elasticsearch.helpers.scan')
-    es_scan_mock.return_value = iter(TEST_SCAN_OUTPUT)
+    es_search_mock = mocker.patch.object(client, 'search')
+    es_search_mock.return_value = {'hits': {'hits': TEST_SCAN_OUTPUT}}
 
     assert list(client.get_log_generator()) == TEST_LOG_ENTRIES
 
 
-def test_full_log_search_filter(mocker):
+def test_full_log_search_source_fields(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    es_search_mock = mocker.patch.object(client, 'search')
+    es_search_mock.return_value = {'hits': {'hits': TEST_SCAN_OUTPUT}}
+
+    list(client.get_log_generator(query_body={"query": {"match_all": {}}}))
+
+    assert es_search_mock.call_args[1]['body']['_source'] == LOG_ENTRY_SOURCE_FIELDS
+
+
+def test_full_log_search_scroll(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
     es_scan_mock = mocker.patch('logs_aggregator.k8s_es_client.elasticsearch.helpers.scan')
     es_scan_mock.return_value = iter(TEST_SCAN_OUTPUT)
 
+    assert list(client.get_log_generator(scroll='1m')) == TEST_LOG_ENTRIES
+
+
+def test_full_log_search_filter(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    es_search_mock = mocker.patch.object(client, 'search')
+    es_search_mock.return_value = {'hits': {'hits': TEST_SCAN_OUTPUT}}
+
     filter_all_results = list(client.get_log_generator(filters=[lambda x: False]))
     assert filter_all_results == []
 
 
 def test_full_log_search_filter_idempotent(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
-    es_scan_mock = mocker.patch('logs_aggregator.k8s_es_client.elasticsearch.helpers.scan')
-    es_scan_mock.return_value = iter(TEST_SCAN_OUTPUT)
+    es_search_mock = mocker.patch.object(client, 'search')
+    es_search_mock.return_value = {'hits': {'hits': TEST_SCAN_OUTPUT}}
 
     filter_all_results = list(client.get_log_generator(filters=[lambda x: True]))
     assert filter_all_results == TEST_LOG_ENTRIES
 
 
+def test_search_after_generator(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    search_bodies = []
+
+    def search(index, body):
+        search_bodies.append(copy.deepcopy(body))
+        page_number = len(search_bodies) - 1
+        return {'hits': {'hits': TEST_SCAN_OUTPUT[page_number:page_number + 1]}}
+
+    mocker.patch.object(client, 'search', new=search)
+    query_body = {"query": {"match_all": {}}, "sort": {"@timestamp": {"order": "asc"}}}
+
+    assert list(client.search_after_generator(query_body=query_body, page_size=1)) == TEST_SCAN_OUTPUT
+
+    assert len(search_bodies) == 3
+    assert search_bodies[0]['sort'] == [{"@timestamp": {"order": "asc"}},
+                                       {"log_id.keyword": {"order": "asc", "missing": "", "unmapped_type": "keyword"}}]
+    assert search_bodies[0]['size'] == 1
+    assert 'search_after' not in search_bodies[0]
+    assert search_bodies[1]['search_after'] == TEST_SCAN_OUTPUT[0]['sort']
+    assert search_bodies[2]['search_after'] == TEST_SCAN_OUTPUT[1]['sort']
+    assert query_body == {"query": {"match_all": {}}, "sort": {"@timestamp": {"order": "asc"}}}
+
+
+def test_search_after_generator_logs_without_ids(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    hits = [{'_id': 'a', 'sort': [1, 'a']}, {'_id': 'b', 'sort': [2, '']}, {'_id': 'c', 'sort': [2, '']},
+            {'_id': 'd', 'sort': [3, 'd']}]
+    search_mock = mocker.patch.object(client, 'search', side_effect=[{'hits': {'hits': hits[:2]}},
+                                                                     {'hits': {'hits': hits[3:]}}])
+    scan_mock = mocker.patch('elasticsearch.helpers.scan', return_value=iter([{'_id': 'b'}, {'_id': 'c'}]))
+    query_body = {"query": {"match_all": {}}, "sort": {"@timestamp": {"order": "asc"}}}
+
+    assert list(client.search_after_generator(query_body=query_body, page_size=2)) == hits
+
+    scan_query = scan_mock.call_args[1]['query']
+    assert {"term": {"@timestamp": 2}} in scan_query['query']['bool']['filter']
+    assert 'sort' not in scan_query
+    assert search_mock.call_args_list[1][1]['body']['search_after'] == [2, '']
+
+
+def test_stream_log_generator(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    late_log = copy.deepcopy(TEST_SCAN_OUTPUT[1])
+    late_log['_id'] = 'AWLS70tjQ4BsP2C1ykFx'
+    late_log['_source']['log'] = 'Late log.\n'
+    search_mock = mocker.patch.object(client, 'search', side_effect=[
+        {'hits': {'hits': TEST_SCAN_OUTPUT}},
+        {'hits': {'hits': []}},
+        {'hits': {'hits': [TEST_SCAN_OUTPUT[1], late_log]}},
+    ])
+    sleep_mock = mocker.patch('logs_aggregator.k8s_es_client.time.sleep')
+    query_body = {"query": {"match_all": {}}, "sort": {"@timestamp": {"order": "asc"}}}
+
+    logs = list(islice(client.get_stream_log_generator(query_body=query_body, time_interval=1), 3))
+
+    assert logs == TEST_LOG_ENTRIES + [TEST_LOG_ENTRIES[1]._replace(content='Late log.\n')]
+    assert 'search_after' not in search_mock.call_args_list[0][1]['body']
+    assert search_mock.call_args_list[1][1]['body']['search_after'] == [TEST_SCAN_OUTPUT[1]['sort'][0], '']
+    assert [sleep_call[0][0] for sleep_call in sleep_mock.call_args_list] == [1, 1]
+    assert query_body == {"query": {"match_all": {}}, "sort": {"@timestamp": {"order": "asc"}}}
+
+
+def test_stream_log_generator_backoff(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocker.patch.object(client, 'search', side_effect=[{'hits': {'hits': []}}] * 5 + [
+        {'hits': {'hits': TEST_SCAN_OUTPUT[:1]}}])
+    sleep_mock = mocker.patch('logs_aggregator.k8s_es_client.time.sleep')
+
+    next(client.get_stream_log_generator(time_interval=1, max_time_interval=5))
+
+    assert [sleep_call[0][0] for sleep_call in sleep_mock.call_args_list] == [1, 2, 4, 5, 5]
+
+
+def test_get_runs_logs(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocked_stream_log_search = mocker.patch.object(client, 'get_stream_log_generator')
+
+    client.get_runs_logs_generator(runs=[Run(name='run-1', experiment_name='run-1'),
+                                         Run(name='run-2', experiment_name='run-2')], namespace='fake-namespace',
+                                   start_date='2018-04-17T09:28:39+00:00', follow=True)
+
+    must_clauses = mocked_stream_log_search.call_args[1]['query_body']['query']['bool']['must']
+    assert must_clauses[0] == {'terms': {'kubernetes.labels.runName.keyword': ['run-1', 'run-2']}}
+
+
 def test_get_experiment_logs(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
     mocked_log_search = mocker.patch.object(client, 'get_log_generator')
@@ -147,7 +257,7 @@ def test_get_experiment_logs(mocker):
                            "filter": {"range": {"@timestamp": {"gte": run_start_date}}}
                            }},
         "sort": {"@timestamp": {"order": "asc"}}},
-        filters=[], index='_all')
+        filters=[], index='_all', page_size=LOG_PAGE_SIZE)
 
 
 def test_get_experiment_logs_time_range(mocker):
@@ -180,12 +290,31 @@ def test_get_experiment_logs_time_range(mocker):
                            "filter": {"range": {"@timestamp":{"gte": start_date, "lte": end_date}}}
                            }},
         "sort": {"@timestamp": {"order": "asc"}}},
-        filters=[], index='_all')
+        filters=[], index='_all', page_size=LOG_PAGE_SIZE)
+
+
+def test_get_experiment_logs_severity_and_pod_ids(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocked_log_search = mocker.patch.object(client, 'get_log_generator')
+    mocked_log_search.return_value = iter(TEST_LOG_ENTRIES)
+
+    run_mock = MagicMock(spec=Run)
+    run_mock.name = 'fake-experiment'
+
+    list(client.get_experiment_logs_generator(run=run_mock, namespace='fake-namespace',
+                                              start_date='2018-04-17T09:28:39+00:00',
+                                              pod_ids=['pod-b', 'pod-a'], min_severity=SeverityLevel.ERROR))
+
+    must_clauses = mocked_log_search.call_args[1]['query_body']['query']['bool']['must']
+    assert {"query_string": {"default_field": "log", "query": "*critical* OR *error*",
+                             "allow_leading_wildcard": True}} in must_clauses
+    assert {'terms': {'kubernetes.pod_name.keyword': ['pod-a', 'pod-b']}} in must_clauses
+    assert mocked_log_search.call_args[1]['filters'] == []
 
 
 def test_delete_logs_for_namespace(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
-    mocked_delete_logs = mocker.patch.object(client, 'delete_by_query')
+    mocked_delete_logs = mocker.patch.object(client, 'delete_logs')
 
     client.delete_logs_for_namespace("namespace")
 
@@ -194,7 +323,7 @@ def test_delete_logs_for_namespace(mocker):
 
 def test_delete_logs_for_run(mocker):
     client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
-    mocked_delete_logs = mocker.patch.object(client, 'delete_by_query')
+    mocked_delete_logs = mocker.patch.object(client, 'delete_logs')
 
     run_name = 'test_run'
     namespace = 'fake-namespace'
@@ -210,5 +339,85 @@ def test_delete_logs_for_run(mocker):
     }
     }
 
-    mocked_delete_logs.assert_called_with(index='_all',
-                                          body=delete_query)
+    mocked_delete_logs.assert_called_with(index='_all', delete_query=delete_query, progress_callback=None)
+
+
+def test_delete_logs_for_runs(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocked_delete_logs = mocker.patch.object(client, 'delete_logs')
+
+    client.delete_logs_for_runs(['run-1', 'run-2'], 'fake-namespace')
+
+    must_clauses = mocked_delete_logs.call_args[1]['delete_query']['query']['bool']['must']
+    assert must_clauses[0] == {"terms": {'kubernetes.labels.runName.keyword': ['run-1', 'run-2']}}
+
+
+def test_delete_logs(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocked_delete_by_query = mocker.patch.object(client, 'delete_by_query', return_value={'task': 'node:1'})
+    mocked_get_task = mocker.patch.object(client.tasks, 'get', side_effect=[
+        {'completed': False, 'task': {'status': {'total': 10, 'deleted': 4}}},
+        {'completed': True, 'task': {'status': {'total': 10, 'deleted': 10}}, 'response': {'failures': []}}
+    ])
+    mocker.patch('logs_aggregator.k8s_es_client.time.sleep')
+    progress_callback = mocker.MagicMock()
+
+    client.delete_logs(delete_query={"query": {}}, progress_callback=progress_callback)
+
+    assert mocked_delete_by_query.call_args[1]['wait_for_completion'] is False
+    assert mocked_delete_by_query.call_args[1]['conflicts'] == 'proceed'
+    mocked_get_task.assert_called_with(task_id='node:1')
+    assert [progress_call[0] for progress_call in progress_callback.call_args_list] == [(4, 10), (10, 10)]
+
+
+def test_delete_logs_failure(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    mocker.patch.object(client, 'delete_by_query', return_value={'task': 'node:1'})
+    mocker.patch.object(client.tasks, 'get', return_value={'completed': True, 'task': {},
+                                                           'response': {'failures': [{'cause': 'error'}]}})
+
+    with pytest.raises(RuntimeError):
+        client.delete_logs(delete_query={"query": {}})
+
+
+def test_get_runs_logs_query_pod_status(mocker):
+    get_pods_statuses_mock = mocker.patch('logs_aggregator.k8s_es_client.get_pods_statuses',
+                                          return_value={'pod-1': PodStatus.RUNNING, 'pod-2': PodStatus.FAILED})
+
+    _, filters = K8sElasticSearchClient.get_runs_logs_query(runs=[Run(name='run-1', experiment_name='run-1')],
+                                                            namespace='fake-namespace',
+                                                            start_date='2018-04-17T09:28:39+00:00',
+                                                            pod_status=PodStatus.RUNNING)
+
+    assert [log_entry.pod_name for log_entry in
+            [TEST_LOG_ENTRIES[0]._replace(pod_name='pod-1'), TEST_LOG_ENTRIES[0]._replace(pod_name='pod-2')]
+            if all(f(log_entry) for f in filters)] == ['pod-1']
+    get_pods_statuses_mock.assert_called_once_with(run_names=['run-1'], namespace='fake-namespace')
+
+
+def test_get_runs_logs_stats(mocker):
+    client = K8sElasticSearchClient(host='fake', port=8080, namespace='kube-system')
+    search_mock = mocker.patch.object(client, 'search', return_value={
+        'hits': {'total': 5, 'hits': []},
+        'aggregations': {
+            'pods': {'buckets': [{'key': 'pod-1', 'doc_count': 3}, {'key': 'pod-2', 'doc_count': 2}]},
+            'severities': {'buckets': {level.name: {'doc_count': 1 if level == SeverityLevel.ERROR else 0}
+                                       for level in SeverityLevel}},
+            'histogram': {'buckets': [{'key_as_string': '2018-04-17T09:28:00+0000', 'key': 1, 'doc_count': 5}]}
+        }
+    })
+    mocker.patch('logs_aggregator.k8s_es_client.get_pods_statuses',
+                 return_value={'pod-2': PodStatus.RUNNING, 'pod-1': PodStatus.RUNNING, 'pod-3': PodStatus.FAILED})
+
+    logs_stats = client.get_runs_logs_stats(runs=[Run(name='run-1', experiment_name='run-1')],
+                                            namespace='fake-namespace', start_date='2018-04-17T09:28:39+00:00',
+                                            pod_status=PodStatus.RUNNING)
+
+    assert logs_stats.total == 5
+    assert logs_stats.pods == {'pod-1': 3, 'pod-2': 2}
+    assert logs_stats.severities['ERROR'] == 1 and logs_stats.severities['INFO'] == 0
+    assert logs_stats.histogram == [('2018-04-17T09:28:00+0000', 5)]
+    query_body = search_mock.call_args[1]['body']
+    assert query_body['size'] == 0 and 'sort' not in query_body
+    assert set(query_body['aggs']) == {'pods', 'severities', 'histogram'}
+    assert {'terms': {'kubernetes.pod_name.keyword': ['pod-1', 'pod-2']}} in query_body['query']['bool']['must']
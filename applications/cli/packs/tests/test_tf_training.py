@@ -250,3 +250,80 @@ def test_get_pod_count(mocker):
     mocker.patch("builtins.open", new_callable=mock.mock_open, read_data=TEST_YAML_FILE_WITH_POD_COUNT)
     pod_count = tf_training.get_pod_count(run_folder=EXPERIMENT_FOLDER, pack_type=EXAMPLE_PACK_TYPE)
     assert pod_count == TEST_POD_COUNT
+
+
+TF_IMAGE_REPOSITORY = '127.0.0.1:12345/nauta/tensorflow:1.0'
+
+
+@pytest.fixture()
+def docker_client_mock(mocker):
+    mocker.patch('packs.tf_training.image_pulls', new={})
+    docker_client_mock = mocker.MagicMock()
+    mocker.patch('docker.from_env', return_value=docker_client_mock)
+    return docker_client_mock
+
+
+def test_pull_tf_image(mocker, docker_client_mock):
+    mocker.patch('packs.tf_training.is_image_up_to_date', return_value=False)
+
+    tf_training.pull_tf_image(TF_IMAGE_REPOSITORY)
+    tf_training.pull_tf_image(TF_IMAGE_REPOSITORY)
+
+    docker_client_mock.images.pull.assert_called_once_with(TF_IMAGE_REPOSITORY)
+
+
+def test_pull_tf_image_up_to_date(mocker, docker_client_mock):
+    mocker.patch('packs.tf_training.is_image_up_to_date', return_value=True)
+
+    tf_training.pull_tf_image(TF_IMAGE_REPOSITORY)
+
+    assert docker_client_mock.images.pull.call_count == 0
+
+
+def test_pull_tf_image_in_background_failure(mocker, docker_client_mock):
+    mocker.patch('packs.tf_training.is_image_up_to_date', side_effect=ConnectionError)
+
+    tf_training.pull_tf_image(TF_IMAGE_REPOSITORY, wait=False)
+
+    with pytest.raises(ConnectionError):
+        tf_training.pull_tf_image(TF_IMAGE_REPOSITORY)
+
+
+def test_is_image_up_to_date_other_port(mocker, docker_client_mock):
+    mocker.patch('packs.tf_training.get_image_digest', return_value='sha256:digest')
+    image_mock = mocker.MagicMock(tags=['127.0.0.1:54321/nauta/tensorflow:1.0'],
+                                  attrs={'RepoDigests': ['127.0.0.1:54321/nauta/tensorflow@sha256:digest']})
+    docker_client_mock.images.list.return_value = [mocker.MagicMock(attrs={'RepoDigests': None}), image_mock]
+
+    assert tf_training.is_image_up_to_date(docker_client_mock, TF_IMAGE_REPOSITORY)
+    image_mock.tag.assert_called_once_with('127.0.0.1:12345/nauta/tensorflow', tag='1.0')
+
+
+def test_is_image_up_to_date_other_digest(mocker, docker_client_mock):
+    mocker.patch('packs.tf_training.get_image_digest', return_value='sha256:new-digest')
+    image_mock = mocker.MagicMock(tags=[TF_IMAGE_REPOSITORY],
+                                  attrs={'RepoDigests': ['127.0.0.1:12345/nauta/tensorflow@sha256:digest']})
+    docker_client_mock.images.list.return_value = [image_mock]
+
+    assert not tf_training.is_image_up_to_date(docker_client_mock, TF_IMAGE_REPOSITORY)
+
+
+def test_pull_pack_base_image(mocker, tmpdir):
+    tmpdir.mkdir('packs').mkdir('tf-training').join('Dockerfile').write('FROM nauta/tensorflow-py3\nWORKDIR /app\n')
+    mocker.patch('packs.tf_training.Config').return_value.get_config_path.return_value = tmpdir.strpath
+    mocker.patch('packs.tf_training.NAUTAConfigMap').return_value.py3_image_name = 'nauta/tensorflow:1.0'
+    pull_mock = mocker.patch('packs.tf_training.pull_tf_image')
+
+    tf_training.pull_pack_base_image('tf-training', local_registry_port=12345)
+
+    pull_mock.assert_called_once_with(tf_image_repository=TF_IMAGE_REPOSITORY, wait=False)
+
+
+def test_pull_pack_base_image_no_config(mocker):
+    mocker.patch('packs.tf_training.Config').return_value.get_config_path.side_effect = RuntimeError
+    pull_mock = mocker.patch('packs.tf_training.pull_tf_image')
+
+    tf_training.pull_pack_base_image('tf-training', local_registry_port=12345)
+    tf_training.pull_pack_base_image(None, local_registry_port=12345)
+
+    pull_mock.assert_not_called()
@@ -15,10 +15,12 @@
 #
 
 import ast
+from concurrent.futures import Future
 import os
 import re
 import shutil
-from typing import Tuple, List, Optional
+import threading
+from typing import Dict, Tuple, List, Optional
 import jinja2
 
 import docker
@@ -30,8 +32,9 @@ import toml
 from util.k8s import k8s_info
 from util.logger import initialize_logger
 from util.config import FOLDER_DIR_NAME
-from util.config import NAUTAConfigMap
-from util.spinner import spinner
+from util.config import NAUTAConfigMap, Config
+from util.docker import get_image_digest
+from util.spinner import progress_spinner
 
 import packs.common as common
 import dpath.util as dutil
@@ -45,6 +48,10 @@ WORK_CNT_PARAM = "workersCount"
 P_SERV_CNT_PARAM = "pServersCount"
 POD_COUNT_PARAM = "podCount"
 
+# pulls of base images done by this process, by repositories of images
+image_pulls: Dict[str, Future] = {}
+image_pulls_lock = threading.Lock()
+
 
 def update_configuration(run_folder: str, script_location: str,
                          script_parameters: Tuple[str, ...],
@@ -55,7 +62,9 @@ def update_configuration(run_folder: str, script_location: str,
                          pack_type: str,
                          pack_params: List[Tuple[str, str]] = None,
                          script_folder_location: str = None,
-                         env_variables: List[str] = None):
+                         env_variables: List[str] = None,
+                         image_name: str = None,
+                         show_spinner: bool = True):
     """
     Updates configuration of a tf-training pack based on paramaters given by a user.
 
@@ -65,6 +74,8 @@ def update_configuration(run_folder: str, script_location: str,
                    (excluding files generated by draft)
     - charts/templates/job.yaml - list of arguments is replaces with those given by a user
 
+    :param image_name: name of an image used by a run, if not given - image is named after the run
+    :param show_spinner: if False, progress of preparation of an image is not displayed
     :return:
     in case of any errors it throws an exception with a description of a problem
     """
@@ -74,8 +85,9 @@ def update_configuration(run_folder: str, script_location: str,
         modify_values_yaml(run_folder, script_location, script_parameters, pack_params=pack_params,
                            experiment_name=experiment_name, run_name=run_name,
                            pack_type=pack_type, cluster_registry_port=cluster_registry_port,
-                           env_variables=env_variables)
-        with spinner(text=Texts.PREPARING_IMAGES_MSG.format(run_name=experiment_name)):
+                           env_variables=env_variables, image_name=image_name)
+        with progress_spinner(text=Texts.PREPARING_IMAGES_MSG.format(run_name=experiment_name),
+                              visible=show_spinner):
             modify_dockerfile(run_folder, script_location, local_registry_port=local_registry_port,
                               script_folder_location=script_folder_location)
     except Exception as exe:
@@ -97,24 +109,8 @@ def modify_dockerfile(experiment_folder: str, script_location: str, local_regist
             if line.startswith("ADD training.py"):
                 if script_location or script_folder_location:
                     dockerfile_temp_content = dockerfile_temp_content + f"COPY {FOLDER_DIR_NAME} ."
-            elif line.startswith("FROM nauta/tensorflow-py"):
-                nauta_config_map = NAUTAConfigMap()
-                if line.find('-py2') != -1:
-                    tf_image_name = nauta_config_map.py2_image_name
-                else:
-                    tf_image_name = nauta_config_map.py3_image_name
-                tf_image_repository = f'127.0.0.1:{local_registry_port}/{tf_image_name}'
-                dockerfile_temp_content = dockerfile_temp_content + f'FROM {tf_image_repository}'
-
-                # pull image from platform's registry
-                pull_tf_image(tf_image_repository=tf_image_repository)
-            elif line.startswith("FROM nauta/horovod"):
-                nauta_config_map = NAUTAConfigMap()
-                if line.find('-py2') != -1:
-                    image_name = nauta_config_map.py2_horovod_image_name
-                else:
-                    image_name = nauta_config_map.py3_horovod_image_name
-                image_repository = f'127.0.0.1:{local_registry_port}/{image_name}'
+            elif line.startswith("FROM nauta/tensorflow-py") or line.startswith("FROM nauta/horovod"):
+                image_repository = get_base_image_repository(line, local_registry_port=local_registry_port)
                 dockerfile_temp_content = dockerfile_temp_content + f'FROM {image_repository}'
 
                 # pull image from platform's registry
@@ -132,7 +128,7 @@ def modify_dockerfile(experiment_folder: str, script_location: str, local_regist
 def modify_values_yaml(experiment_folder: str, script_location: str, script_parameters: Tuple[str, ...],
                        experiment_name: str, run_name: str, pack_type: str,
                        cluster_registry_port: int, pack_params: List[Tuple[str, str]],
-                       env_variables: List[str]):
+                       env_variables: List[str], image_name: str = None):
     log.debug("Modify values.yaml - start")
     values_yaml_filename = os.path.join(experiment_folder, f"charts/{pack_type}/values.yaml")
     values_yaml_temp_filename = os.path.join(experiment_folder, f"charts/{pack_type}/values_temp.yaml")
@@ -145,7 +141,7 @@ def modify_values_yaml(experiment_folder: str, script_location: str, script_para
             'ExperimentName' : experiment_name,
             'CommandLine' : common.prepare_script_paramaters(script_parameters, script_location),
             'RegistryPort' : str(cluster_registry_port),
-            'ExperimentImage' : f'127.0.0.1:{cluster_registry_port}/{run_name}',
+            'ExperimentImage' : f'127.0.0.1:{cluster_registry_port}/{image_name or run_name}',
             'ImageRepository' : f'127.0.0.1:{cluster_registry_port}'
         })
     
@@ -198,13 +194,114 @@ def modify_values_yaml(experiment_folder: str, script_location: str, script_para
     log.debug("Modify values.yaml - end")
 
 
-def pull_tf_image(tf_image_repository: str):
+def get_base_image_repository(dockerfile_line: str, local_registry_port: int) -> Optional[str]:
+    """
+    Returns repository of a platform's base image (TF or Horovod) used in a given line of a pack's Dockerfile.
+    :param dockerfile_line: line of a Dockerfile
+    :param local_registry_port: port on which docker registry is accessible locally
+    :return: repository of an image or None, if a line doesn't refer to any of platform's base images
+    """
+    if dockerfile_line.startswith("FROM nauta/tensorflow-py"):
+        nauta_config_map = NAUTAConfigMap()
+        if dockerfile_line.find('-py2') != -1:
+            image_name = nauta_config_map.py2_image_name
+        else:
+            image_name = nauta_config_map.py3_image_name
+    elif dockerfile_line.startswith("FROM nauta/horovod"):
+        nauta_config_map = NAUTAConfigMap()
+        if dockerfile_line.find('-py2') != -1:
+            image_name = nauta_config_map.py2_horovod_image_name
+        else:
+            image_name = nauta_config_map.py3_horovod_image_name
+    else:
+        return None
+
+    return f'127.0.0.1:{local_registry_port}/{image_name}'
+
+
+def pull_pack_base_image(pack_type: str, local_registry_port: int):
+    """
+    Starts pulls of base images used by a given pack in background, so they overlap with preparation of
+    experiment's environments.
+    :param pack_type: name of a pack
+    :param local_registry_port: port on which docker registry is accessible locally
+    """
+    if not pack_type:
+        return
+    try:
+        dockerfile_name = os.path.join(Config().get_config_path(), 'packs', pack_type, 'Dockerfile')
+        with open(dockerfile_name, "r") as dockerfile:
+            for line in dockerfile:
+                image_repository = get_base_image_repository(line, local_registry_port=local_registry_port)
+                if image_repository:
+                    pull_tf_image(tf_image_repository=image_repository, wait=False)
+    except Exception:
+        # image will be pulled while modifying Dockerfile of a run
+        log.exception(f'Failed to start pull of base image of {pack_type} pack.')
+
+
+def pull_tf_image(tf_image_repository: str, wait: bool = True):
+    """
+    Pulls an image from platform's registry, unless the same image is already present locally. An image is pulled
+    only once by this process - subsequent and concurrent calls wait for a result of the first pull.
+    :param tf_image_repository: repository of an image
+    :param wait: if False, an image is pulled in background
+    """
+    with image_pulls_lock:
+        image_pull = image_pulls.get(tf_image_repository)
+        if not image_pull:
+            image_pull = Future()
+            image_pulls[tf_image_repository] = image_pull
+            # daemon thread doesn't block exit of nctl, e.g. when submission is cancelled with ctrl-c
+            threading.Thread(target=_pull_tf_image, args=(tf_image_repository, image_pull), daemon=True).start()
+
+    if wait:
+        image_pull.result()
+
+
+def _pull_tf_image(tf_image_repository: str, image_pull: Future):
     try:
-        log.debug(f'Pulling TF image: {tf_image_repository}')
         docker_client = docker.from_env()
-        docker_client.images.pull(tf_image_repository)
+        if is_image_up_to_date(docker_client, tf_image_repository):
+            log.debug(f'TF image {tf_image_repository} is up to date, skipping its pull.')
+        else:
+            log.debug(f'Pulling TF image: {tf_image_repository}')
+            docker_client.images.pull(tf_image_repository)
     except docker.errors.APIError:
         log.exception(f'Failed to pull TF image: {tf_image_repository}')
+        image_pull.set_result(None)
+    except Exception as exe:
+        image_pull.set_exception(exe)
+    else:
+        image_pull.set_result(None)
+
+
+def is_image_up_to_date(docker_client: docker.DockerClient, image_repository: str) -> bool:
+    """
+    Checks whether an image with the same digest as the one stored in a registry is present locally. Local registry
+    port may differ between invocations of nctl, so local images are matched by their digests - if an image is found
+    under a different repository, it is tagged with a given one.
+    :param docker_client: client of a local Docker's daemon
+    :param image_repository: repository of an image - registry address, name and optionally a tag
+    :return: True if the image is present locally
+    """
+    registry_address, image_name = image_repository.split('/', 1)
+    image_name, tag = image_name.rsplit(':', 1) if ':' in image_name else (image_name, 'latest')
+    try:
+        digest = get_image_digest(server_address=registry_address, image_name=image_name, tag=tag)
+    except Exception:
+        log.exception(f'Failed to get digest of {image_repository} image.')
+        return False
+
+    for image in docker_client.images.list():
+        for repo_digest in image.attrs.get('RepoDigests') or []:
+            repo_digest_name, repo_digest_digest = repo_digest.rsplit('@', 1)
+            if repo_digest_digest == digest and repo_digest_name.endswith(f'/{image_name}'):
+                if f'{registry_address}/{image_name}:{tag}' not in image.tags:
+                    image.tag(f'{registry_address}/{image_name}', tag=tag)
+                return True
+
+    return False
 
 
 def get_pod_count(run_folder: str, pack_type: str) -> Optional[int]:
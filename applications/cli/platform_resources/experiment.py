@@ -31,8 +31,8 @@ from cli_text_consts import PlatformResourcesExperimentsTexts as Texts
 from platform_resources.custom_object_meta_model import validate_kubernetes_name
 from platform_resources.platform_resource import PlatformResource, KubernetesObjectSchema, KubernetesObject, \
     PlatformResourceApiClient
-from platform_resources.resource_filters import filter_by_name_regex, filter_by_state
-from platform_resources.run import Run, RunKinds, filter_by_run_kinds
+from platform_resources.resource_filters import filter_by_name_regex, filter_by_state, run_kinds_label_selector
+from platform_resources.run import Run, RunKinds
 from util.exceptions import InvalidRegularExpressionError
 from util.logger import initialize_logger
 from util.system import format_timestamp_for_cli
@@ -162,6 +162,8 @@ class Experiment(PlatformResource):
         :return: List of Experiment objects
         """
         logger.debug('Listing experiments.')
+        label_selector = ','.join(selector for selector in (label_selector, run_kinds_label_selector(run_kinds_filter))
+                                  if selector)
         raw_experiments = cls.list_raw_experiments(namespace=namespace, label_selector=label_selector)
         try:
             name_regex = re.compile(name_filter) if name_filter else None
@@ -171,8 +173,7 @@ class Experiment(PlatformResource):
             raise InvalidRegularExpressionError(error_msg) from e
 
         experiment_filters = [partial(filter_by_name_regex, name_regex=name_regex),
-                              partial(filter_by_state, state=state),
-                              partial(filter_by_run_kinds, run_kinds=run_kinds_filter)]
+                              partial(filter_by_state, state=state)]
 
         experiments = [Experiment.from_k8s_response_dict(experiment_dict)
                        for experiment_dict in raw_experiments['items']
@@ -15,20 +15,27 @@
 #
 
 import http
-from typing import Dict
+import json
+from typing import Callable, Dict, Generator, List, Tuple, Any
 
 import yaml
-from kubernetes import client, config
+from kubernetes import client
 from collections import namedtuple
 
 from kubernetes.client import CustomObjectsApi
 from kubernetes.client.rest import ApiException
+from kubernetes.watch.watch import iter_resp_lines
 from marshmallow import Schema, fields, post_load
 from platform_resources.custom_object_meta_model import V1ObjectMetaSchema
+from util.k8s.k8s_info import K8sApiClients
+from util.k8s.k8s_watch import wait_for_condition
 from util.logger import initialize_logger
 
 logger = initialize_logger(__name__)
 
+# Number of objects requested from the API server per page when listing resources
+LIST_PAGE_SIZE = 500
+
 
 class KubernetesObject(object):
     def __init__(self, spec, metadata: client.V1ObjectMeta, apiVersion: str='aipg.intel.com/v1',
@@ -63,8 +70,7 @@ class PlatformResourceApiClient:
             return cls.k8s_custom_object_api
         else:
             try:
-                config.load_kube_config()
-                k8s_custom_object_api = client.CustomObjectsApi(client.ApiClient())
+                k8s_custom_object_api = K8sApiClients.get(client.CustomObjectsApi)
                 cls.k8s_custom_object_api = k8s_custom_object_api
                 return cls.k8s_custom_object_api
             except Exception:
@@ -113,20 +119,135 @@ class PlatformResource:
         return cls(body=resource_body)
 
     @classmethod
-    def list(cls, namespace: str = None, custom_objects_api: CustomObjectsApi = None):
-        logger.debug(f'Getting list of {cls.__name__}s.')
+    def _list_request(cls, namespace: str = None, query_params: List[Tuple[str, Any]] = None,
+                      custom_objects_api: CustomObjectsApi = None, **kwargs):
+        """
+        Sends a list request for resources of this class. CustomObjectsApi doesn't expose limit, continue
+        and timeoutSeconds parameters, so the request is built directly with API client.
+        """
         k8s_custom_object_api = custom_objects_api if custom_objects_api else PlatformResourceApiClient.get()
+
+        path_params = {'group': cls.api_group_name, 'version': cls.crd_version, 'plural': cls.crd_plural_name}
         if namespace:
-            raw_resources = k8s_custom_object_api.list_namespaced_custom_object(group=cls.api_group_name,
-                                                                                namespace=namespace,
-                                                                                plural=cls.crd_plural_name,
-                                                                                version=cls.crd_version)
+            path_params['namespace'] = namespace
+            resource_path = '/apis/{group}/{version}/namespaces/{namespace}/{plural}'
         else:
-            raw_resources = k8s_custom_object_api.list_cluster_custom_object(group=cls.api_group_name,
-                                                                             plural=cls.crd_plural_name,
-                                                                             version=cls.crd_version)
+            resource_path = '/apis/{group}/{version}/{plural}'
 
-        return [cls.from_k8s_response_dict(raw_resource) for raw_resource in raw_resources['items']]
+        return k8s_custom_object_api.api_client.call_api(resource_path, 'GET',
+                                                         path_params=path_params,
+                                                         query_params=query_params,
+                                                         header_params={'Accept': 'application/json'},
+                                                         response_type='object',
+                                                         auth_settings=['BearerToken'],
+                                                         _return_http_data_only=True, **kwargs)
+
+    @classmethod
+    def list_raw_resource_pages(cls, namespace: str = None, label_selector: str = '', field_selector: str = '',
+                                page_size: int = LIST_PAGE_SIZE,
+                                custom_objects_api: CustomObjectsApi = None) -> Generator[dict, None, None]:
+        """
+        Yields consecutive pages (raw lists returned by Kubernetes API) of resources, each containing at most
+        page_size objects.
+        :param namespace: If provided, only resources from this namespace will be returned
+        :param label_selector: A selector to restrict the list of returned objects by their labels
+        :param field_selector: A selector to restrict the list of returned objects by their fields
+        :param page_size: maximal number of objects fetched in one request
+        :param custom_objects_api: API client used to communicate with Kubernetes
+        """
+        continue_token = None
+        while True:
+            query_params = [('limit', page_size)]
+            if label_selector:
+                query_params.append(('labelSelector', label_selector))
+            if field_selector:
+                query_params.append(('fieldSelector', field_selector))
+            if continue_token:
+                query_params.append(('continue', continue_token))
+
+            raw_resources = cls._list_request(namespace=namespace, query_params=query_params,
+                                              custom_objects_api=custom_objects_api)
+            yield raw_resources
+
+            continue_token = raw_resources.get('metadata', {}).get('continue')
+            if not continue_token:
+                break
+
+    @classmethod
+    def list_raw_resources(cls, namespace: str = None, label_selector: str = '', field_selector: str = '',
+                           page_size: int = LIST_PAGE_SIZE,
+                           custom_objects_api: CustomObjectsApi = None) -> Generator[dict, None, None]:
+        """
+        Yields raw resources (as returned by Kubernetes API) one by one. Resources are fetched in pages of
+        page_size objects, so the whole list never has to be held in memory at once. Parameters are the same
+        as in list_raw_resource_pages.
+        """
+        for raw_resources in cls.list_raw_resource_pages(namespace=namespace, label_selector=label_selector,
+                                                         field_selector=field_selector, page_size=page_size,
+                                                         custom_objects_api=custom_objects_api):
+            yield from raw_resources.get('items', [])
+
+    @classmethod
+    def watch_raw_resources(cls, resource_version: str, namespace: str = None, label_selector: str = '',
+                            timeout_seconds: int = 1, custom_objects_api: CustomObjectsApi = None,
+                            field_selector: str = '') -> Generator[dict, None, None]:
+        """
+        Yields raw watch events (dicts with type and object keys) for changes of resources that happened
+        after resource_version. Watch is closed by the API server after timeout_seconds.
+        """
+        query_params = [('watch', 'true'), ('resourceVersion', resource_version),
+                        ('timeoutSeconds', timeout_seconds)]
+        if label_selector:
+            query_params.append(('labelSelector', label_selector))
+        if field_selector:
+            query_params.append(('fieldSelector', field_selector))
+
+        response = cls._list_request(namespace=namespace, query_params=query_params,
+                                     custom_objects_api=custom_objects_api, _preload_content=False)
+        try:
+            for line in iter_resp_lines(response):
+                yield json.loads(line)
+        finally:
+            response.release_conn()
+
+    @classmethod
+    def wait(cls, condition: Callable[[list], bool], timeout: float, namespace: str = None, label_selector: str = '',
+             field_selector: str = '', custom_objects_api: CustomObjectsApi = None) -> bool:
+        """
+        Waits until resources of this class (restricted by given namespace and selectors) fulfill a given condition.
+        Changes of resources are observed by a watch, so the condition is checked as soon as they happen.
+        :param condition: function checking a list of resources
+        :param timeout: maximal time of waiting (in seconds), if it is 0 - the condition is checked only once
+        :return: True if the condition was fulfilled, False if it wasn't fulfilled within timeout
+        """
+        def list_raw_resources() -> Tuple[List[dict], str]:
+            raw_resource_pages = list(cls.list_raw_resource_pages(namespace=namespace, label_selector=label_selector,
+                                                                  field_selector=field_selector,
+                                                                  custom_objects_api=custom_objects_api))
+            # resourceVersion of the first page identifies the whole list
+            return ([raw_resource for raw_resources in raw_resource_pages for raw_resource in raw_resources['items']],
+                    raw_resource_pages[0]['metadata']['resourceVersion'])
+
+        def watch_raw_resources(resource_version: str, timeout_seconds: int) -> Generator[dict, None, None]:
+            return cls.watch_raw_resources(resource_version=resource_version, namespace=namespace,
+                                           label_selector=label_selector, field_selector=field_selector,
+                                           timeout_seconds=timeout_seconds, custom_objects_api=custom_objects_api)
+
+        return wait_for_condition(condition=lambda raw_resources: condition([cls.from_k8s_response_dict(raw_resource)
+                                                                             for raw_resource in raw_resources]),
+                                  list_objects=list_raw_resources, watch_objects=watch_raw_resources,
+                                  get_name=lambda raw_resource: raw_resource['metadata']['name'],
+                                  get_resource_version=lambda raw_resource: raw_resource['metadata']['resourceVersion'],
+                                  timeout=timeout)
+
+    @classmethod
+    def list(cls, namespace: str = None, custom_objects_api: CustomObjectsApi = None, label_selector: str = '',
+             field_selector: str = ''):
+        logger.debug(f'Getting list of {cls.__name__}s.')
+        return [cls.from_k8s_response_dict(raw_resource)
+                for raw_resource in cls.list_raw_resources(namespace=namespace, label_selector=label_selector,
+                                                           field_selector=field_selector,
+                                                           custom_objects_api=custom_objects_api)]
 
     @classmethod
     def get(cls, name: str, namespace: str = None, custom_objects_api: CustomObjectsApi = None):
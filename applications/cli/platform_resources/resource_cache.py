@@ -0,0 +1,162 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from kubernetes.client import CustomObjectsApi
+from kubernetes.client.rest import ApiException
+
+from util.config import Config, CACHE_DIR_NAME
+from util.k8s.k8s_info import K8sApiClients
+from util.logger import initialize_logger
+
+logger = initialize_logger(__name__)
+
+# how long (in seconds) API server streams changes of resources during revalidation of a cached list - API server
+# accepts only whole seconds and it doesn't signal that all changes have been sent, so every revalidation takes
+# at least this time
+WATCH_TIMEOUT_SECONDS = 1
+# cached lists shorter than this are fetched again in full - it takes less time than WATCH_TIMEOUT_SECONDS
+MIN_REVALIDATED_LIST_SIZE = 500
+
+
+class ResourceVersionExpiredError(Exception):
+    """Error raised when changes since cached resourceVersion are no longer available in Kubernetes API"""
+    pass
+
+
+class ResourceListCache:
+    """
+    On-disk cache of raw lists of platform resources. A list is stored per resource type, namespace and label
+    selector in nctl config directory, together with resourceVersion of the listing. When cached list is
+    requested, changes that happened since that resourceVersion are fetched with a short watch and applied
+    to the cached list, so only a delta is transferred instead of a full list. Full list is fetched again if
+    there is no cached list or if the cached resourceVersion is too old. Lists are cached separately for each
+    API server, kubectl context and user, because resourceVersions of different clusters are not comparable.
+    Revalidation always lasts WATCH_TIMEOUT_SECONDS, so the cache pays off only for lists that take longer to fetch -
+    lists having less than MIN_REVALIDATED_LIST_SIZE items are always fetched in full.
+    """
+
+    def __init__(self, resource_class, namespace: str = None, label_selector: str = '',
+                 custom_objects_api: CustomObjectsApi = None):
+        """
+        :param resource_class: PlatformResource subclass whose list is cached
+        :param namespace: If provided, only resources from this namespace will be cached
+        :param label_selector: A selector to restrict the list of cached objects by their labels
+        :param custom_objects_api: API client used to communicate with Kubernetes
+        """
+        self.resource_class = resource_class
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.custom_objects_api = custom_objects_api
+
+        api_client = custom_objects_api.api_client if custom_objects_api else K8sApiClients.get_api_client()
+        context = K8sApiClients.get_current_context()
+        digest = hashlib.sha1(json.dumps([api_client.configuration.host, context['name'],
+                                          context.get('context', {}).get('user'), label_selector])
+                              .encode('utf-8')).hexdigest()[:10]
+        cache_file_name = f'{resource_class.crd_plural_name}-{namespace or "all-namespaces"}-{digest}.json'
+        self.cache_file_path = os.path.join(Config().config_path, CACHE_DIR_NAME, cache_file_name)
+
+    def list_raw_resources(self) -> List[dict]:
+        """
+        Returns an up-to-date list of raw resources, revalidating cached list if it exists.
+        """
+        cached_list = self._load()
+        resource_version, items = None, None
+        if cached_list and len(cached_list['items']) >= MIN_REVALIDATED_LIST_SIZE:
+            try:
+                resource_version, items = self._apply_changes(resource_version=cached_list['resourceVersion'],
+                                                              items=cached_list['items'])
+            except ResourceVersionExpiredError:
+                logger.debug(f'Cached list {self.cache_file_path} is too old to be revalidated.')
+
+        if items is None:
+            resource_version, items = self._relist()
+
+        self._save(resource_version=resource_version, items=items)
+
+        return [items[key] for key in sorted(items)]
+
+    @staticmethod
+    def _item_key(raw_resource: dict) -> str:
+        return f"{raw_resource['metadata'].get('namespace', '')}/{raw_resource['metadata']['name']}"
+
+    def _relist(self) -> (str, Dict[str, dict]):
+        logger.debug(f'Fetching full list of {self.resource_class.__name__}s to {self.cache_file_path}.')
+        resource_version = None
+        items = {}
+        for raw_resources in self.resource_class.list_raw_resource_pages(namespace=self.namespace,
+                                                                         label_selector=self.label_selector,
+                                                                         custom_objects_api=self.custom_objects_api):
+            # resourceVersion of the first page identifies the whole list
+            if resource_version is None:
+                resource_version = raw_resources['metadata']['resourceVersion']
+            items.update({self._item_key(raw_resource): raw_resource for raw_resource in raw_resources['items']})
+
+        return resource_version, items
+
+    def _apply_changes(self, resource_version: str, items: Dict[str, dict]) -> (str, Dict[str, dict]):
+        changes_count = 0
+        try:
+            for event in self.resource_class.watch_raw_resources(resource_version=resource_version,
+                                                                 namespace=self.namespace,
+                                                                 label_selector=self.label_selector,
+                                                                 timeout_seconds=WATCH_TIMEOUT_SECONDS,
+                                                                 custom_objects_api=self.custom_objects_api):
+                raw_resource = event['object']
+                if event['type'] == 'ERROR':
+                    # most likely 410 Gone - requested resourceVersion has been already compacted
+                    raise ResourceVersionExpiredError(raw_resource.get('message'))
+                elif event['type'] == 'DELETED':
+                    items.pop(self._item_key(raw_resource), None)
+                else:
+                    items[self._item_key(raw_resource)] = raw_resource
+
+                resource_version = raw_resource['metadata']['resourceVersion']
+                changes_count += 1
+        except ApiException as exe:
+            # API server may also reject the watch request itself if resourceVersion is too old
+            if exe.status == 410:
+                raise ResourceVersionExpiredError(exe.reason) from exe
+            raise
+
+        logger.debug(f'Applied {changes_count} changes to {self.cache_file_path}.')
+        return resource_version, items
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.cache_file_path, mode='r', encoding='utf-8') as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception(f'Failed to read cached list {self.cache_file_path}.')
+            return None
+
+    def _save(self, resource_version: str, items: Dict[str, dict]):
+        temporary_file_path = f'{self.cache_file_path}.{os.getpid()}'
+        try:
+            os.makedirs(os.path.dirname(self.cache_file_path), exist_ok=True)
+            with open(temporary_file_path, mode='w', encoding='utf-8') as cache_file:
+                json.dump({'resourceVersion': resource_version, 'items': items}, cache_file)
+            # replacing is atomic, so other nctl processes never read partially written cache
+            os.replace(temporary_file_path, self.cache_file_path)
+        except Exception:
+            logger.exception(f'Failed to store cached list {self.cache_file_path}.')
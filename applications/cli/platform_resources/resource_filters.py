@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import re
 from enum import Enum
 from typing import Pattern, List
 
@@ -39,3 +40,22 @@ def filter_by_experiment_name(resource_object_dict: dict, exp_name: List[str] =
     return resource_object_dict['spec']['experiment-name'] in exp_name if exp_name else True
 
 
+def run_kinds_label_selector(run_kinds: List[Enum] = None) -> str:
+    """
+    Returns a set-based label selector matching objects with a runKind label equal to one of given run kinds.
+    """
+    return f"runKind in ({','.join(run_kind.value for run_kind in run_kinds)})" if run_kinds else ''
+
+
+def name_field_selector(name_filter: str = None) -> str:
+    """
+    Returns a field selector matching an object with a given name, if name_filter is an anchored regular expression
+    matching exactly one name (e.g. ^exp-name$ or ^exp\\.name$, as created with re.escape). Otherwise returns
+    empty selector, so filtering by name has to be done on the client side - in particular, unescaped dot matches
+    any character, while a field selector matches literally.
+    """
+    exact_name = re.fullmatch(r'\^((?:[a-z0-9-]|\\[.-])+)\$', name_filter) if name_filter else None
+    if not exact_name:
+        return ''
+    name = exact_name.group(1).replace('\\', '')
+    return f'metadata.name={name}'
@@ -20,16 +20,17 @@ import re
 import sre_constants
 import textwrap
 from functools import partial
-from typing import List, Dict
+from typing import List, Dict, Generator
 
 from kubernetes.client import CustomObjectsApi
 from marshmallow import Schema, fields, post_load
 from marshmallow_enum import EnumField
 
 from cli_text_consts import PlatformResourcesExperimentsTexts as Texts
-from platform_resources.platform_resource import PlatformResource, KubernetesObjectSchema, KubernetesObject, client, \
-    PlatformResourceApiClient
-from platform_resources.resource_filters import filter_by_name_regex, filter_by_experiment_name
+from platform_resources.platform_resource import PlatformResource, KubernetesObjectSchema, KubernetesObject, client
+from platform_resources.resource_filters import filter_by_name_regex, filter_by_experiment_name, \
+    run_kinds_label_selector, name_field_selector
+from platform_resources.resource_cache import ResourceListCache
 from util.exceptions import InvalidRegularExpressionError
 from util.logger import initialize_logger
 from util.system import format_timestamp_for_cli
@@ -103,7 +104,8 @@ class Run(PlatformResource):
     @classmethod
     def list(cls, namespace: str = None, state_list: List[RunStatus] = None, name_filter: str = None,
              exp_name_filter: List[str] = None, excl_state: RunStatus = None,
-             run_kinds_filter: List[Enum] = None, custom_objects_api: CustomObjectsApi = None):
+             run_kinds_filter: List[Enum] = None, custom_objects_api: CustomObjectsApi = None,
+             use_cache: bool = False):
         """
         Return list of experiment runs.
         :param namespace: If provided, only runs from this namespace will be returned
@@ -113,20 +115,26 @@ class Run(PlatformResource):
         :param excl_state: If provided, only runs with a state other than given will be returned
         :param run_kinds_filter: If provided, only runs with a kind that matches to any of the run kinds from given
             filtering list will be returned
+        :param use_cache: If True, runs are taken from a local cache of runs' list, revalidated with changes
+            that happened since the previous listing
         :return: List of Run objects
         In case of problems during getting a list of runs - throws an error
         """
-        k8s_custom_object_api = custom_objects_api if custom_objects_api else PlatformResourceApiClient.get()
-        if namespace:
-            raw_runs = k8s_custom_object_api.list_namespaced_custom_object(group=Run.api_group_name,
-                                                                           namespace=namespace,
-                                                                           plural=Run.crd_plural_name,
-                                                                           version=Run.crd_version)
-        else:
-            raw_runs = k8s_custom_object_api.list_cluster_custom_object(group=Run.api_group_name,
-                                                                        plural=Run.crd_plural_name,
-                                                                        version=Run.crd_version)
+        return list(cls.list_generator(namespace=namespace, state_list=state_list, name_filter=name_filter,
+                                       exp_name_filter=exp_name_filter, excl_state=excl_state,
+                                       run_kinds_filter=run_kinds_filter, custom_objects_api=custom_objects_api,
+                                       use_cache=use_cache))
 
+    @classmethod
+    def list_generator(cls, namespace: str = None, state_list: List[RunStatus] = None, name_filter: str = None,
+                       exp_name_filter: List[str] = None, excl_state: RunStatus = None,
+                       run_kinds_filter: List[Enum] = None, custom_objects_api: CustomObjectsApi = None,
+                       use_cache: bool = False) -> Generator['Run', None, None]:
+        """
+        Works like Run.list, but yields runs one by one while pages of results are fetched from Kubernetes API.
+        Run kinds and exact names are passed to the API server as selectors, remaining filters (which refer
+        to fields of spec) are applied on the client side.
+        """
         try:
             name_regex = re.compile(name_filter) if name_filter else None
         except sre_constants.error as e:
@@ -137,13 +145,20 @@ class Run(PlatformResource):
         run_filters = [partial(filter_by_name_regex, name_regex=name_regex, spec_location=False),
                        partial(filter_run_by_state, state_list=state_list),
                        partial(filter_run_by_excl_state, state=excl_state),
-                       partial(filter_by_experiment_name, exp_name=exp_name_filter),
-                       partial(filter_by_run_kinds, run_kinds=run_kinds_filter)]
+                       partial(filter_by_experiment_name, exp_name=exp_name_filter)]
+
+        label_selector = run_kinds_label_selector(run_kinds_filter)
+        field_selector = name_field_selector(name_filter)
+        # a single run selected by its name is cheap to fetch, so cache is used only for lists
+        if use_cache and not field_selector:
+            raw_runs = ResourceListCache(cls, namespace=namespace, label_selector=label_selector,
+                                         custom_objects_api=custom_objects_api).list_raw_resources()
+        else:
+            raw_runs = cls.list_raw_resources(namespace=namespace, label_selector=label_selector,
+                                              field_selector=field_selector, custom_objects_api=custom_objects_api)
 
-        runs = [Run.from_k8s_response_dict(run_dict)
-                for run_dict in raw_runs['items']
-                if all(f(run_dict) for f in run_filters)]
-        return runs
+        return (Run.from_k8s_response_dict(run_dict) for run_dict in raw_runs
+                if all(f(run_dict) for f in run_filters))
 
     @property
     def cli_representation(self):
@@ -236,8 +251,3 @@ def filter_run_by_excl_state(resource_object_dict: dict, state: Enum = None):
         return True
 
     return not filter_run_by_state(resource_object_dict, [state])
-
-
-def filter_by_run_kinds(resource_object_dict: dict, run_kinds: List[Enum] = None):
-    return any([resource_object_dict['metadata']['labels'].get('runKind') == run_kind.value for run_kind in run_kinds]) \
-        if run_kinds else True
\ No newline at end of file
@@ -0,0 +1,138 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+
+from kubernetes.client.rest import ApiException
+import pytest
+
+from platform_resources.resource_cache import ResourceListCache
+from platform_resources.run import Run
+
+
+def raw_run(name: str, resource_version: str) -> dict:
+    return {'metadata': {'name': name, 'namespace': 'namespace', 'resourceVersion': resource_version}}
+
+
+@pytest.fixture()
+def cache(mocker, tmpdir) -> ResourceListCache:
+    mocker.patch('platform_resources.resource_cache.Config').return_value.config_path = str(tmpdir)
+    mocker.patch('platform_resources.resource_cache.MIN_REVALIDATED_LIST_SIZE', 1)
+    mock_k8s_api_clients(mocker, host='https://cluster-a:6443', context_name='context-a', user='user-a')
+    return ResourceListCache(Run, namespace='namespace', label_selector='runKind in (training)')
+
+
+def mock_k8s_api_clients(mocker, host: str, context_name: str, user: str):
+    k8s_api_clients_mock = mocker.patch('platform_resources.resource_cache.K8sApiClients')
+    k8s_api_clients_mock.get_api_client.return_value.configuration.host = host
+    k8s_api_clients_mock.get_current_context.return_value = {'name': context_name,
+                                                             'context': {'cluster': 'cluster', 'user': user}}
+
+
+def test_cache_separated_per_cluster_and_user(mocker, cache: ResourceListCache):
+    mock_k8s_api_clients(mocker, host='https://cluster-b:6443', context_name='context-a', user='user-a')
+    other_cluster_cache = ResourceListCache(Run, namespace='namespace', label_selector='runKind in (training)')
+    mock_k8s_api_clients(mocker, host='https://cluster-a:6443', context_name='context-a', user='user-b')
+    other_user_cache = ResourceListCache(Run, namespace='namespace', label_selector='runKind in (training)')
+
+    assert len({cache.cache_file_path, other_cluster_cache.cache_file_path, other_user_cache.cache_file_path}) == 3
+
+
+def test_list_without_cache(mocker, cache: ResourceListCache):
+    list_pages_mock = mocker.patch.object(Run, 'list_raw_resource_pages', return_value=iter([
+        {'metadata': {'resourceVersion': '10', 'continue': 'token'}, 'items': [raw_run('run-b', '5')]},
+        {'metadata': {'resourceVersion': '10'}, 'items': [raw_run('run-a', '7')]}
+    ]))
+    watch_mock = mocker.patch.object(Run, 'watch_raw_resources')
+
+    raw_runs = cache.list_raw_resources()
+
+    assert [raw_run['metadata']['name'] for raw_run in raw_runs] == ['run-a', 'run-b']
+    assert list_pages_mock.call_count == 1
+    assert watch_mock.call_count == 0
+    with open(cache.cache_file_path) as cache_file:
+        assert json.load(cache_file)['resourceVersion'] == '10'
+
+
+def test_list_with_cache(mocker, cache: ResourceListCache):
+    os.makedirs(os.path.dirname(cache.cache_file_path))
+    with open(cache.cache_file_path, 'w') as cache_file:
+        json.dump({'resourceVersion': '10', 'items': {'namespace/run-a': raw_run('run-a', '7'),
+                                                      'namespace/run-b': raw_run('run-b', '5')}}, cache_file)
+    list_pages_mock = mocker.patch.object(Run, 'list_raw_resource_pages')
+    watch_mock = mocker.patch.object(Run, 'watch_raw_resources', return_value=iter([
+        {'type': 'DELETED', 'object': raw_run('run-a', '11')},
+        {'type': 'MODIFIED', 'object': raw_run('run-b', '12')},
+        {'type': 'ADDED', 'object': raw_run('run-c', '13')}
+    ]))
+
+    raw_runs = cache.list_raw_resources()
+
+    assert raw_runs == [raw_run('run-b', '12'), raw_run('run-c', '13')]
+    assert list_pages_mock.call_count == 0
+    assert watch_mock.call_args[1]['resource_version'] == '10'
+    with open(cache.cache_file_path) as cache_file:
+        assert json.load(cache_file)['resourceVersion'] == '13'
+
+
+def test_list_with_expired_cache(mocker, cache: ResourceListCache):
+    os.makedirs(os.path.dirname(cache.cache_file_path))
+    with open(cache.cache_file_path, 'w') as cache_file:
+        json.dump({'resourceVersion': '10', 'items': {'namespace/run-a': raw_run('run-a', '7')}}, cache_file)
+    list_pages_mock = mocker.patch.object(Run, 'list_raw_resource_pages', return_value=iter([
+        {'metadata': {'resourceVersion': '20'}, 'items': [raw_run('run-b', '15')]}
+    ]))
+    mocker.patch.object(Run, 'watch_raw_resources', return_value=iter([
+        {'type': 'ERROR', 'object': {'code': 410, 'message': 'too old resource version'}}
+    ]))
+
+    raw_runs = cache.list_raw_resources()
+
+    assert raw_runs == [raw_run('run-b', '15')]
+    assert list_pages_mock.call_count == 1
+
+
+def test_list_with_expired_cache_watch_rejected(mocker, cache: ResourceListCache):
+    os.makedirs(os.path.dirname(cache.cache_file_path))
+    with open(cache.cache_file_path, 'w') as cache_file:
+        json.dump({'resourceVersion': '10', 'items': {'namespace/run-a': raw_run('run-a', '7')}}, cache_file)
+    list_pages_mock = mocker.patch.object(Run, 'list_raw_resource_pages', return_value=iter([
+        {'metadata': {'resourceVersion': '20'}, 'items': [raw_run('run-b', '15')]}
+    ]))
+    mocker.patch.object(Run, 'watch_raw_resources', side_effect=ApiException(status=410, reason='Gone'))
+
+    raw_runs = cache.list_raw_resources()
+
+    assert raw_runs == [raw_run('run-b', '15')]
+    assert list_pages_mock.call_count == 1
+
+
+def test_list_with_short_cached_list(mocker, cache: ResourceListCache):
+    mocker.patch('platform_resources.resource_cache.MIN_REVALIDATED_LIST_SIZE', 2)
+    os.makedirs(os.path.dirname(cache.cache_file_path))
+    with open(cache.cache_file_path, 'w') as cache_file:
+        json.dump({'resourceVersion': '10', 'items': {'namespace/run-a': raw_run('run-a', '7')}}, cache_file)
+    list_pages_mock = mocker.patch.object(Run, 'list_raw_resource_pages', return_value=iter([
+        {'metadata': {'resourceVersion': '20'}, 'items': [raw_run('run-a', '7'), raw_run('run-b', '15')]}
+    ]))
+    watch_mock = mocker.patch.object(Run, 'watch_raw_resources')
+
+    raw_runs = cache.list_raw_resources()
+
+    assert raw_runs == [raw_run('run-a', '7'), raw_run('run-b', '15')]
+    assert list_pages_mock.call_count == 1
+    assert watch_mock.call_count == 0
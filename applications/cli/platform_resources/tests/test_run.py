@@ -14,13 +14,15 @@
 # limitations under the License.
 #
 
+import re
+
 import pytest
 
 from kubernetes.client import CustomObjectsApi
 from kubernetes.client.rest import ApiException
 
 from platform_resources.platform_resource import KubernetesObject
-from platform_resources.run import Run, RunStatus
+from platform_resources.run import Run, RunStatus, RunKinds
 from util.exceptions import InvalidRegularExpressionError
 
 TEST_RUNS = [Run(name="exp-mnist-single-node.py-18.05.17-16.05.45-1-tf-training",
@@ -71,7 +73,7 @@ def mock_k8s_api_client(mocker) -> CustomObjectsApi:
 
 
 def test_list_runs(mock_k8s_api_client):
-    mock_k8s_api_client.list_cluster_custom_object.return_value = LIST_RUNS_RESPONSE_RAW
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
     runs = Run.list()
     assert runs == TEST_RUNS
 
@@ -79,27 +81,77 @@ def test_list_runs(mock_k8s_api_client):
 def test_list_runs_from_namespace(mock_k8s_api_client: CustomObjectsApi):
     raw_runs_single_namespace = dict(LIST_RUNS_RESPONSE_RAW)
     raw_runs_single_namespace['items'] = [raw_runs_single_namespace['items'][0]]
-    mock_k8s_api_client.list_namespaced_custom_object.return_value = raw_runs_single_namespace
+    mock_k8s_api_client.api_client.call_api.return_value = raw_runs_single_namespace
 
     runs = Run.list(namespace='namespace-1')
 
     assert [TEST_RUNS[0]] == runs
+    assert mock_k8s_api_client.api_client.call_api.call_args[0][0] == \
+        '/apis/{group}/{version}/namespaces/{namespace}/{plural}'
+    assert mock_k8s_api_client.api_client.call_api.call_args[1]['path_params']['namespace'] == 'namespace-1'
+
+
+def test_list_runs_paginated(mock_k8s_api_client: CustomObjectsApi):
+    first_page = {'items': [LIST_RUNS_RESPONSE_RAW['items'][0]], 'metadata': {'continue': 'next-page-token'}}
+    second_page = {'items': [LIST_RUNS_RESPONSE_RAW['items'][1]], 'metadata': {}}
+    mock_k8s_api_client.api_client.call_api.side_effect = [first_page, second_page]
+
+    runs = Run.list()
+
+    assert runs == TEST_RUNS
+    assert mock_k8s_api_client.api_client.call_api.call_count == 2
+    assert ('continue', 'next-page-token') in \
+        mock_k8s_api_client.api_client.call_api.call_args_list[1][1]['query_params']
+
+
+def test_list_runs_selectors(mock_k8s_api_client: CustomObjectsApi):
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
+
+    runs = Run.list(name_filter=f'^{re.escape(TEST_RUNS[1].name)}$',
+                    run_kinds_filter=[RunKinds.TRAINING, RunKinds.JUPYTER])
+
+    assert [TEST_RUNS[1]] == runs
+    query_params = mock_k8s_api_client.api_client.call_api.call_args[1]['query_params']
+    assert ('labelSelector', 'runKind in (training,jupyter)') in query_params
+    assert ('fieldSelector', f'metadata.name={TEST_RUNS[1].name}') in query_params
+
+
+def test_list_runs_regex_name_filter_not_pushed_down(mock_k8s_api_client: CustomObjectsApi):
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
+
+    Run.list(name_filter='^exp-mnist.*$')
+
+    query_params = mock_k8s_api_client.api_client.call_api.call_args[1]['query_params']
+    assert not [param for param in query_params if param[0] == 'fieldSelector']
+
+
+@pytest.mark.parametrize('name_filter, field_selector', [
+    ('^exp.1$', None), ('^exp\\.1$', 'metadata.name=exp.1'), ('^exp-1$', 'metadata.name=exp-1'),
+    ('^exp\\-1$', 'metadata.name=exp-1')])
+def test_list_runs_name_filter_with_dot(mock_k8s_api_client: CustomObjectsApi, name_filter, field_selector):
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
+
+    Run.list(name_filter=name_filter)
+
+    query_params = mock_k8s_api_client.api_client.call_api.call_args[1]['query_params']
+    assert [value for param, value in query_params if param == 'fieldSelector'] == \
+        ([field_selector] if field_selector else [])
 
 
 def test_list_runs_filter_status(mock_k8s_api_client: CustomObjectsApi):
-    mock_k8s_api_client.list_cluster_custom_object.return_value = LIST_RUNS_RESPONSE_RAW
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
     runs = Run.list(state_list=[RunStatus.QUEUED])
     assert [TEST_RUNS[0]] == runs
 
 
 def test_list_runs_name_filter(mock_k8s_api_client: CustomObjectsApi):
-    mock_k8s_api_client.list_cluster_custom_object.return_value = LIST_RUNS_RESPONSE_RAW
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
     runs = Run.list(name_filter=TEST_RUNS[1].name)
     assert [TEST_RUNS[1]] == runs
 
 
 def test_list_runs_invalid_name_filter(mock_k8s_api_client: CustomObjectsApi):
-    mock_k8s_api_client.list_cluster_custom_object.return_value = LIST_RUNS_RESPONSE_RAW
+    mock_k8s_api_client.api_client.call_api.return_value = LIST_RUNS_RESPONSE_RAW
     with pytest.raises(InvalidRegularExpressionError):
         Run.list(name_filter='*')
 
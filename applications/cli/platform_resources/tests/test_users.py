@@ -114,25 +114,38 @@ def test_validate_user_name_incorrect_k8s_string():
     assert str(exe.value) == Texts.INCORRECT_K8S_USERNAME_ERROR_MSG
 
 
+def raw_user(state: str, resource_version: str) -> dict:
+    return {'metadata': {'name': 'test_user', 'resourceVersion': resource_version}, 'spec': {'uid': 1, 'state': state}}
+
+
 def test_is_user_created_success(mocker):
-    gud_mock = mocker.patch("platform_resources.user.User.get", return_value = USER_CREATED)
+    list_mock = mocker.patch("platform_resources.user.User.list_raw_resource_pages", return_value=iter([
+        {'metadata': {'resourceVersion': '10'}, 'items': [raw_user('CREATED', '10')]}]))
+    watch_mock = mocker.patch("platform_resources.user.User.watch_raw_resources")
     result = is_user_created("test_user", timeout=10)
 
     assert result
-    assert gud_mock.call_count == 1
+    assert list_mock.call_args[1]['field_selector'] == 'metadata.name=test_user'
+    assert watch_mock.call_count == 0
 
 
 def test_is_user_created_failure(mocker):
-    gud_mock = mocker.patch("platform_resources.user.User.get", return_value = TEST_USERS[0])
+    mocker.patch("platform_resources.user.User.list_raw_resource_pages", return_value=iter([
+        {'metadata': {'resourceVersion': '10'}, 'items': [raw_user('DEFINED', '10')]}]))
+    mocker.patch("platform_resources.user.User.watch_raw_resources", return_value=iter([]))
+    mocker.patch("util.k8s.k8s_watch.time.monotonic", side_effect=[100, 100, 102])
     result = is_user_created("test_user", timeout=1)
 
     assert not result
-    assert gud_mock.call_count == 2
 
 
 def test_is_user_created_success_with_wait(mocker):
-    gud_mock = mocker.patch("platform_resources.user.User.get", side_effect = [TEST_USERS[0], USER_CREATED])
+    mocker.patch("platform_resources.user.User.list_raw_resource_pages", return_value=iter([
+        {'metadata': {'resourceVersion': '10'}, 'items': [raw_user('DEFINED', '10')]}]))
+    watch_mock = mocker.patch("platform_resources.user.User.watch_raw_resources", return_value=iter([
+        {'type': 'MODIFIED', 'object': raw_user('CREATED', '11')}]))
     result = is_user_created("test_user", timeout=1)
 
     assert result
-    assert gud_mock.call_count == 2
+    assert watch_mock.call_args[1]['resource_version'] == '10'
+    assert watch_mock.call_args[1]['field_selector'] == 'metadata.name=test_user'
@@ -14,7 +14,6 @@
 # limitations under the License.
 #
 
-import time
 
 from marshmallow import ValidationError
 
@@ -61,11 +60,16 @@ def purge_user(username: str):
     """
     # remove data from elasticsearch
     try:
-        with k8s_proxy_context_manager.K8sProxy(NAUTAAppNames.ELASTICSEARCH) as proxy,\
-            spinner(text=TextsDel.DELETION_DELETING_USERS_EXPERIMENTS):
+        with k8s_proxy_context_manager.K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True) as proxy,\
+            spinner(text=TextsDel.DELETION_DELETING_USERS_EXPERIMENTS) as deletion_spinner:
             es_client = K8sElasticSearchClient(host="127.0.0.1", port=proxy.tunnel_port,
                                                verify_certs=False, use_ssl=False)
-            es_client.delete_logs_for_namespace(username)
+
+            def show_progress(deleted: int, total: int):
+                deletion_spinner.text = TextsDel.DELETION_DELETING_USERS_EXPERIMENTS_COUNT.format(deleted=deleted,
+                                                                                                  total=total)
+
+            es_client.delete_logs_for_namespace(username, progress_callback=show_progress)
     except K8sProxyCloseError as exe:
         logger.exception("Error during closing of a proxy for elasticsearch.")
         raise exe
@@ -111,18 +115,8 @@ def is_user_created(username: str, timeout: int = 1) -> bool:
     :return: True if user has received CREATED status, False otherwise
     It raises an exception in case of any unexpected situation.
     """
-    user = User.get(username)
-    if user and model.UserStatus.CREATED == user.state:
-        return True
-
-    for i in range(timeout):
-        time.sleep(1)
-        user = User.get(username)
-        logger.debug(f"Users state : {user.state}")
-        if user and model.UserStatus.CREATED == user.state:
-            return True
-
-    return False
+    return User.wait(condition=lambda users: any(model.UserStatus.CREATED == user.state for user in users),
+                     field_selector=f'metadata.name={username}', timeout=timeout)
 
 
 def check_users_presence(username: str) -> UserState:
@@ -34,6 +34,8 @@ NCTL_CONFIG_DIR_NAME = 'config'
 EXPERIMENTS_DIR_NAME = 'experiments'
 # name of a directory with data copied from script folder location
 FOLDER_DIR_NAME = 'folder'
+# name of a directory with data cached by nctl
+CACHE_DIR_NAME = 'cache'
 
 # registry config file
 DOCKER_REGISTRY_CONFIG_FILE = 'docker_registry.yaml'
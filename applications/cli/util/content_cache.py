@@ -0,0 +1,218 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from util.config import Config, CACHE_DIR_NAME
+from util.logger import initialize_logger
+
+logger = initialize_logger(__name__)
+
+# name of a directory (inside nctl cache directory) where files are stored by their content
+CONTENT_CACHE_DIR_NAME = 'content'
+INDEX_FILE_NAME = 'index.json'
+PRUNE_STAMP_FILE_NAME = 'pruned'
+
+# cached files not linked to any run environment for this time (in seconds) are removed from the cache
+UNUSED_FILE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+PRUNE_INTERVAL_SECONDS = 24 * 60 * 60
+
+# size of chunks in which files are read while being stored in the cache
+CHUNK_SIZE = 1024 * 1024
+
+# serializes updates of the index by caches used concurrently in one process (e.g. by runs prepared in parallel)
+index_lock = threading.Lock()
+
+
+class ContentCache:
+    """
+    Content-addressed cache of files copied into run environments. Every file is stored in the cache once per its
+    content and mode, and is hardlinked into destination directories, so repeated submissions from the same
+    (possibly multi-GB) folder copy only files that changed since the previous submission. Digests of source files
+    are indexed by their path, size and modification time, so unchanged files are not even read again.
+    If a filesystem doesn't support hardlinks, cached files are copied.
+
+    Files of destination directories may be shared with the cache and other run environments, so they should be
+    replaced instead of being modified in place.
+    """
+
+    def __init__(self, cache_path: str = None):
+        """
+        :param cache_path: directory where cached files are stored, by default it is located in nctl config directory
+        """
+        self.cache_path = cache_path or os.path.join(Config().config_path, CACHE_DIR_NAME, CONTENT_CACHE_DIR_NAME)
+        self.index_file_path = os.path.join(self.cache_path, INDEX_FILE_NAME)
+        self.index: Dict[str, list] = {}
+        # entries added to the index by this cache, merged into the index stored on disk
+        self.new_index_entries: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stored_bytes = 0
+
+    def copy_tree(self, src: str, dst: str, ignored_objects: List[str] = None):
+        """
+        Copies content of 'src' directory into 'dst' directory, replacing files that already exist in 'dst'.
+        :param src: source directory to copy
+        :param dst: destination directory
+        :param ignored_objects: list of ignored files and directories in 'src' directory
+        """
+        if not os.path.isdir(src):
+            raise NotADirectoryError(f'{src} is not a directory')
+
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.index = self._load_index()
+
+        for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+            relative_dirpath = os.path.relpath(dirpath, src)
+            if relative_dirpath == os.curdir and ignored_objects:
+                dirnames[:] = [dirname for dirname in dirnames if dirname not in ignored_objects]
+                filenames = [filename for filename in filenames if filename not in ignored_objects]
+
+            dst_dirpath = os.path.normpath(os.path.join(dst, relative_dirpath))
+            os.makedirs(dst_dirpath, exist_ok=True)
+            for filename in filenames:
+                self.copy_file(os.path.join(dirpath, filename), os.path.join(dst_dirpath, filename))
+
+        self._save_index()
+        logger.debug(f'Content cache - {src} copied to {dst}: {self.hits} hits, {self.misses} misses, '
+                     f'{self.stored_bytes} bytes stored in the cache.')
+        self._prune()
+
+    def copy_file(self, src: str, dst: str):
+        """
+        Copies 'src' file to 'dst' path through the cache. Existing 'dst' file is replaced.
+        """
+        src_stat = os.stat(src)
+        cached_file_path = self._get_cached_file_path(src, src_stat)
+        if cached_file_path:
+            self.hits += 1
+        else:
+            self.misses += 1
+            cached_file_path = self._store(src, src_stat)
+
+        # existing file may be shared with the cache as well, so it can't be overwritten
+        if os.path.lexists(dst):
+            os.remove(dst)
+        try:
+            os.link(cached_file_path, dst)
+        except OSError:
+            logger.debug(f'Content cache - failed to link {cached_file_path} to {dst}, copying it instead.')
+            shutil.copy2(cached_file_path, dst)
+
+    def _cached_file_path(self, digest: str, mode: int) -> str:
+        # mode is a part of a name, because it is shared by all links of a file
+        return os.path.join(self.cache_path, digest[:2], f'{digest}-{stat.S_IMODE(mode):o}')
+
+    def _get_cached_file_path(self, src: str, src_stat: os.stat_result) -> Optional[str]:
+        size, mtime, digest = self.index.get(os.path.abspath(src), (None, None, None))
+        if size != src_stat.st_size or mtime != src_stat.st_mtime_ns:
+            return None
+
+        cached_file_path = self._cached_file_path(digest, src_stat.st_mode)
+        return cached_file_path if os.path.isfile(cached_file_path) else None
+
+    def _store(self, src: str, src_stat: os.stat_result) -> str:
+        digest = hashlib.sha256()
+        temporary_file_path = os.path.join(self.cache_path, f'{uuid.uuid4().hex}.tmp')
+        try:
+            with open(src, 'rb') as src_file, open(temporary_file_path, 'wb') as temporary_file:
+                for chunk in iter(lambda: src_file.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    temporary_file.write(chunk)
+            shutil.copystat(src, temporary_file_path)
+
+            cached_file_path = self._cached_file_path(digest.hexdigest(), src_stat.st_mode)
+            os.makedirs(os.path.dirname(cached_file_path), exist_ok=True)
+            # replacing is atomic, so other nctl processes never link partially written file
+            os.replace(temporary_file_path, cached_file_path)
+        finally:
+            if os.path.exists(temporary_file_path):
+                os.remove(temporary_file_path)
+
+        index_entry = [src_stat.st_size, src_stat.st_mtime_ns, digest.hexdigest()]
+        self.index[os.path.abspath(src)] = index_entry
+        self.new_index_entries[os.path.abspath(src)] = index_entry
+        self.stored_bytes += src_stat.st_size
+        return cached_file_path
+
+    def _load_index(self) -> Dict[str, list]:
+        try:
+            with open(self.index_file_path, mode='r', encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except Exception:
+            logger.exception(f'Failed to read content cache index {self.index_file_path}.')
+            return {}
+
+    def _save_index(self):
+        """
+        Merges entries added by this cache into the index stored on disk, so entries added concurrently by other
+        caches are not lost.
+        """
+        if not self.new_index_entries:
+            return
+
+        temporary_file_path = f'{self.index_file_path}.{uuid.uuid4().hex}.tmp'
+        with index_lock:
+            try:
+                index = self._load_index()
+                index.update(self.new_index_entries)
+                with open(temporary_file_path, mode='w', encoding='utf-8') as index_file:
+                    json.dump(index, index_file)
+                # replacing is atomic, so other nctl processes never read partially written index
+                os.replace(temporary_file_path, self.index_file_path)
+                self.index = index
+                self.new_index_entries = {}
+            except Exception:
+                logger.exception(f'Failed to store content cache index {self.index_file_path}.')
+
+    def _prune(self):
+        """
+        Removes cached files that are not linked to any run environment for a long time. Linking a file updates
+        its ctime, so it is used as a time of last use of a file.
+        """
+        prune_stamp_file_path = os.path.join(self.cache_path, PRUNE_STAMP_FILE_NAME)
+        now = time.time()
+        try:
+            if os.path.isfile(prune_stamp_file_path) and \
+                    now - os.path.getmtime(prune_stamp_file_path) < PRUNE_INTERVAL_SECONDS:
+                return
+
+            removed_files_count = 0
+            for dirpath, _, filenames in os.walk(self.cache_path):
+                if dirpath == self.cache_path:
+                    continue
+                for filename in filenames:
+                    file_path = os.path.join(dirpath, filename)
+                    file_stat = os.stat(file_path)
+                    if file_stat.st_nlink == 1 and now - file_stat.st_ctime > UNUSED_FILE_MAX_AGE_SECONDS:
+                        os.remove(file_path)
+                        removed_files_count += 1
+
+            with open(prune_stamp_file_path, mode='w'):
+                pass
+            logger.debug(f'Content cache - {removed_files_count} unused files removed.')
+        except Exception:
+            logger.exception(f'Failed to prune content cache {self.cache_path}.')
@@ -46,6 +46,27 @@ def get_tags_list(server_address: str, image_name: str) -> List[str]:
     return result.json().get("tags")
 
 
+def get_image_digest(server_address: str, image_name: str, tag: str) -> str:
+    """
+    Returns digest of a manifest of an image with a given name and tag.
+    :param server_address: address of a server with docker registry
+    :param image_name: name of an image
+    :param tag: tag of an image
+    :return: digest of an image, e.g. sha256:0123...
+    In case of any problems during getting a digest - it throws an error
+    """
+    url = f"http://{server_address}/v2/{image_name}/manifests/{tag}"
+    headers = {'Accept': 'application/vnd.docker.distribution.manifest.v2+json'}
+    result = requests.head(url, headers=headers)
+
+    if not result or result.status_code != HTTPStatus.OK or not result.headers.get("Docker-Content-Digest"):
+        err_message = Texts.IMAGE_DIGEST_GET_ERROR_MSG
+        logger.error(err_message)
+        raise RuntimeError(err_message)
+
+    return result.headers.get("Docker-Content-Digest")
+
+
 def delete_tag(server_address: str, image_name: str, tag: str):
     """
     Deletes image with a given name and tag. To perform a final removal it needs garbage collection
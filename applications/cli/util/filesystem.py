@@ -14,10 +14,14 @@
 # limitations under the License.
 #
 
+import hashlib
 import os
 import shutil
 from typing import List
 
+# size of chunks in which files are read while calculating a digest of a directory
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
 
 def copytree_content(src: str, dst: str, ignored_objects: List[str] = None, symlinks=False, ignore=None):
     """
@@ -37,3 +41,29 @@ def copytree_content(src: str, dst: str, ignored_objects: List[str] = None, syml
                 shutil.copytree(s, d, symlinks, ignore)
             else:
                 shutil.copy2(s, d)
+
+
+def get_directory_digest(directory: str, ignored_objects: List[str] = None) -> str:
+    """
+    Calculates SHA-256 digest of a content of a directory - relative paths and contents of all files stored in it.
+    Directories with the same files have equal digests, regardless of their location and files' modification times.
+    :param directory: directory which digest should be calculated
+    :param ignored_objects: list of ignored files and directories in 'directory'
+    :return: hex representation of a digest
+    """
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(directory):
+        relative_dirpath = os.path.relpath(dirpath, directory)
+        if relative_dirpath == os.curdir and ignored_objects:
+            dirnames[:] = [dirname for dirname in dirnames if dirname not in ignored_objects]
+            filenames = [filename for filename in filenames if filename not in ignored_objects]
+        # directories are walked in sorted order so the digest doesn't depend on an order of files on a disk
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            relative_path = os.path.normpath(os.path.join(relative_dirpath, filename)).replace(os.sep, '/')
+            digest.update(f'{relative_path}\0{os.path.getsize(path)}\0'.encode('utf-8'))
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(DIGEST_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+    return digest.hexdigest()
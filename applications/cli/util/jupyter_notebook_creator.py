@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+import os
 from os import path
 
 import nbformat
@@ -71,6 +72,10 @@ def convert_py_to_ipynb(py_filename: str, ipynb_location: str) -> bool:
             ipynb_filename = ".".join(py_filename.split(".")[:-1]) + ".ipynb"
 
             ipynb_full_path = path.join(ipynb_location, ipynb_filename)
+            # existing notebook is removed instead of being overwritten, because it may be a hardlink to a file
+            # shared with other environments
+            if path.lexists(ipynb_full_path):
+                os.remove(ipynb_full_path)
             nbformat.write(output_notebook, ipynb_full_path, nbformat.NO_CONVERT)
     except Exception:
         err_message = Texts.IPYNB_CONVERSION_ERROR_MSG
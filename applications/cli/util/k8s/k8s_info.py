@@ -16,6 +16,7 @@
 
 import base64
 from enum import Enum
+import threading
 from http import HTTPStatus
 from typing import List, Dict
 
@@ -32,6 +33,8 @@ logger = initialize_logger('util.kubectl')
 
 PREFIX_VALUES = {"E": 10 ** 18, "P": 10 ** 15, "T": 10 ** 12, "G": 10 ** 9, "M": 10 ** 6, "K": 10 ** 3}
 PREFIX_I_VALUES = {"Ei": 2 ** 60, "Pi": 2 ** 50, "Ti": 2 ** 40, "Gi": 2 ** 30, "Mi": 2 ** 20, "Ki": 2 ** 10}
+# number of nano and micro CPUs in one miliCPU
+CPU_SUBMILI_PREFIX_VALUES = {"n": 10 ** 6, "u": 10 ** 3}
 
 
 class PodStatus(Enum):
@@ -52,8 +55,64 @@ class NamespaceStatus(Enum):
     NOT_EXISTS = 'Not_Exists'
 
 
+class K8sApiClients:
+    """
+    Process-wide registry of Kubernetes API clients. Kubeconfig is parsed only once per nctl invocation and all
+    API objects share one ApiClient, so connections kept alive in its urllib3 pool are reused by subsequent
+    requests instead of opening a new TLS connection for each of them.
+    """
+    _lock = threading.RLock()
+    _kube_config_loaded = False
+    _current_context: dict = None
+    _api_client: client.ApiClient = None
+    _apis: dict = {}
+
+    @classmethod
+    def load_kube_config(cls):
+        with cls._lock:
+            if not cls._kube_config_loaded:
+                config.load_kube_config()
+                cls._kube_config_loaded = True
+
+    @classmethod
+    def get_current_context(cls) -> dict:
+        with cls._lock:
+            if cls._current_context is None:
+                _, cls._current_context = config.list_kube_config_contexts()
+            return cls._current_context
+
+    @classmethod
+    def get_api_client(cls) -> client.ApiClient:
+        with cls._lock:
+            if not cls._api_client:
+                cls.load_kube_config()
+                cls._api_client = client.ApiClient()
+            return cls._api_client
+
+    @classmethod
+    def get(cls, api_class: type):
+        """
+        Returns an instance of a given API class (e.g. client.CoreV1Api) using the shared ApiClient.
+        """
+        with cls._lock:
+            if api_class not in cls._apis:
+                cls._apis[api_class] = api_class(cls.get_api_client())
+            return cls._apis[api_class]
+
+    @classmethod
+    def reset(cls):
+        """
+        Drops all clients and cached kubeconfig data, so they are created again on the next use.
+        """
+        with cls._lock:
+            cls._kube_config_loaded = False
+            cls._current_context = None
+            cls._api_client = None
+            cls._apis = {}
+
+
 def get_kubectl_host(replace_https=True, with_port=True) -> str:
-    config.load_kube_config()
+    K8sApiClients.load_kube_config()
     kubectl_host = configuration.Configuration().host
     if replace_https:
         kubectl_host = kubectl_host.replace('https://', '').replace('http://', '')
@@ -64,19 +123,16 @@ def get_kubectl_host(replace_https=True, with_port=True) -> str:
 
 
 def get_api_key() -> str:
-    config.load_kube_config()
+    K8sApiClients.load_kube_config()
     return configuration.Configuration().api_key.get('authorization')
 
 
 def get_kubectl_current_context_namespace() -> str:
-    config.load_kube_config()
-    context_list, current_context = config.list_kube_config_contexts()
-    return current_context['context']['namespace']
+    return K8sApiClients.get_current_context()['context']['namespace']
 
 
 def get_k8s_api() -> client.CoreV1Api:
-    config.load_kube_config()
-    return client.CoreV1Api(client.ApiClient())
+    return K8sApiClients.get(client.CoreV1Api)
 
 
 def get_service_account(service_account_name: str, namespace: str) -> V1ServiceAccount:
@@ -319,7 +375,7 @@ def get_current_user() -> str:
     :return: name of a user
     In case of any problems - it raises an exception
     """
-    return config.list_kube_config_contexts()[1]["context"]["user"]
+    return K8sApiClients.get_current_context()["context"]["user"]
 
 
 def get_current_namespace() -> str:
@@ -328,7 +384,7 @@ def get_current_namespace() -> str:
     :return: namespace
     In case of any problems - it raises an exception
     """
-    return config.list_kube_config_contexts()[1]["context"]["namespace"]
+    return K8sApiClients.get_current_context()["context"]["namespace"]
 
 
 def get_users_samba_password(username: str) -> str:
@@ -365,8 +421,7 @@ def get_users_samba_password(username: str) -> str:
 
 
 def get_cluster_roles(request_timeout: int = None) -> client.V1ClusterRoleList:
-    config.load_kube_config()
-    api = client.RbacAuthorizationV1Api(client.ApiClient())
+    api = K8sApiClients.get(client.RbacAuthorizationV1Api)
     return api.list_cluster_role(_request_timeout=request_timeout)
 
 
@@ -399,6 +454,10 @@ def sum_cpu_resources_unformatted(cpu_resources: List[str]):
         # If CPU resources are gives as for example 100m, we simply strip last character and sum leftover numbers.
         elif cpu_resource[-1] == "m":
             cpu_sum += int(cpu_resource[:-1])
+        # Metrics API returns usage of CPU in nanoCPUs (e.g. 2435978n) or microCPUs - they are rounded up to miliCPUs.
+        elif cpu_resource[-1] in CPU_SUBMILI_PREFIX_VALUES:
+            divisor = CPU_SUBMILI_PREFIX_VALUES[cpu_resource[-1]]
+            cpu_sum += -(-int(cpu_resource[:-1]) // divisor)
         # Else we assume that cpu resources are given as float value of normal CPUs instead of miliCPUs.
         else:
             cpu_sum += int(float(cpu_resource) * 1000)
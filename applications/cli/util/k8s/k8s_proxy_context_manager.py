@@ -15,15 +15,18 @@
 #
 
 import socket
-
-import requests
-from requests.exceptions import ConnectionError
+import subprocess
+import threading
 import time
 
 import psutil
 
 from util.config import Config
 from util.k8s import kubectl
+from util.k8s.persistent_tunnels import persistent_tunnels_enabled, get_tunnel_key, get_persistent_tunnel, \
+    register_persistent_tunnel, release_persistent_tunnel, close_idle_persistent_tunnels, TUNNEL_MAX_LIFETIME_SECONDS
+from util.k8s.port_forwarder import PortForwarder, in_process_port_forwarding_enabled, \
+    start_in_process_port_forwarding
 from util.app_names import NAUTAAppNames
 from util.logger import initialize_logger
 from util.exceptions import K8sProxyOpenError, K8sProxyCloseError, LocalPortOccupiedError, KubectlConnectionError
@@ -31,6 +34,14 @@ from cli_text_consts import UtilK8sProxyTexts as Texts
 
 logger = initialize_logger(__name__)
 
+# time (in seconds) after which a tunnel which is still not ready is treated as broken
+TUNNEL_READINESS_TIMEOUT = 30
+# delays (in seconds) between checks of tunnel's readiness grow exponentially from initial to max delay
+READINESS_PROBE_INITIAL_DELAY = 0.005
+READINESS_PROBE_MAX_DELAY = 1
+# kubectl port-forward prints a line starting with this prefix, once it listens on a local port
+KUBECTL_FORWARDING_MESSAGE_PREFIX = 'Forwarding from'
+
 
 class TunnelSetupError(RuntimeError):
     pass
@@ -38,27 +49,64 @@ class TunnelSetupError(RuntimeError):
 
 class K8sProxy:
     def __init__(self, nauta_app_name: NAUTAAppNames, port: int = None,
-                 app_name: str = None, number_of_retries: int = 0, namespace: str = None):
+                 app_name: str = None, number_of_retries: int = 0, namespace: str = None, persistent: bool = False,
+                 wait_for_forwarding_message: bool = False):
+        """
+        :param wait_for_forwarding_message: if True - readiness of a tunnel created by kubectl is signalled by its
+         "Forwarding from" message instead of being probed by connecting to a tunnel. Output of kubectl can't be read
+         after nctl exits, so it is not used by tunnels which are kept open
+        :param persistent: if True and persistent tunnels are enabled (by NCTL_PERSISTENT_TUNNELS environment
+         variable), an existing healthy tunnel to the same service is reused, and a newly created tunnel is kept
+         open in background after leaving the context, so subsequent nctl commands can reuse it. Tunnels created
+         inside nctl process (if NCTL_IN_PROCESS_PORT_FORWARDING environment variable is set) are never kept open
+        """
         self.nauta_app_name = nauta_app_name
         self.external_port = port
         self.app_name = app_name
         self.number_of_retries = number_of_retries
         self.namespace = namespace
+        self.persistent = persistent and persistent_tunnels_enabled()
+        self.keep_tunnel = False
+        self.in_process = in_process_port_forwarding_enabled()
+        self.wait_for_forwarding_message = wait_for_forwarding_message and not self.persistent
 
     def __enter__(self):
         logger.debug("k8s_proxy - entering")
         try:
+            if self.persistent and self._attach_to_persistent_tunnel():
+                return self
+
+            if self.in_process:
+                # in-process forwarder listens on a local port before it is returned, so it is ready immediately
+                self.process, self.tunnel_port, self.container_port \
+                    = start_in_process_port_forwarding(k8s_app_name=self.nauta_app_name,
+                                                       port=self.external_port,
+                                                       app_name=self.app_name,
+                                                       namespace=self.namespace)
+                return self
+
             self.process, self.tunnel_port, self.container_port \
                 = kubectl.start_port_forwarding(k8s_app_name=self.nauta_app_name,
                                                 port=self.external_port,
                                                 app_name=self.app_name,
                                                 number_of_retries=self.number_of_retries,
-                                                namespace=self.namespace)
+                                                namespace=self.namespace,
+                                                detached=self.persistent,
+                                                max_lifetime=TUNNEL_MAX_LIFETIME_SECONDS if self.persistent else None,
+                                                pipe_output=self.wait_for_forwarding_message)
             try:
-                K8sProxy._wait_for_connection_readiness('localhost', self.tunnel_port)
+                if self.wait_for_forwarding_message:
+                    K8sProxy._wait_for_forwarding_message(self.process, self.tunnel_port)
+                else:
+                    K8sProxy._wait_for_connection_readiness('localhost', self.tunnel_port)
             except Exception as ex:
                 self._close_tunnel()
                 raise ex
+
+            if self.persistent:
+                self.keep_tunnel = register_persistent_tunnel(self.tunnel_key, pid=self.process.pid,
+                                                              tunnel_port=self.tunnel_port,
+                                                              container_port=self.container_port)
         except LocalPortOccupiedError as exe:
             raise exe
         except Exception as exe:
@@ -70,6 +118,9 @@ class K8sProxy:
 
     def __exit__(self, *args):
         logger.debug("k8s_proxy - exiting")
+        if self.keep_tunnel:
+            release_persistent_tunnel(self.tunnel_key)
+            return
         try:
             self._close_tunnel()
         except psutil.NoSuchProcess:
@@ -80,18 +131,70 @@ class K8sProxy:
             raise K8sProxyCloseError(error_message) from exe
 
     @staticmethod
-    def _wait_for_connection_readiness(address: str, port: int, tries: int = 30):
-        for retry in range(tries):
+    def _wait_for_connection_readiness(address: str, port: int, timeout: float = TUNNEL_READINESS_TIMEOUT):
+        """
+        Waits until a tunnel accepts TCP connections. Connections are probed with exponentially growing delays,
+        so a tunnel which is ready within milliseconds is not delayed by a fixed polling interval.
+        """
+        delay = READINESS_PROBE_INITIAL_DELAY
+        waiting_time = 0
+        while True:
             try:
-                requests.get(f'http://{address}:{port}')
-                return
-            except ConnectionError as e:
+                with socket.create_connection((address, port), timeout=READINESS_PROBE_MAX_DELAY):
+                    logger.debug(f'{address}:{port} ready after {waiting_time:.3f}s.')
+                    return
+            except OSError as e:
                 error_msg = f'can not connect to {address}:{port}. Error: {e}'
-                logger.exception(error_msg) if retry == tries-1 else logger.debug(error_msg)
-                time.sleep(1)
+                if waiting_time >= timeout:
+                    logger.exception(error_msg)
+                    break
+                logger.debug(error_msg)
+                time.sleep(delay)
+                waiting_time += delay
+                delay = min(delay * 2, READINESS_PROBE_MAX_DELAY)
         raise TunnelSetupError(Texts.TUNNEL_NOT_READY_ERROR_MSG.format(address=address, port=port))
 
+    @staticmethod
+    def _wait_for_forwarding_message(process: subprocess.Popen, port: int, timeout: float = TUNNEL_READINESS_TIMEOUT):
+        """
+        Waits until kubectl reports that it forwards a given port. Output of kubectl is read until the process ends,
+        so kubectl never blocks on writing it.
+        """
+        forwarding = threading.Event()
+        stop_waiting = threading.Event()
+
+        def read_output():
+            for line in process.stdout:
+                logger.debug(f'port-forward {port}: {line.rstrip()}')
+                if line.startswith(KUBECTL_FORWARDING_MESSAGE_PREFIX):
+                    forwarding.set()
+                    stop_waiting.set()
+            # if the process ended, there is no reason to wait any longer
+            stop_waiting.set()
+
+        threading.Thread(target=read_output, name=f'port-forward-{port}-output', daemon=True).start()
+        stop_waiting.wait(timeout=timeout)
+        if not forwarding.is_set():
+            raise TunnelSetupError(Texts.TUNNEL_NOT_READY_ERROR_MSG.format(address='localhost', port=port))
+
+    def _attach_to_persistent_tunnel(self) -> bool:
+        self.tunnel_key = get_tunnel_key(nauta_app_name=self.nauta_app_name, app_name=self.app_name,
+                                         namespace=self.namespace)
+        close_idle_persistent_tunnels()
+        tunnel = get_persistent_tunnel(self.tunnel_key)
+        if not tunnel or (self.external_port and tunnel.tunnel_port != self.external_port):
+            return False
+
+        logger.debug(f'k8s_proxy - attaching to persistent tunnel on port {tunnel.tunnel_port}')
+        self.process, self.tunnel_port, self.container_port = None, tunnel.tunnel_port, tunnel.container_port
+        self.keep_tunnel = True
+        return True
+
     def _close_tunnel(self):
+        if isinstance(self.process, PortForwarder):
+            self.process.close()
+            return
+
         children = psutil.Process(self.process.pid).children(recursive=True)
         children.insert(0, self.process)
         for child in children:
@@ -14,16 +14,31 @@
 # limitations under the License.
 #
 
+from http import HTTPStatus
+import json
 from operator import itemgetter
+from typing import Iterator, List, Tuple
 
-from typing import List, Tuple
-from util.k8s.kubectl import get_top_for_pod
-from util.k8s.k8s_info import get_pods, sum_cpu_resources_unformatted, sum_mem_resources_unformatted, \
-    format_mem_resources, format_cpu_resources, PodStatus
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+from util.k8s.k8s_info import K8sApiClients, sum_cpu_resources_unformatted, sum_mem_resources_unformatted, \
+    format_mem_resources, format_cpu_resources
 from util.logger import initialize_logger
 
 logger = initialize_logger(__name__)
 
+# namespaces of platform's components - their usage of resources is not taken into account
+TECHNICAL_NAMESPACES = ["nauta", "kube-system"]
+
+METRICS_API_GROUP = "metrics.k8s.io"
+METRICS_API_VERSION = "v1beta1"
+
+# heapster's model API, used on clusters without metrics API - the same one which is used by kubectl top
+HEAPSTER_NAMESPACE = "kube-system"
+HEAPSTER_SERVICE_PROXY_NAME = "http:heapster:"
+HEAPSTER_PODS_METRICS_PATH = "apis/metrics/v1alpha1/pods"
+
 
 class ResourceUsage():
 
@@ -42,9 +57,58 @@ class ResourceUsage():
         return self.user_name+":"+self.get_formatted_cpu_usage()+":"+self.get_formatted_mem_usage()
 
 
+def get_pods_metrics() -> List[dict]:
+    """
+    Returns current usage of resources of all pods in a cluster - items of PodMetricsList returned by metrics API.
+    All pods are fetched with one request, instead of running kubectl top for each pod separately.
+    """
+    custom_objects_api = K8sApiClients.get(client.CustomObjectsApi)
+    pods_metrics = custom_objects_api.list_cluster_custom_object(group=METRICS_API_GROUP,
+                                                                 version=METRICS_API_VERSION, plural="pods")
+    return pods_metrics.get("items") or []
+
+
+def get_pods_metrics_from_heapster() -> List[dict]:
+    """
+    Returns current usage of resources of all pods in a cluster, fetched from heapster with one request through
+    a proxy of its service. Items have the same format as items returned by metrics API.
+    """
+    core_api = K8sApiClients.get(client.CoreV1Api)
+    # response isn't preloaded, because the client would deserialize JSON returned by a proxy into a python repr
+    response = core_api.connect_get_namespaced_service_proxy_with_path(name=HEAPSTER_SERVICE_PROXY_NAME,
+                                                                       namespace=HEAPSTER_NAMESPACE,
+                                                                       path=HEAPSTER_PODS_METRICS_PATH,
+                                                                       _preload_content=False)
+    return json.loads(response.data.decode("utf-8")).get("items") or []
+
+
+def get_containers_usage(pods_metrics: List[dict]) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yields namespace, cpu and memory usage of every container from a given list of pods' metrics.
+    """
+    for pod_metrics in pods_metrics:
+        namespace = pod_metrics["metadata"]["namespace"]
+        for container in pod_metrics.get("containers") or []:
+            usage = container.get("usage") or {}
+            yield namespace, usage.get("cpu"), usage.get("memory")
+
+
+def get_pods_usage() -> List[Tuple[str, str, str]]:
+    try:
+        pods_metrics = get_pods_metrics()
+    except ApiException as exe:
+        # metrics API is served by metrics-server, which may be not deployed (e.g. when heapster is used instead)
+        # or not accessible for a user
+        if exe.status not in (HTTPStatus.NOT_FOUND, HTTPStatus.FORBIDDEN):
+            raise
+        logger.debug(f"Metrics API is not available ({exe.status}), heapster is used instead.")
+        pods_metrics = get_pods_metrics_from_heapster()
+
+    return list(get_containers_usage(pods_metrics))
+
+
 def get_highest_usage() -> Tuple[List[str], List[str]]:
 
-    available_pods = get_pods(None)
     CPU_KEY = "cpu"
     MEM_KEY = "mem"
     NAME_KEY = "name"
@@ -52,20 +116,16 @@ def get_highest_usage() -> Tuple[List[str], List[str]]:
     users_data = {}
     summarized_usage = []
 
-    for item in available_pods:
-        name = item.metadata.name
-        namespace = item.metadata.namespace
+    for namespace, cpu, mem in get_pods_usage():
         # omit technical namespaces
-        if namespace not in ["nauta", "kube-system"] and item.status.phase.upper() == PodStatus.RUNNING.value:
-            try:
-                cpu, mem = get_top_for_pod(name=name, namespace=namespace)
-                if namespace in users_data:
-                    users_data.get(namespace).get(CPU_KEY).append(cpu)
-                    users_data.get(namespace).get(MEM_KEY).append(mem)
-                else:
-                    users_data[namespace] = {CPU_KEY: [cpu], MEM_KEY: [mem]}
-            except Exception as exe:
-                logger.exception("Error during gathering pod resources usage.")
+        if namespace in TECHNICAL_NAMESPACES:
+            continue
+        user_data = users_data.setdefault(namespace, {CPU_KEY: [], MEM_KEY: []})
+        # containers which haven't reported their usage yet are skipped
+        if cpu:
+            user_data[CPU_KEY].append(cpu)
+        if mem:
+            user_data[MEM_KEY].append(mem)
 
     for user_name, usage in users_data.items():
         summarized_usage.append({NAME_KEY: user_name,
@@ -0,0 +1,129 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import math
+import time
+from typing import Any, Callable, Iterable, List, Tuple
+
+from kubernetes import client, watch
+
+from util.app_names import NAUTAAppNames
+from util.k8s.k8s_info import get_k8s_api, PodStatus
+from util.logger import initialize_logger
+
+logger = initialize_logger(__name__)
+
+
+def wait_for_condition(condition: Callable[[List[Any]], bool],
+                       list_objects: Callable[[], Tuple[List[Any], str]],
+                       watch_objects: Callable[[str, int], Iterable[dict]],
+                       get_name: Callable[[Any], str],
+                       get_resource_version: Callable[[Any], str],
+                       timeout: float) -> bool:
+    """
+    Waits until a condition is fulfilled by a list of Kubernetes objects. Objects are listed once, and then their
+    changes are streamed by a watch starting at resourceVersion of the list, so the condition is checked again as
+    soon as any change is observed, instead of polling the API. If watch is closed by the API server, it is resumed
+    from the last observed resourceVersion, and if that resourceVersion has expired, objects are listed again.
+    :param condition: function checking a list of objects
+    :param list_objects: function returning a list of objects and resourceVersion of the list
+    :param watch_objects: function returning watch events (dicts with type and object keys) for changes that
+     happened after a given resourceVersion, which ends after a given number of seconds
+    :param get_name: function returning a name of an object
+    :param get_resource_version: function returning resourceVersion of an object
+    :param timeout: maximal time of waiting (in seconds), if it is 0 - the condition is checked only once
+    :return: True if the condition was fulfilled, False if it wasn't fulfilled within timeout
+    """
+    deadline = time.monotonic() + timeout
+    objects = None
+    resource_version = None
+    while True:
+        if objects is None:
+            object_list, resource_version = list_objects()
+            objects = {get_name(k8s_object): k8s_object for k8s_object in object_list}
+        if condition(list(objects.values())):
+            return True
+
+        remaining_time = deadline - time.monotonic()
+        if remaining_time <= 0:
+            return False
+
+        for event in watch_objects(resource_version, math.ceil(remaining_time)):
+            k8s_object = event['object']
+            if event['type'] == 'ERROR':
+                # most likely 410 Gone - resourceVersion has been already compacted
+                logger.debug(f'Watch failed, listing objects again: {event.get("raw_object", k8s_object)}')
+                objects = None
+                break
+            elif event['type'] == 'DELETED':
+                objects.pop(get_name(k8s_object), None)
+            else:
+                objects[get_name(k8s_object)] = k8s_object
+            resource_version = get_resource_version(k8s_object)
+
+            if condition(list(objects.values())):
+                return True
+
+
+def wait_for_pods(namespace: str, label_selector: str, condition: Callable[[List[client.V1Pod]], bool],
+                  timeout: float) -> bool:
+    """
+    Waits until pods with given labels fulfill a given condition. See wait_for_condition for details.
+    """
+    api = get_k8s_api()
+
+    def list_pods() -> Tuple[List[client.V1Pod], str]:
+        pods = api.list_namespaced_pod(namespace=namespace, label_selector=label_selector)
+        return pods.items, pods.metadata.resource_version
+
+    def watch_pods(resource_version: str, timeout_seconds: int) -> Iterable[dict]:
+        return watch.Watch().stream(api.list_namespaced_pod, namespace=namespace, label_selector=label_selector,
+                                    resource_version=resource_version, timeout_seconds=timeout_seconds)
+
+    return wait_for_condition(condition=condition, list_objects=list_pods, watch_objects=watch_pods,
+                              get_name=lambda pod: pod.metadata.name,
+                              get_resource_version=lambda pod: pod.metadata.resource_version, timeout=timeout)
+
+
+def wait_for_pods_status(run_name: str, namespace: str, status: PodStatus, timeout: float,
+                         app_name: NAUTAAppNames = None) -> bool:
+    """
+    Waits until all pods related to a given run have a given status - a counterpart of check_pods_status.
+    :param run_name: name of a run
+    :param namespace: namespace where run is located
+    :param status: expected status of pods
+    :param timeout: maximal time of waiting (in seconds)
+    :param app_name: name of an app - if None - pods are not limited to any application
+    :return: True if there are pods related to a run and all of them have a given status, False if it didn't
+     happen within timeout
+    """
+    label_selector = f"runName={run_name}"
+    if app_name:
+        label_selector = label_selector + f",app={app_name}"
+
+    return wait_for_pods(namespace=namespace, label_selector=label_selector,
+                         condition=lambda pods: bool(pods) and all(PodStatus(pod.status.phase.upper()) == status
+                                                                   for pod in pods),
+                         timeout=timeout)
+
+
+def are_pods_ready(pods: List[client.V1Pod]) -> bool:
+    """
+    Returns True if there are any pods and all containers of all of them are ready.
+    """
+    return bool(pods) and all(pod.status.phase == 'Running' and pod.status.container_statuses and
+                              all(container_status.ready for container_status in pod.status.container_statuses)
+                              for pod in pods)
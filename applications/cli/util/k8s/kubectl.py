@@ -14,14 +14,16 @@
 # limitations under the License.
 #
 
+import os
+import socket
 import subprocess
 import time
-import random
 from enum import Enum
 
 from typing import Optional, Tuple
 
 from util import system
+from util.config import Config, CACHE_DIR_NAME
 from util.logger import initialize_logger
 from util.exceptions import KubernetesError, KubectlConnectionError, LocalPortOccupiedError
 from util.k8s.k8s_info import get_app_services
@@ -31,9 +33,12 @@ from cli_text_consts import UtilKubectlTexts as Texts
 
 logger = initialize_logger('util.kubectl')
 
-MAX_NUMBER_OF_TRIES = 1000
-START_PORT = 3000
-END_PORT = 65535
+MAX_NUMBER_OF_TRIES = 100
+
+# name of a directory (inside nctl cache directory) where ports chosen by nctl processes are leased
+PORT_LEASES_DIR_NAME = 'port_leases'
+# time (in seconds) for which a chosen port is leased - it covers time needed by a proxy to bind the port
+PORT_LEASE_SECONDS = 30
 
 
 class UserState(Enum):
@@ -43,20 +48,62 @@ class UserState(Enum):
 
 
 def find_random_available_port() -> int:
-    for port in random.sample(range(START_PORT, END_PORT), k=MAX_NUMBER_OF_TRIES):
-        if check_port_availability(port):
-            tunnel_port = port
+    """
+    Returns a free local port chosen by the system. The port is leased for PORT_LEASE_SECONDS, so nctl processes
+    running concurrently never choose the same port before a proxy binds it.
+    """
+    for _ in range(MAX_NUMBER_OF_TRIES):
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+        except OSError:
+            logger.exception('Failed to bind a random port.')
             break
-    else:
-        error_msg = Texts.NO_AVAILABLE_PORT_ERROR_MSG
-        logger.error(error_msg)
-        raise LocalPortOccupiedError(error_msg)
 
-    return tunnel_port
+        if lease_port(port):
+            return port
+
+    error_msg = Texts.NO_AVAILABLE_PORT_ERROR_MSG
+    logger.error(error_msg)
+    raise LocalPortOccupiedError(error_msg)
+
+
+def lease_port(port: int) -> bool:
+    """
+    Leases a local port for the current user. A lease is a file named after a port, created exclusively, so only
+    one nctl process can lease a port at a time. Expired leases are removed.
+    :return: True if the port was leased, False if it is already leased by another nctl process
+    """
+    port_leases_dir_path = os.path.join(Config().config_path, CACHE_DIR_NAME, PORT_LEASES_DIR_NAME)
+    try:
+        os.makedirs(port_leases_dir_path, exist_ok=True)
+        now = time.time()
+        for lease_file_name in os.listdir(port_leases_dir_path):
+            lease_file_path = os.path.join(port_leases_dir_path, lease_file_name)
+            try:
+                if now - os.path.getmtime(lease_file_path) > PORT_LEASE_SECONDS:
+                    os.remove(lease_file_path)
+            except FileNotFoundError:
+                # lease has been removed by another nctl process
+                pass
+
+        with open(os.path.join(port_leases_dir_path, str(port)), mode='x'):
+            pass
+        return True
+    except FileExistsError:
+        logger.debug(f'Port {port} is leased by another nctl process.')
+        return False
+    except Exception:
+        # leases only prevent rare collisions, so a port is used even if it can't be leased
+        logger.exception(f'Failed to lease port {port}.')
+        return True
 
 
 def start_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_name: str = None,
-                          number_of_retries: int = 0, namespace: str = None) -> (subprocess.Popen, Optional[int], int):
+                          number_of_retries: int = 0, namespace: str = None,
+                          detached: bool = False, pipe_output: bool = False,
+                          max_lifetime: int = None) -> (subprocess.Popen, Optional[int], int):
     """
     Creates a proxy responsible for forwarding requests to and from a
     kubernetes' local docker proxy. In case of any errors during creating the
@@ -70,6 +117,11 @@ def start_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_nam
                          value taken from NAUTAAppNames enum
     :param port: if given - the system will try to use it as a local port. Random port will be used
      if that port is not available
+    :param detached: if True - proxy is started in a new session, so it may outlive nctl
+    :param max_lifetime: if given (and proxy is detached) - proxy exits by itself after this number of seconds.
+     Not supported on Windows
+    :param pipe_output: if True - output of the proxy is available in stdout of a returned process, and it has to
+     be read continuously, otherwise the proxy may block
     :return:
         instance of a process with proxy, tunneled port and container port
     """
@@ -114,6 +166,9 @@ def start_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_nam
             port_forward_command = ['while', 'true;', 'do', 'kubectl', 'port-forward', f'--namespace={namespace} ',
                                     f'service/{service_name}', f'{tunnel_port}:{service_container_port};',
                                     'done']
+            if detached and max_lifetime:
+                # detached proxy is a leader of its own process group, so the whole group is killed when it expires
+                port_forward_command = ['(sleep', f'{max_lifetime};', 'kill', '0)', '&'] + port_forward_command
 
         logger.debug(port_forward_command)
 
@@ -121,7 +176,8 @@ def start_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_nam
         if number_of_retries:
             for i in range(number_of_retries-1):
                 try:
-                    process = system.execute_subprocess_command(port_forward_command, shell=True, join=True)
+                    process = system.execute_subprocess_command(port_forward_command, shell=True, join=True,
+                                                                start_new_session=detached, pipe_output=pipe_output)
                 except Exception:
                     logger.exception("Error during setting up proxy - retrying.")
                 else:
@@ -129,7 +185,8 @@ def start_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_nam
                 time.sleep(5)
 
         if not process:
-            process = system.execute_subprocess_command(port_forward_command, shell=True, join=True)
+            process = system.execute_subprocess_command(port_forward_command, shell=True, join=True,
+                                                        start_new_session=detached, pipe_output=pipe_output)
 
     except KubernetesError as exe:
         raise RuntimeError(exe)
@@ -0,0 +1,256 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import namedtuple
+import hashlib
+import json
+import os
+import socket
+import time
+from typing import List, Optional
+
+import psutil
+
+from util.app_names import NAUTAAppNames
+from util.config import Config, CACHE_DIR_NAME
+from util.k8s.k8s_info import K8sApiClients
+from util.logger import initialize_logger
+
+logger = initialize_logger(__name__)
+
+# if this environment variable is set (e.g. to 1), tunnels to nauta services are kept open in background after
+# nctl command finishes, and they are reused by subsequent nctl commands
+NCTL_PERSISTENT_TUNNELS_ENV_NAME = 'NCTL_PERSISTENT_TUNNELS'
+# name of a directory (inside nctl cache directory) where persistent tunnels are registered
+TUNNELS_DIR_NAME = 'tunnels'
+
+# persistent tunnels not used by any nctl command for this time (in seconds) are closed by subsequent nctl commands
+TUNNEL_IDLE_TIMEOUT_SECONDS = 30 * 60
+# processes of persistent tunnels exit by themselves after this time (in seconds), even if no nctl command is run
+# anymore. On Windows they don't, so they have to be closed by ending kubectl processes, if nctl isn't used anymore
+TUNNEL_MAX_LIFETIME_SECONDS = 4 * 60 * 60
+# tunnels which are going to exit within this time (in seconds) are not reused, so they don't exit while being used
+TUNNEL_MIN_REMAINING_LIFETIME_SECONDS = TUNNEL_IDLE_TIMEOUT_SECONDS
+# timeout (in seconds) of a connection checking whether a persistent tunnel is healthy
+TUNNEL_HEALTH_CHECK_TIMEOUT_SECONDS = 0.5
+
+"""
+A namedtuple representing a registered persistent tunnel - process of a tunnel is identified by its pid and creation
+time, so a process with a reused pid is not mistaken for a tunnel. Cluster identifies API server, kubectl context and
+user for which a tunnel was created (see get_cluster_identity()).
+"""
+PersistentTunnel = namedtuple('PersistentTunnel', ['pid', 'create_time', 'tunnel_port', 'container_port',
+                                                   'last_used', 'cluster'])
+# tunnels registered before clusters were recorded have no cluster, so they are never reused
+PersistentTunnel.__new__.__defaults__ = (None,)
+
+
+def persistent_tunnels_enabled() -> bool:
+    return os.environ.get(NCTL_PERSISTENT_TUNNELS_ENV_NAME, '').lower() not in ('', '0', 'false', 'no')
+
+
+def get_cluster_identity() -> List[str]:
+    """
+    Returns API server address, name of the current kubectl context and its user. Kubeconfigs of all nauta users
+    share a name of a context, so the name alone doesn't identify a cluster.
+    """
+    context = K8sApiClients.get_current_context()
+    return [K8sApiClients.get_api_client().configuration.host, context['name'],
+            context.get('context', {}).get('user')]
+
+
+def get_tunnel_key(nauta_app_name: NAUTAAppNames, app_name: str = None, namespace: str = None) -> str:
+    """
+    Returns a key identifying tunnels to a given service of a cluster from the current kubectl context.
+    """
+    digest = hashlib.sha1(json.dumps([get_cluster_identity(), app_name, namespace]).encode('utf-8')).hexdigest()[:10]
+    return f'{nauta_app_name.value}-{digest}'
+
+
+def get_persistent_tunnel(tunnel_key: str) -> Optional[PersistentTunnel]:
+    """
+    Returns a healthy persistent tunnel registered with a given key for the current cluster and marks it as used.
+    Unhealthy tunnel, tunnel of another cluster or tunnel which is going to exit soon is closed and unregistered.
+    :param tunnel_key: key of a tunnel, see get_tunnel_key()
+    :return: tunnel or None, if there is no healthy tunnel registered with a given key
+    """
+    tunnel = _load_tunnel(tunnel_key)
+    if not tunnel:
+        return None
+
+    if tunnel.cluster != get_cluster_identity():
+        logger.debug(f'Persistent tunnel {tunnel_key} leads to another cluster, closing it.')
+        _close_tunnel(tunnel_key, tunnel)
+        return None
+
+    if not _is_tunnel_healthy(tunnel):
+        logger.debug(f'Persistent tunnel {tunnel_key} is not healthy, closing it.')
+        _close_tunnel(tunnel_key, tunnel)
+        return None
+
+    if time.time() - tunnel.create_time > TUNNEL_MAX_LIFETIME_SECONDS - TUNNEL_MIN_REMAINING_LIFETIME_SECONDS:
+        logger.debug(f'Persistent tunnel {tunnel_key} is going to exit soon, closing it.')
+        _close_tunnel(tunnel_key, tunnel)
+        return None
+
+    tunnel = tunnel._replace(last_used=time.time())
+    _save_tunnel(tunnel_key, tunnel)
+    return tunnel
+
+
+def register_persistent_tunnel(tunnel_key: str, pid: int, tunnel_port: int, container_port: int) -> bool:
+    """
+    Registers a tunnel process, so it can be reused by subsequent nctl commands. If another tunnel with the same
+    key has been already registered (e.g. by concurrently running nctl command), a given tunnel is not registered.
+    :return: True if a tunnel was registered, False otherwise - in that case it should be closed by a caller
+    """
+    try:
+        tunnel = PersistentTunnel(pid=pid, create_time=psutil.Process(pid).create_time(), tunnel_port=tunnel_port,
+                                  container_port=container_port, last_used=time.time(),
+                                  cluster=get_cluster_identity())
+        os.makedirs(_get_tunnels_dir_path(), exist_ok=True)
+        # file is created exclusively, so only one of tunnels created concurrently is registered
+        with open(_get_tunnel_file_path(tunnel_key), mode='x', encoding='utf-8') as tunnel_file:
+            json.dump(tunnel._asdict(), tunnel_file)
+        logger.debug(f'Persistent tunnel {tunnel_key} registered on port {tunnel_port}.')
+        return True
+    except FileExistsError:
+        logger.debug(f'Persistent tunnel {tunnel_key} has been already registered.')
+        return False
+    except Exception:
+        logger.exception(f'Failed to register persistent tunnel {tunnel_key}.')
+        return False
+
+
+def release_persistent_tunnel(tunnel_key: str):
+    """
+    Marks a persistent tunnel as used by a command which has just finished using it.
+    """
+    tunnel = _load_tunnel(tunnel_key)
+    if tunnel:
+        _save_tunnel(tunnel_key, tunnel._replace(last_used=time.time()))
+
+
+def close_idle_persistent_tunnels():
+    """
+    Closes persistent tunnels which are not healthy, or which have not been used for TUNNEL_IDLE_TIMEOUT_SECONDS
+    and have no open connections.
+    """
+    tunnels_dir_path = _get_tunnels_dir_path()
+    if not os.path.isdir(tunnels_dir_path):
+        return
+
+    now = time.time()
+    for tunnel_file_name in os.listdir(tunnels_dir_path):
+        tunnel_key, extension = os.path.splitext(tunnel_file_name)
+        if extension != '.json':
+            continue
+
+        tunnel = _load_tunnel(tunnel_key)
+        if tunnel and (not _is_tunnel_healthy(tunnel) or
+                       (now - tunnel.last_used > TUNNEL_IDLE_TIMEOUT_SECONDS and not _is_tunnel_in_use(tunnel))):
+            logger.debug(f'Closing idle persistent tunnel {tunnel_key}.')
+            _close_tunnel(tunnel_key, tunnel)
+
+
+def _terminate_process_tree(pid: int):
+    """
+    Terminates a process with a given pid and all its children. Processes which don't exit within 3 seconds are
+    killed.
+    """
+    process = psutil.Process(pid)
+    processes = process.children(recursive=True)
+    processes.insert(0, process)
+    for process in processes:
+        process.terminate()
+    gone, alive = psutil.wait_procs(processes, timeout=3)
+    for survivor in alive:
+        survivor.kill()
+
+
+def _get_tunnels_dir_path() -> str:
+    return os.path.join(Config().config_path, CACHE_DIR_NAME, TUNNELS_DIR_NAME)
+
+
+def _get_tunnel_file_path(tunnel_key: str) -> str:
+    return os.path.join(_get_tunnels_dir_path(), f'{tunnel_key}.json')
+
+
+def _get_tunnel_process(tunnel: PersistentTunnel) -> Optional[psutil.Process]:
+    try:
+        process = psutil.Process(tunnel.pid)
+        return process if process.create_time() == tunnel.create_time else None
+    except psutil.Error:
+        return None
+
+
+def _is_tunnel_healthy(tunnel: PersistentTunnel) -> bool:
+    if not _get_tunnel_process(tunnel):
+        return False
+    try:
+        with socket.create_connection(('127.0.0.1', tunnel.tunnel_port), timeout=TUNNEL_HEALTH_CHECK_TIMEOUT_SECONDS):
+            return True
+    except OSError:
+        return False
+
+
+def _is_tunnel_in_use(tunnel: PersistentTunnel) -> bool:
+    process = _get_tunnel_process(tunnel)
+    if not process:
+        return False
+    try:
+        for tunnel_process in [process] + process.children(recursive=True):
+            if any(connection.laddr and connection.laddr[1] == tunnel.tunnel_port and
+                   connection.status == psutil.CONN_ESTABLISHED for connection in tunnel_process.connections()):
+                return True
+    except psutil.Error:
+        logger.debug(f'Failed to check connections of a tunnel process {tunnel.pid}.')
+    return False
+
+
+def _close_tunnel(tunnel_key: str, tunnel: PersistentTunnel):
+    try:
+        if _get_tunnel_process(tunnel):
+            _terminate_process_tree(tunnel.pid)
+    except psutil.Error:
+        logger.debug(f'Process of a persistent tunnel {tunnel_key} has been already closed.')
+    try:
+        os.remove(_get_tunnel_file_path(tunnel_key))
+    except FileNotFoundError:
+        pass
+
+
+def _load_tunnel(tunnel_key: str) -> Optional[PersistentTunnel]:
+    try:
+        with open(_get_tunnel_file_path(tunnel_key), mode='r', encoding='utf-8') as tunnel_file:
+            return PersistentTunnel(**json.load(tunnel_file))
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception(f'Failed to read persistent tunnel {tunnel_key}.')
+        return None
+
+
+def _save_tunnel(tunnel_key: str, tunnel: PersistentTunnel):
+    tunnel_file_path = _get_tunnel_file_path(tunnel_key)
+    temporary_file_path = f'{tunnel_file_path}.{os.getpid()}.tmp'
+    try:
+        with open(temporary_file_path, mode='w', encoding='utf-8') as tunnel_file:
+            json.dump(tunnel._asdict(), tunnel_file)
+        # replacing is atomic, so other nctl processes never read partially written file
+        os.replace(temporary_file_path, tunnel_file_path)
+    except Exception:
+        logger.exception(f'Failed to store persistent tunnel {tunnel_key}.')
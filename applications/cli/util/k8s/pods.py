@@ -16,10 +16,10 @@
 
 from typing import Dict, List
 
-from kubernetes import client, config
+from kubernetes import client
 from kubernetes.client import V1PodList, V1Pod, V1DeleteOptions
 
-from util.k8s.k8s_info import PodStatus
+from util.k8s.k8s_info import PodStatus, K8sApiClients
 
 
 class K8SPod:
@@ -31,16 +31,12 @@ class K8SPod:
         self.labels = labels
 
     def delete(self):
-        config.load_kube_config()
-
-        v1 = client.CoreV1Api()
+        v1 = K8sApiClients.get(client.CoreV1Api)
         v1.delete_namespaced_pod(name=self.name, namespace=self._namespace, body=V1DeleteOptions())
 
 
 def list_pods(namespace: str, label_selector: str = '') -> List[K8SPod]:
-    config.load_kube_config()
-
-    v1 = client.CoreV1Api()
+    v1 = K8sApiClients.get(client.CoreV1Api)
     pods_list: V1PodList = v1.list_namespaced_pod(namespace=namespace, label_selector=label_selector)
 
     pods: List[V1Pod] = pods_list.items
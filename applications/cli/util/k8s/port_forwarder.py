@@ -0,0 +1,264 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import socket
+import ssl
+import threading
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+import certifi
+from kubernetes import client
+from websocket import WebSocket, ABNF, WebSocketException
+
+from util.app_names import NAUTAAppNames
+from util.exceptions import KubernetesError
+from util.k8s.k8s_info import K8sApiClients, get_app_services, get_k8s_api
+from util.logger import initialize_logger
+from cli_text_consts import UtilPortForwarderTexts as Texts
+
+logger = initialize_logger(__name__)
+
+# if this environment variable is set (e.g. to 1), tunnels to nauta services are created inside nctl process
+# instead of by kubectl port-forward
+NCTL_IN_PROCESS_PORT_FORWARDING_ENV_NAME = 'NCTL_IN_PROCESS_PORT_FORWARDING'
+
+PORT_FORWARD_PROTOCOL = 'v4.channel.k8s.io'
+# every forwarded port has two channels - for data and for errors
+DATA_CHANNEL = 0
+ERROR_CHANNEL = 1
+# size of chunks in which data are read from local connections
+CHUNK_SIZE = 64 * 1024
+LISTEN_BACKLOG = 16
+
+
+def in_process_port_forwarding_enabled() -> bool:
+    return os.environ.get(NCTL_IN_PROCESS_PORT_FORWARDING_ENV_NAME, '').lower() not in ('', '0', 'false', 'no')
+
+
+class PortForwarder:
+    """
+    In-process forwarder of local ports to ports of pods, built on portforward subresource of Kubernetes API
+    (websocket v4.channel.k8s.io protocol), so neither kubectl nor a shell process is needed. One forwarder may
+    serve any number of local ports. Each local port is listening as soon as it is added, so a tunnel is ready
+    immediately - connections made before the first connection to a pod is established wait in a listen backlog.
+    Every accepted local connection is relayed through its own websocket connection to the API server, because
+    channels of the protocol can't be reopened for another connection.
+    """
+
+    def __init__(self, api_client: client.ApiClient = None):
+        self.api_client = api_client or K8sApiClients.get_api_client()
+        self._listeners: List[socket.socket] = []
+        self._connections: Dict[int, Tuple[socket.socket, WebSocket]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def forward(self, namespace: str, pod_name: str, pod_port: int, local_port: int = 0) -> int:
+        """
+        Starts forwarding of a local port to a port of a pod.
+        :param namespace: namespace of a pod
+        :param pod_name: name of a pod
+        :param pod_port: port of a pod to which connections are forwarded
+        :param local_port: local port, if not given - a free port is chosen by the system
+        :return: forwarded local port
+        """
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.bind(('127.0.0.1', local_port))
+            listener.listen(LISTEN_BACKLOG)
+        except Exception:
+            listener.close()
+            raise
+
+        with self._lock:
+            self._listeners.append(listener)
+        local_port = listener.getsockname()[1]
+        threading.Thread(target=self._accept, args=(listener, namespace, pod_name, pod_port),
+                         name=f'port-forward-{local_port}', daemon=True).start()
+        logger.debug(f'Forwarding 127.0.0.1:{local_port} to {namespace}/{pod_name}:{pod_port}.')
+        return local_port
+
+    def close(self):
+        """
+        Stops listening on all forwarded ports and closes all relayed connections.
+        """
+        with self._lock:
+            self._closed = True
+            listeners, self._listeners = self._listeners, []
+            connections, self._connections = list(self._connections.values()), {}
+        for listener in listeners:
+            listener.close()
+        for local_connection, websocket in connections:
+            self._close_connection(local_connection, websocket)
+
+    def _accept(self, listener: socket.socket, namespace: str, pod_name: str, pod_port: int):
+        while not self._closed:
+            try:
+                local_connection, _ = listener.accept()
+            except OSError:
+                # listener was closed
+                return
+            threading.Thread(target=self._relay, args=(local_connection, namespace, pod_name, pod_port),
+                             daemon=True).start()
+
+    def _relay(self, local_connection: socket.socket, namespace: str, pod_name: str, pod_port: int):
+        try:
+            websocket = self._connect(namespace=namespace, pod_name=pod_name, pod_port=pod_port)
+        except Exception:
+            logger.exception(f'Failed to connect to {namespace}/{pod_name}:{pod_port}.')
+            local_connection.close()
+            return
+
+        with self._lock:
+            if self._closed:
+                self._close_connection(local_connection, websocket)
+                return
+            self._connections[id(local_connection)] = (local_connection, websocket)
+
+        threading.Thread(target=self._relay_to_pod, args=(local_connection, websocket), daemon=True).start()
+        try:
+            self._relay_from_pod(local_connection, websocket)
+        finally:
+            with self._lock:
+                self._connections.pop(id(local_connection), None)
+            self._close_connection(local_connection, websocket)
+
+    def _connect(self, namespace: str, pod_name: str, pod_port: int) -> WebSocket:
+        configuration = self.api_client.configuration
+        url = f'{configuration.host}/api/v1/namespaces/{namespace}/pods/{pod_name}/portforward?' \
+              f'{urlencode({"ports": pod_port})}'
+        url = 'wss://' + url[len('https://'):] if url.startswith('https://') else 'ws://' + url[len('http://'):]
+
+        headers = [f'sec-websocket-protocol: {PORT_FORWARD_PROTOCOL}']
+        authorization = configuration.api_key.get('authorization')
+        if authorization:
+            headers.append(f'authorization: {authorization}')
+
+        if url.startswith('wss://') and configuration.verify_ssl:
+            ssl_options = {'cert_reqs': ssl.CERT_REQUIRED, 'ca_certs': configuration.ssl_ca_cert or certifi.where()}
+            if configuration.assert_hostname is not None:
+                ssl_options['check_hostname'] = configuration.assert_hostname
+        else:
+            ssl_options = {'cert_reqs': ssl.CERT_NONE}
+        if configuration.cert_file:
+            ssl_options['certfile'] = configuration.cert_file
+        if configuration.key_file:
+            ssl_options['keyfile'] = configuration.key_file
+
+        websocket = WebSocket(sslopt=ssl_options, skip_utf8_validation=True)
+        websocket.connect(url, header=headers)
+        return websocket
+
+    @staticmethod
+    def _relay_to_pod(local_connection: socket.socket, websocket: WebSocket):
+        try:
+            for data in iter(lambda: local_connection.recv(CHUNK_SIZE), b''):
+                websocket.send_binary(bytes([DATA_CHANNEL]) + data)
+        except (OSError, WebSocketException):
+            pass
+        finally:
+            # closing a websocket makes _relay_from_pod finish
+            websocket.close()
+
+    @staticmethod
+    def _relay_from_pod(local_connection: socket.socket, websocket: WebSocket):
+        # first frame of each channel contains only a number of a forwarded port
+        port_received = set()
+        try:
+            while True:
+                opcode, frame = websocket.recv_data()
+                if opcode == ABNF.OPCODE_CLOSE or not frame:
+                    return
+                channel, data = frame[0], frame[1:]
+                if channel not in port_received:
+                    port_received.add(channel)
+                    data = data[2:]
+                if not data:
+                    continue
+                if channel == DATA_CHANNEL:
+                    local_connection.sendall(data)
+                elif channel == ERROR_CHANNEL:
+                    logger.error(f'Port forwarding error: {data.decode("utf-8", errors="replace")}')
+                    return
+        except (OSError, WebSocketException):
+            pass
+
+    @staticmethod
+    def _close_connection(local_connection: socket.socket, websocket: WebSocket):
+        for close in (local_connection.close, websocket.close):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+def get_service_pod(service: client.V1Service) -> Tuple[str, int]:
+    """
+    Returns a name of a running pod backing a given service and a port of this pod to which the first port of
+    the service is forwarded - the same pod that kubectl port-forward service/<name> would choose.
+    """
+    selector = ','.join(f'{key}={value}' for key, value in sorted((service.spec.selector or {}).items()))
+    pods = get_k8s_api().list_namespaced_pod(namespace=service.metadata.namespace, label_selector=selector).items
+    running_pods = [pod for pod in pods if pod.status.phase == 'Running' and not pod.metadata.deletion_timestamp]
+    if not selector or not running_pods:
+        raise KubernetesError(Texts.NO_RUNNING_POD_ERROR_MSG.format(service_name=service.metadata.name))
+
+    pod = running_pods[0]
+    service_port = service.spec.ports[0]
+    target_port = service_port.target_port or service_port.port
+    if isinstance(target_port, str) and not target_port.isdigit():
+        # named port is resolved using ports of pod's containers
+        container_ports = {container_port.name: container_port.container_port
+                           for container in pod.spec.containers for container_port in container.ports or []}
+        if target_port not in container_ports:
+            raise KubernetesError(Texts.MISSING_POD_PORT_ERROR_MSG.format(port_name=target_port,
+                                                                          pod_name=pod.metadata.name))
+        target_port = container_ports[target_port]
+
+    return pod.metadata.name, int(target_port)
+
+
+def start_in_process_port_forwarding(k8s_app_name: NAUTAAppNames, port: int = None, app_name: str = None,
+                                     namespace: str = None) -> Tuple[PortForwarder, int, int]:
+    """
+    Counterpart of kubectl.start_port_forwarding, which forwards a local port to a pod of a given nauta application
+    inside nctl process. When the tunnel is no longer needed, it should be closed by calling close() method of
+    a returned forwarder.
+    :param k8s_app_name: name of kubernetes application for tunnel creation
+    :param port: if given - the system will try to use it as a local port. Random port will be used
+     if that port is not available
+    :return: forwarder, tunneled port and container port
+    """
+    app_services = get_app_services(nauta_app_name=k8s_app_name, namespace=namespace, app_name=app_name)
+    if not app_services or not app_services[0].spec.ports[0].port:
+        logger.error(f'Cannot find open ports for {k8s_app_name} app')
+        raise KubernetesError(Texts.MISSING_PORT_ERROR_MSG)
+
+    service = app_services[0]
+    pod_name, pod_port = get_service_pod(service)
+
+    forwarder = PortForwarder()
+    try:
+        tunnel_port = forwarder.forward(namespace=service.metadata.namespace, pod_name=pod_name, pod_port=pod_port,
+                                        local_port=port or 0)
+    except OSError:
+        if not port:
+            raise
+        logger.debug(f'Port {port} is occupied, forwarding a random port instead.')
+        tunnel_port = forwarder.forward(namespace=service.metadata.namespace, pod_name=pod_name, pod_port=pod_port)
+
+    return forwarder, tunnel_port, service.spec.ports[0].port
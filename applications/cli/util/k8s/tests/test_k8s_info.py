@@ -27,7 +27,8 @@ from util.k8s.k8s_info import get_kubectl_host, get_app_services, \
                               find_namespace, delete_namespace, get_config_map_data, get_users_token, \
                               get_cluster_roles, is_current_user_administrator, check_pods_status, \
                               PodStatus, get_app_service_node_port, get_pods, NamespaceStatus, get_pod_events, \
-                              get_namespaced_pods, add_bytes_to_unit
+                              get_namespaced_pods, add_bytes_to_unit, K8sApiClients, \
+                              get_kubectl_current_context_namespace, get_current_user
 from util.config import NAUTAConfigMap
 from util.app_names import NAUTAAppNames
 from util.exceptions import KubernetesError
@@ -330,3 +331,29 @@ def test_add_bytes_to_unit():
     for test in negatives:
         assert add_bytes_to_unit(test) == test
     assert add_bytes_to_unit("5Ti") == "5TiB"
+
+
+def test_k8s_api_clients_share_api_client(mocker):
+    kube_config_mock = mocker.patch('kubernetes.config.load_kube_config')
+    api_client_mock = mocker.patch('kubernetes.client.ApiClient')
+    core_api_mock = mocker.patch('kubernetes.client.CoreV1Api')
+    rbac_api_mock = mocker.patch('kubernetes.client.RbacAuthorizationV1Api')
+
+    first_core_api = K8sApiClients.get(core_api_mock)
+    second_core_api = K8sApiClients.get(core_api_mock)
+    K8sApiClients.get(rbac_api_mock)
+
+    assert first_core_api is second_core_api
+    assert kube_config_mock.call_count == 1
+    assert api_client_mock.call_count == 1
+    core_api_mock.assert_called_once_with(api_client_mock.return_value)
+    rbac_api_mock.assert_called_once_with(api_client_mock.return_value)
+
+
+def test_k8s_api_clients_current_context_parsed_once(mocker):
+    contexts_mock = mocker.patch('kubernetes.config.list_kube_config_contexts',
+                                 return_value=([], {'context': {'namespace': 'user-namespace', 'user': 'user'}}))
+
+    assert get_kubectl_current_context_namespace() == 'user-namespace'
+    assert get_current_user() == 'user'
+    assert contexts_mock.call_count == 1
@@ -18,13 +18,14 @@
 import subprocess
 
 import pytest
-import requests
-from requests.exceptions import ConnectionError
 
-from util.k8s.k8s_proxy_context_manager import K8sProxy, TunnelSetupError
+from util.k8s.k8s_proxy_context_manager import K8sProxy, TunnelSetupError, READINESS_PROBE_INITIAL_DELAY, \
+    READINESS_PROBE_MAX_DELAY
 from util.app_names import NAUTAAppNames
 from util.exceptions import K8sProxyCloseError, K8sProxyOpenError
 from util.k8s.k8s_proxy_context_manager import kubectl
+from util.k8s.persistent_tunnels import PersistentTunnel
+from util.k8s.port_forwarder import PortForwarder
 
 
 def test_set_up_proxy(mocker):
@@ -100,44 +101,131 @@ def test_set_up_proxy_open_readiness_failure(mocker):
 
 
 def test_wait_for_connection_readiness(mocker):
-    mocker.patch('requests.get')
+    create_connection_mock = mocker.patch('socket.create_connection')
     fake_address = 'localhost'
     fake_port = 1234
 
     # noinspection PyProtectedMember
     K8sProxy._wait_for_connection_readiness(fake_address, fake_port)
 
-    # noinspection PyUnresolvedReferences
-    requests.get.assert_called_once_with(f'http://{fake_address}:{fake_port}')
+    assert create_connection_mock.call_count == 1
+    assert create_connection_mock.call_args[0][0] == (fake_address, fake_port)
 
 
 def test_wait_for_connection_readiness_many_tries(mocker):
-    effect = [ConnectionError for _ in range(10)]
+    effect = [ConnectionRefusedError for _ in range(10)]
     # noinspection PyTypeChecker
-    effect.append(None)
+    effect.append(mocker.MagicMock())
     fake_address = 'localhost'
     fake_port = 1234
 
-    mocker.patch('requests.get', side_effect=effect)
-    mocker.patch('time.sleep')
+    create_connection_mock = mocker.patch('socket.create_connection', side_effect=effect)
+    sleep_mock = mocker.patch('time.sleep')
 
     # noinspection PyProtectedMember
     K8sProxy._wait_for_connection_readiness(fake_address, fake_port, 15)
 
-    # noinspection PyUnresolvedReferences
-    assert requests.get.call_count == 11
+    assert create_connection_mock.call_count == 11
+    delays = [call[0][0] for call in sleep_mock.call_args_list]
+    assert delays[0] == READINESS_PROBE_INITIAL_DELAY
+    assert delays == sorted(delays) and max(delays) <= READINESS_PROBE_MAX_DELAY
 
 
 def test_wait_for_connection_readiness_many_tries_failure(mocker):
     fake_address = 'localhost'
     fake_port = 1234
 
-    mocker.patch('requests.get', side_effect=ConnectionError)
-    mocker.patch('time.sleep')
+    mocker.patch('socket.create_connection', side_effect=ConnectionRefusedError)
+    sleep_mock = mocker.patch('time.sleep')
 
     with pytest.raises(TunnelSetupError):
         # noinspection PyProtectedMember
         K8sProxy._wait_for_connection_readiness(fake_address, fake_port, 15)
 
-    # noinspection PyUnresolvedReferences
-    assert requests.get.call_count == 15
+    assert 15 <= sum(call[0][0] for call in sleep_mock.call_args_list) < 15 + READINESS_PROBE_MAX_DELAY
+
+
+def test_wait_for_forwarding_message(mocker):
+    process_mock = mocker.MagicMock(stdout=iter(['Forwarding from 127.0.0.1:1234 -> 9200\n',
+                                                 'Handling connection for 1234\n']))
+
+    # noinspection PyProtectedMember
+    K8sProxy._wait_for_forwarding_message(process_mock, 1234)
+
+
+def test_wait_for_forwarding_message_process_ended(mocker):
+    process_mock = mocker.MagicMock(stdout=iter(['error: unable to listen on any of the requested ports\n']))
+
+    with pytest.raises(TunnelSetupError):
+        # noinspection PyProtectedMember
+        K8sProxy._wait_for_forwarding_message(process_mock, 1234)
+
+
+def test_set_up_proxy_attach_to_persistent_tunnel(mocker, monkeypatch):
+    monkeypatch.setenv('NCTL_PERSISTENT_TUNNELS', '1')
+    mocker.patch("util.k8s.k8s_proxy_context_manager.get_tunnel_key", return_value='elasticsearch-0123456789')
+    mocker.patch("util.k8s.k8s_proxy_context_manager.close_idle_persistent_tunnels")
+    mocker.patch("util.k8s.k8s_proxy_context_manager.get_persistent_tunnel",
+                 return_value=PersistentTunnel(pid=123, create_time=1000.0, tunnel_port=1000, container_port=1001,
+                                               last_used=1000.0))
+    release_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.release_persistent_tunnel")
+    spf_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.kubectl.start_port_forwarding")
+    close_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._close_tunnel")
+
+    with K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True) as proxy:
+        assert proxy.tunnel_port == 1000
+
+    assert spf_mock.call_count == 0
+    assert close_mock.call_count == 0
+    release_mock.assert_called_once_with('elasticsearch-0123456789')
+
+
+def test_set_up_proxy_persistent_tunnel_registered(mocker, monkeypatch):
+    monkeypatch.setenv('NCTL_PERSISTENT_TUNNELS', '1')
+    mocker.patch("util.k8s.k8s_proxy_context_manager.get_tunnel_key", return_value='elasticsearch-0123456789')
+    mocker.patch("util.k8s.k8s_proxy_context_manager.close_idle_persistent_tunnels")
+    mocker.patch("util.k8s.k8s_proxy_context_manager.get_persistent_tunnel", return_value=None)
+    register_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.register_persistent_tunnel", return_value=True)
+    mocker.patch("util.k8s.k8s_proxy_context_manager.release_persistent_tunnel")
+    spf_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.kubectl.start_port_forwarding",
+                            return_value=(mocker.MagicMock(pid=123), 1000, 1001))
+    mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._wait_for_connection_readiness")
+    close_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._close_tunnel")
+
+    with K8sProxy(NAUTAAppNames.ELASTICSEARCH, persistent=True):
+        pass
+
+    assert spf_mock.call_args[1]['detached'] is True
+    register_mock.assert_called_once_with('elasticsearch-0123456789', pid=123, tunnel_port=1000, container_port=1001)
+    assert close_mock.call_count == 0
+
+
+def test_set_up_proxy_in_process(mocker, monkeypatch):
+    monkeypatch.setenv('NCTL_IN_PROCESS_PORT_FORWARDING', '1')
+    forwarder_mock = mocker.MagicMock(spec=PortForwarder)
+    mocker.patch("util.k8s.k8s_proxy_context_manager.start_in_process_port_forwarding",
+                 return_value=(forwarder_mock, 1000, 1001))
+    spf_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.kubectl.start_port_forwarding")
+    readiness_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._wait_for_connection_readiness")
+
+    with K8sProxy(NAUTAAppNames.ELASTICSEARCH) as proxy:
+        assert proxy.tunnel_port == 1000
+
+    assert spf_mock.call_count == 0
+    assert readiness_mock.call_count == 0
+    assert forwarder_mock.close.call_count == 1
+
+
+def test_set_up_proxy_wait_for_forwarding_message(mocker):
+    spf_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.kubectl.start_port_forwarding",
+                            return_value=(mocker.MagicMock(), 1000, 1001))
+    readiness_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._wait_for_connection_readiness")
+    message_mock = mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._wait_for_forwarding_message")
+    mocker.patch("util.k8s.k8s_proxy_context_manager.K8sProxy._close_tunnel")
+
+    with K8sProxy(NAUTAAppNames.ELASTICSEARCH, wait_for_forwarding_message=True):
+        pass
+
+    assert spf_mock.call_args[1]['pipe_output'] is True
+    assert message_mock.call_count == 1
+    assert readiness_mock.call_count == 0
@@ -14,42 +14,97 @@
 # limitations under the License.
 #
 
-from kubernetes.client.models import V1ObjectMeta, V1Pod, V1PodStatus
-from util.k8s.k8s_info import PodStatus
+import json
 
+from kubernetes.client.rest import ApiException
+import pytest
 
-from util.k8s.k8s_statistics import get_highest_usage
+from util.k8s.k8s_statistics import get_highest_usage, METRICS_API_GROUP, METRICS_API_VERSION, \
+    HEAPSTER_NAMESPACE, HEAPSTER_SERVICE_PROXY_NAME, HEAPSTER_PODS_METRICS_PATH
 
 CPU_USER_NAME = "cpu_user_name"
 MEM_USER_NAME = "mem_user_name"
 
-PODS = [V1Pod(metadata=V1ObjectMeta(name="cpu_first_pod", namespace=CPU_USER_NAME),
-              status=V1PodStatus(phase=PodStatus.RUNNING.value)),
-        V1Pod(metadata=V1ObjectMeta(name="mem_first_pod", namespace=MEM_USER_NAME),
-              status=V1PodStatus(phase=PodStatus.RUNNING.value)),
-        V1Pod(metadata=V1ObjectMeta(name="cpu_second_pod", namespace=CPU_USER_NAME),
-              status=V1PodStatus(phase=PodStatus.RUNNING.value)),
-        V1Pod(metadata=V1ObjectMeta(name="mem_second_pod", namespace=MEM_USER_NAME),
-              status=V1PodStatus(phase=PodStatus.RUNNING.value)),
-        V1Pod(metadata=V1ObjectMeta(name="tech_pod", namespace="kube-system"),
-              status=V1PodStatus(phase=PodStatus.RUNNING.value))]
 
-TOP_RESULTS = [("3m", "200Ki"), ("2m", "400Ki"), ("3m", "200Ki"), ("2m", "400Ki")]
+def pod_metrics(name: str, namespace: str, containers_usage: list) -> dict:
+    return {"metadata": {"name": name, "namespace": namespace},
+            "containers": [{"name": f"container-{index}", "usage": {"cpu": cpu, "memory": memory}}
+                           for index, (cpu, memory) in enumerate(containers_usage)]}
+
+
+PODS_METRICS = {"kind": "PodMetricsList", "apiVersion": f"{METRICS_API_GROUP}/{METRICS_API_VERSION}",
+                "items": [pod_metrics("cpu_first_pod", CPU_USER_NAME, [("3m", "200Ki")]),
+                          pod_metrics("mem_first_pod", MEM_USER_NAME, [("2m", "400Ki")]),
+                          pod_metrics("cpu_second_pod", CPU_USER_NAME, [("2000001n", "100Ki"), ("1m", "100Ki")]),
+                          pod_metrics("mem_second_pod", MEM_USER_NAME, [("2m", "400Ki")]),
+                          pod_metrics("tech_pod", "kube-system", [("100m", "100Mi")])]}
 
 
 def test_get_highest_usage_success(mocker):
-    get_pods_mock = mocker.patch("util.k8s.k8s_statistics.get_pods")
-    get_pods_mock.return_value = PODS
-    top_mock = mocker.patch("util.k8s.k8s_statistics.get_top_for_pod")
-    top_mock.side_effect = TOP_RESULTS
+    custom_objects_api_mock = mocker.patch("util.k8s.k8s_statistics.K8sApiClients.get").return_value
+    custom_objects_api_mock.list_cluster_custom_object.return_value = PODS_METRICS
 
     top_cpu_users, top_mem_users = get_highest_usage()
 
+    custom_objects_api_mock.list_cluster_custom_object.assert_called_once_with(group=METRICS_API_GROUP,
+                                                                               version=METRICS_API_VERSION,
+                                                                               plural="pods")
     assert len(top_cpu_users) == 2
     assert len(top_mem_users) == 2
     assert top_cpu_users[0].user_name == CPU_USER_NAME
     assert top_mem_users[0].user_name == MEM_USER_NAME
-    assert top_cpu_users[0].cpu_usage == 6
+    assert top_cpu_users[0].cpu_usage == 7
     assert top_cpu_users[0].mem_usage == 409600
     assert top_mem_users[0].cpu_usage == 4
     assert top_mem_users[0].mem_usage == 819200
+
+
+def test_get_highest_usage_no_metrics(mocker):
+    custom_objects_api_mock = mocker.patch("util.k8s.k8s_statistics.K8sApiClients.get").return_value
+    custom_objects_api_mock.list_cluster_custom_object.return_value = {"kind": "PodMetricsList", "items": []}
+
+    assert get_highest_usage() == ([], [])
+
+
+def test_get_highest_usage_missing_usage(mocker):
+    custom_objects_api_mock = mocker.patch("util.k8s.k8s_statistics.K8sApiClients.get").return_value
+    custom_objects_api_mock.list_cluster_custom_object.return_value = {
+        "kind": "PodMetricsList",
+        "items": [pod_metrics("cpu_first_pod", CPU_USER_NAME, [("3m", "200Ki")]),
+                  {"metadata": {"name": "cpu_second_pod", "namespace": CPU_USER_NAME},
+                   "containers": [{"name": "container-0", "usage": {}}, {"name": "container-1"}]}]}
+
+    top_cpu_users, top_mem_users = get_highest_usage()
+
+    assert top_cpu_users[0].cpu_usage == 3
+    assert top_cpu_users[0].mem_usage == 204800
+
+
+def test_get_highest_usage_metrics_api_not_available(mocker):
+    k8s_api_mock = mocker.patch("util.k8s.k8s_statistics.K8sApiClients.get").return_value
+    k8s_api_mock.list_cluster_custom_object.side_effect = ApiException(status=404)
+    heapster_response = {"metadata": {},
+                         "items": [pod_metrics("cpu_first_pod", CPU_USER_NAME, [("3m", "200Ki")]),
+                                   pod_metrics("mem_first_pod", MEM_USER_NAME, [("2m", "400Ki")]),
+                                   pod_metrics("tech_pod", "kube-system", [("100m", "100Mi")])]}
+    proxy_mock = k8s_api_mock.connect_get_namespaced_service_proxy_with_path
+    proxy_mock.return_value.data = json.dumps(heapster_response).encode("utf-8")
+
+    top_cpu_users, top_mem_users = get_highest_usage()
+
+    proxy_mock.assert_called_once_with(name=HEAPSTER_SERVICE_PROXY_NAME, namespace=HEAPSTER_NAMESPACE,
+                                       path=HEAPSTER_PODS_METRICS_PATH, _preload_content=False)
+    assert len(top_cpu_users) == 2
+    assert top_cpu_users[0].user_name == CPU_USER_NAME
+    assert top_mem_users[0].user_name == MEM_USER_NAME
+    assert top_mem_users[0].mem_usage == 409600
+
+
+def test_get_highest_usage_metrics_api_error(mocker):
+    custom_objects_api_mock = mocker.patch("util.k8s.k8s_statistics.K8sApiClients.get").return_value
+    custom_objects_api_mock.list_cluster_custom_object.side_effect = ApiException(status=500)
+
+    with pytest.raises(ApiException):
+        get_highest_usage()
+
+    custom_objects_api_mock.connect_get_namespaced_service_proxy_with_path.assert_not_called()
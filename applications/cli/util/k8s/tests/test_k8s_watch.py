@@ -0,0 +1,104 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from kubernetes.client import V1Pod, V1PodList, V1ObjectMeta, V1ListMeta, V1PodStatus
+
+from util.k8s.k8s_info import PodStatus
+from util.k8s.k8s_watch import wait_for_condition, wait_for_pods_status
+
+
+def fake_object(name: str, resource_version: str, ready: bool) -> dict:
+    return {'name': name, 'resourceVersion': resource_version, 'ready': ready}
+
+
+def fake_pod(name: str, resource_version: str, phase: str) -> V1Pod:
+    return V1Pod(metadata=V1ObjectMeta(name=name, resource_version=resource_version),
+                 status=V1PodStatus(phase=phase))
+
+
+def wait_for_fake_objects(list_results, watch_results, timeout=10):
+    list_results, watch_results = iter(list_results), iter(watch_results)
+    watch_calls = []
+
+    def watch_objects(resource_version, timeout_seconds):
+        watch_calls.append(resource_version)
+        return iter(next(watch_results))
+
+    result = wait_for_condition(condition=lambda objects: bool(objects) and all(o['ready'] for o in objects),
+                                list_objects=lambda: next(list_results), watch_objects=watch_objects,
+                                get_name=lambda o: o['name'], get_resource_version=lambda o: o['resourceVersion'],
+                                timeout=timeout)
+    return result, watch_calls
+
+
+def test_wait_for_condition_fulfilled_by_list():
+    result, watch_calls = wait_for_fake_objects(list_results=[([fake_object('a', '1', True)], '5')],
+                                                watch_results=[])
+
+    assert result
+    assert watch_calls == []
+
+
+def test_wait_for_condition_fulfilled_by_watch():
+    result, watch_calls = wait_for_fake_objects(
+        list_results=[([fake_object('a', '1', True), fake_object('b', '2', False)], '5')],
+        watch_results=[[{'type': 'MODIFIED', 'object': fake_object('a', '6', False)}],
+                       [{'type': 'DELETED', 'object': fake_object('b', '7', False)},
+                        {'type': 'MODIFIED', 'object': fake_object('a', '8', True)}]])
+
+    assert result
+    # watch closed by API server is resumed from the last observed resourceVersion
+    assert watch_calls == ['5', '6']
+
+
+def test_wait_for_condition_watch_expired():
+    result, watch_calls = wait_for_fake_objects(
+        list_results=[([fake_object('a', '1', False)], '5'), ([fake_object('a', '9', True)], '9')],
+        watch_results=[[{'type': 'ERROR', 'object': {'code': 410}}]])
+
+    assert result
+    assert watch_calls == ['5']
+
+
+def test_wait_for_condition_timeout(mocker):
+    mocker.patch('util.k8s.k8s_watch.time.monotonic', side_effect=[100, 100, 111])
+
+    result, watch_calls = wait_for_fake_objects(list_results=[([fake_object('a', '1', False)], '5')],
+                                                watch_results=[[]], timeout=10)
+
+    assert not result
+    assert watch_calls == ['5']
+
+
+def test_wait_for_condition_no_timeout():
+    result, watch_calls = wait_for_fake_objects(list_results=[([fake_object('a', '1', False)], '5')],
+                                                watch_results=[], timeout=0)
+
+    assert not result
+    assert watch_calls == []
+
+
+def test_wait_for_pods_status(mocker):
+    list_pods_mock = mocker.patch('util.k8s.k8s_watch.get_k8s_api').return_value.list_namespaced_pod
+    list_pods_mock.return_value = V1PodList(metadata=V1ListMeta(resource_version='5'),
+                                            items=[fake_pod('jupyter-0', '4', 'Pending')])
+    stream_mock = mocker.patch('util.k8s.k8s_watch.watch.Watch').return_value.stream
+    stream_mock.return_value = iter([{'type': 'MODIFIED', 'object': fake_pod('jupyter-0', '6', 'Running')}])
+
+    assert wait_for_pods_status(run_name='jupyter', namespace='namespace', status=PodStatus.RUNNING, timeout=60)
+    list_pods_mock.assert_called_once_with(namespace='namespace', label_selector='runName=jupyter')
+    assert stream_mock.call_args[1]['resource_version'] == '5'
+    assert stream_mock.call_args[1]['label_selector'] == 'runName=jupyter'
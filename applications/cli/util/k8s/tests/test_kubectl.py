@@ -14,6 +14,8 @@
 # limitations under the License.
 #
 
+import time
+
 from pytest import raises, fixture
 from kubernetes.client import V1ObjectMeta, V1ServiceList, V1Service, V1ServiceSpec, V1ServicePort
 import util.k8s.kubectl as kubectl
@@ -40,13 +42,25 @@ def mock_k8s_svc(mocker):
 # noinspection PyUnusedLocal,PyShadowingNames
 def test_start_port_forwarding_success(mock_k8s_svc, mocker):
     subprocess_command_mock = mocker.patch('util.system.execute_subprocess_command')
-    check_port_avail = mocker.patch("util.k8s.kubectl.check_port_availability", return_value=True)
+    lease_port_mock = mocker.patch("util.k8s.kubectl.lease_port", return_value=True)
 
-    process, _, _ = kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH, number_of_retries=2)
+    process, tunnel_port, _ = kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH, number_of_retries=2)
 
     assert process, "proxy process doesn't exist."
     assert subprocess_command_mock.call_count == 1, "kubectl proxy-forwarding command wasn't called"
-    assert check_port_avail.call_count == 1, "port availability wasn't checked"
+    lease_port_mock.assert_called_once_with(tunnel_port)
+
+
+def test_start_port_forwarding_detached_max_lifetime(mock_k8s_svc, mocker):
+    mocker.patch('util.k8s.kubectl.system.get_current_os', return_value=kubectl.system.OS.LINUX)
+    subprocess_command_mock = mocker.patch('util.system.execute_subprocess_command')
+    mocker.patch("util.k8s.kubectl.lease_port", return_value=True)
+
+    kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH, detached=True, max_lifetime=3600)
+
+    command = subprocess_command_mock.call_args[0][0]
+    assert command[:5] == ['(sleep', '3600;', 'kill', '0)', '&']
+    assert subprocess_command_mock.call_args[1]['start_new_session'] is True
 
 
 def test_start_port_forwarding_missing_port(mocker):
@@ -63,35 +77,35 @@ def test_start_port_forwarding_missing_port(mocker):
 def test_start_port_forwarding_other_error(mock_k8s_svc, mocker):
     popen_mock = mocker.patch('util.system.execute_subprocess_command',
                               side_effect=Exception("Other error during creation of registry port proxy."))
-    check_port_avail = mocker.patch("util.k8s.kubectl.check_port_availability", return_value=True)
+    lease_port_mock = mocker.patch("util.k8s.kubectl.lease_port", return_value=True)
     print("test start port forwarding")
     with raises(RuntimeError, message=Texts.PROXY_CREATION_OTHER_ERROR_MSG):
         kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH)
 
     assert popen_mock.call_count == 1, "kubectl proxy-forwarding command was called"
-    assert check_port_avail.call_count == 1, "port availability wasn't checked"
+    assert lease_port_mock.call_count == 1, "port wasn't leased"
 
 
 def test_start_port_forwarding_lack_of_ports(mock_k8s_svc, mocker):
     subprocess_command_mock = mocker.patch('util.system.execute_subprocess_command')
-    check_port_avail = mocker.patch("util.k8s.kubectl.check_port_availability", return_value=False)
+    lease_port_mock = mocker.patch("util.k8s.kubectl.lease_port", return_value=False)
 
     with raises(LocalPortOccupiedError, message=Texts.NO_AVAILABLE_PORT_ERROR_MSG):
         kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH)
 
     assert subprocess_command_mock.call_count == 0, "kubectl proxy-forwarding command was called"
-    assert check_port_avail.call_count == 1000, "port availability wasn't checked"
+    assert lease_port_mock.call_count == kubectl.MAX_NUMBER_OF_TRIES, "port wasn't leased"
 
 
 def test_start_port_forwarding_first_two_occupied(mock_k8s_svc, mocker):
     subprocess_command_mock = mocker.patch('util.system.execute_subprocess_command')
-    check_port_avail = mocker.patch("util.k8s.kubectl.check_port_availability")
-    check_port_avail.side_effect = [False, False, True]
+    lease_port_mock = mocker.patch("util.k8s.kubectl.lease_port")
+    lease_port_mock.side_effect = [False, False, True]
 
     process, tunnel_port, container_port = kubectl.start_port_forwarding(NAUTAAppNames.ELASTICSEARCH)
 
     assert subprocess_command_mock.call_count == 1, "kubectl proxy-forwarding command wasn't called"
-    assert check_port_avail.call_count == 3, "port availability wasn't checked"
+    assert lease_port_mock.call_count == 3, "port wasn't leased"
 
 
 def test_start_port_forwarding_success_with_different_port(mock_k8s_svc, mocker):
@@ -106,6 +120,17 @@ def test_start_port_forwarding_success_with_different_port(mock_k8s_svc, mocker)
     assert tunnel_port == 9999, "port wasn't set properly"
 
 
+def test_lease_port(mocker, tmpdir):
+    mocker.patch('util.k8s.kubectl.Config').return_value.config_path = str(tmpdir)
+
+    assert kubectl.lease_port(5000)
+    assert not kubectl.lease_port(5000)
+    assert kubectl.lease_port(5001)
+
+    mocker.patch('util.k8s.kubectl.time.time', return_value=time.time() + kubectl.PORT_LEASE_SECONDS + 1)
+    assert kubectl.lease_port(5000)
+
+
 def test_check_connection_to_cluster_with_success(mocker):
     error_code = 0
     subprocess_command_mock = mocker.patch('util.system.execute_system_command', return_value=('output', error_code,
@@ -0,0 +1,126 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import time
+
+import pytest
+
+from util.k8s import persistent_tunnels
+from util.app_names import NAUTAAppNames
+from util.k8s.persistent_tunnels import get_persistent_tunnel, register_persistent_tunnel, get_tunnel_key, \
+    close_idle_persistent_tunnels, persistent_tunnels_enabled, TUNNEL_IDLE_TIMEOUT_SECONDS, TUNNEL_MAX_LIFETIME_SECONDS
+
+TUNNEL_KEY = 'elasticsearch-0123456789'
+
+
+@pytest.fixture()
+def tunnel_process(mocker, tmpdir):
+    mocker.patch('util.k8s.persistent_tunnels.Config').return_value.config_path = str(tmpdir)
+    process_mock = mocker.patch('util.k8s.persistent_tunnels.psutil.Process').return_value
+    process_mock.create_time.return_value = time.time()
+    process_mock.children.return_value = []
+    process_mock.connections.return_value = []
+    mocker.patch('util.k8s.persistent_tunnels.psutil.wait_procs', return_value=([], []))
+    mock_k8s_api_clients(mocker, host='https://cluster-a:6443', user='user-a')
+    return process_mock
+
+
+def mock_k8s_api_clients(mocker, host: str, user: str):
+    k8s_api_clients_mock = mocker.patch('util.k8s.persistent_tunnels.K8sApiClients')
+    k8s_api_clients_mock.get_api_client.return_value.configuration.host = host
+    # kubeconfigs created by nctl user create share a name of a context
+    k8s_api_clients_mock.get_current_context.return_value = {'name': 'user-context',
+                                                             'context': {'cluster': 'nauta', 'user': user}}
+
+
+def test_persistent_tunnels_enabled(monkeypatch):
+    monkeypatch.delenv(persistent_tunnels.NCTL_PERSISTENT_TUNNELS_ENV_NAME, raising=False)
+    assert not persistent_tunnels_enabled()
+    monkeypatch.setenv(persistent_tunnels.NCTL_PERSISTENT_TUNNELS_ENV_NAME, '1')
+    assert persistent_tunnels_enabled()
+
+
+def test_register_and_get_persistent_tunnel(mocker, tunnel_process):
+    mocker.patch('util.k8s.persistent_tunnels.socket.create_connection')
+
+    assert register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+    assert not register_persistent_tunnel(TUNNEL_KEY, pid=456, tunnel_port=8001, container_port=9200)
+    tunnel = get_persistent_tunnel(TUNNEL_KEY)
+
+    assert (tunnel.pid, tunnel.tunnel_port, tunnel.container_port) == (123, 8000, 9200)
+    assert tunnel_process.terminate.call_count == 0
+
+
+def test_get_persistent_tunnel_unhealthy(mocker, tunnel_process):
+    mocker.patch('util.k8s.persistent_tunnels.socket.create_connection', side_effect=ConnectionRefusedError)
+    register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+
+    assert get_persistent_tunnel(TUNNEL_KEY) is None
+    assert tunnel_process.terminate.call_count == 1
+    assert not os.listdir(persistent_tunnels._get_tunnels_dir_path())
+
+
+def test_get_tunnel_key_separated_per_cluster_and_user(mocker):
+    mock_k8s_api_clients(mocker, host='https://cluster-a:6443', user='user-a')
+    tunnel_key = get_tunnel_key(NAUTAAppNames.ELASTICSEARCH)
+    mock_k8s_api_clients(mocker, host='https://cluster-b:6443', user='user-a')
+    other_cluster_tunnel_key = get_tunnel_key(NAUTAAppNames.ELASTICSEARCH)
+    mock_k8s_api_clients(mocker, host='https://cluster-a:6443', user='user-b')
+    other_user_tunnel_key = get_tunnel_key(NAUTAAppNames.ELASTICSEARCH)
+
+    assert len({tunnel_key, other_cluster_tunnel_key, other_user_tunnel_key}) == 3
+
+
+def test_get_persistent_tunnel_other_cluster(mocker, tunnel_process):
+    mocker.patch('util.k8s.persistent_tunnels.socket.create_connection')
+    register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+    mock_k8s_api_clients(mocker, host='https://cluster-b:6443', user='user-a')
+
+    assert get_persistent_tunnel(TUNNEL_KEY) is None
+    assert tunnel_process.terminate.call_count == 1
+
+
+def test_get_persistent_tunnel_expiring(mocker, tunnel_process):
+    mocker.patch('util.k8s.persistent_tunnels.socket.create_connection')
+    register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+    mocker.patch('util.k8s.persistent_tunnels.time.time', return_value=time.time() + TUNNEL_MAX_LIFETIME_SECONDS)
+
+    assert get_persistent_tunnel(TUNNEL_KEY) is None
+    assert tunnel_process.terminate.call_count == 1
+
+
+def test_get_persistent_tunnel_reused_pid(mocker, tunnel_process):
+    create_connection_mock = mocker.patch('util.k8s.persistent_tunnels.socket.create_connection')
+    register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+    tunnel_process.create_time.return_value = 2000.0
+
+    assert get_persistent_tunnel(TUNNEL_KEY) is None
+    assert create_connection_mock.call_count == 0
+    assert tunnel_process.terminate.call_count == 0
+
+
+def test_close_idle_persistent_tunnels(mocker, tunnel_process):
+    mocker.patch('util.k8s.persistent_tunnels.socket.create_connection')
+    register_persistent_tunnel(TUNNEL_KEY, pid=123, tunnel_port=8000, container_port=9200)
+
+    close_idle_persistent_tunnels()
+    assert tunnel_process.terminate.call_count == 0
+
+    mocker.patch('util.k8s.persistent_tunnels.time.time', return_value=time.time() + TUNNEL_IDLE_TIMEOUT_SECONDS + 1)
+    close_idle_persistent_tunnels()
+    assert tunnel_process.terminate.call_count == 1
+    assert get_persistent_tunnel(TUNNEL_KEY) is None
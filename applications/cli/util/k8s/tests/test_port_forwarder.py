@@ -0,0 +1,103 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import queue
+import socket
+
+from kubernetes.client import V1Service, V1ObjectMeta, V1ServiceSpec, V1ServicePort, V1Pod, V1PodStatus, V1PodSpec, \
+    V1Container, V1ContainerPort
+import pytest
+from websocket import ABNF
+
+from util.exceptions import KubernetesError
+from util.k8s.port_forwarder import PortForwarder, get_service_pod
+
+POD_PORT_FRAME = (9200).to_bytes(2, byteorder='little')
+
+
+class FakeWebSocket:
+    def __init__(self, frames):
+        self.frames = queue.Queue()
+        for frame in frames:
+            self.frames.put(frame)
+        self.sent = queue.Queue()
+
+    def recv_data(self):
+        return self.frames.get(timeout=5)
+
+    def send_binary(self, payload):
+        self.sent.put(payload)
+
+    def close(self):
+        self.frames.put((ABNF.OPCODE_CLOSE, b''))
+
+
+def fake_service(target_port) -> V1Service:
+    return V1Service(metadata=V1ObjectMeta(name='elasticsearch', namespace='nauta'),
+                     spec=V1ServiceSpec(selector={'app': 'elasticsearch'},
+                                        ports=[V1ServicePort(port=9200, target_port=target_port)]))
+
+
+def fake_pod(name: str, phase: str) -> V1Pod:
+    return V1Pod(metadata=V1ObjectMeta(name=name), status=V1PodStatus(phase=phase),
+                 spec=V1PodSpec(containers=[V1Container(name='es', ports=[V1ContainerPort(name='http',
+                                                                                          container_port=9201)])]))
+
+
+def test_forward(mocker):
+    websocket = FakeWebSocket([(ABNF.OPCODE_BINARY, b'\x00' + POD_PORT_FRAME),
+                               (ABNF.OPCODE_BINARY, b'\x01' + POD_PORT_FRAME),
+                               (ABNF.OPCODE_BINARY, b'\x00pong')])
+    forwarder = PortForwarder(api_client=mocker.MagicMock())
+    connect_mock = mocker.patch.object(forwarder, '_connect', return_value=websocket)
+
+    try:
+        local_port = forwarder.forward(namespace='nauta', pod_name='elasticsearch-0', pod_port=9200)
+        with socket.create_connection(('127.0.0.1', local_port), timeout=5) as local_connection:
+            local_connection.sendall(b'ping')
+            assert local_connection.recv(4) == b'pong'
+            assert websocket.sent.get(timeout=5) == b'\x00ping'
+    finally:
+        forwarder.close()
+
+    connect_mock.assert_called_once_with(namespace='nauta', pod_name='elasticsearch-0', pod_port=9200)
+
+
+def test_forward_port_occupied(mocker):
+    forwarder = PortForwarder(api_client=mocker.MagicMock())
+    try:
+        local_port = forwarder.forward(namespace='nauta', pod_name='elasticsearch-0', pod_port=9200)
+        with pytest.raises(OSError):
+            forwarder.forward(namespace='nauta', pod_name='elasticsearch-0', pod_port=9200, local_port=local_port)
+    finally:
+        forwarder.close()
+
+
+def test_get_service_pod(mocker):
+    list_pods_mock = mocker.patch('util.k8s.port_forwarder.get_k8s_api').return_value.list_namespaced_pod
+    list_pods_mock.return_value.items = [fake_pod('elasticsearch-0', 'Pending'), fake_pod('elasticsearch-1', 'Running')]
+
+    assert get_service_pod(fake_service(target_port='http')) == ('elasticsearch-1', 9201)
+    assert get_service_pod(fake_service(target_port=9300)) == ('elasticsearch-1', 9300)
+    list_pods_mock.assert_called_with(namespace='nauta', label_selector='app=elasticsearch')
+
+
+def test_get_service_pod_no_running_pod(mocker):
+    mocker.patch('util.k8s.port_forwarder.get_k8s_api').return_value.list_namespaced_pod.return_value.items = \
+        [fake_pod('elasticsearch-0', 'Pending')]
+
+    with pytest.raises(KubernetesError):
+        get_service_pod(fake_service(target_port='http'))
@@ -17,7 +17,6 @@
 import webbrowser
 
 import click
-from kubernetes import config
 from kubernetes.client import configuration
 
 from util.spinner import spinner
@@ -27,6 +26,7 @@ from util.network import wait_for_connection
 from util.logger import initialize_logger
 from util.system import wait_for_ctrl_c
 from util.app_names import NAUTAAppNames
+from util.k8s.k8s_info import K8sApiClients
 from util.k8s.k8s_proxy_context_manager import K8sProxy
 from util.exceptions import K8sProxyOpenError, K8sProxyCloseError, LocalPortOccupiedError, LaunchError, \
     ProxyClosingError
@@ -65,7 +65,7 @@ def launch_app(k8s_app_name: NAUTAAppNames = None, no_launch: bool = False, port
                     raise LaunchError(err_message)
 
             if k8s_app_name == NAUTAAppNames.INGRESS:
-                config.load_kube_config()
+                K8sApiClients.load_kube_config()
                 user_token = configuration.Configuration().api_key.get('authorization')
                 prepared_user_token = user_token.replace('Bearer ', '')
                 url = f'{url}?token={prepared_user_token}'
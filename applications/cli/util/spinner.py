@@ -14,6 +14,7 @@
 # limitations under the License.
 #
 
+from contextlib import ExitStack
 import sys
 
 import click
@@ -69,3 +70,11 @@ def spinner(text: str, color: str = SPINNER_COLOR, spinner: yaspin.Spinner = Nct
         return yaspin.yaspin(spinner=spinner, text=text, color=color, *args, **kwargs)
     else:
         return DummySpinner(text=text)
+
+
+def progress_spinner(text: str, visible: bool = True):
+    """
+    Returns spinner with a given text or, if it shouldn't be visible, an empty context manager. Used to display
+    only one spinner for runs processed concurrently - yaspin spinners can't be used from many threads at once.
+    """
+    return spinner(text=text) if visible else ExitStack()
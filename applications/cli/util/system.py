@@ -116,11 +116,15 @@ def execute_subprocess_command(command: List[str],
                                env=None,
                                cwd=None,
                                shell=False,
-                               join=False) -> subprocess.Popen:
+                               join=False,
+                               start_new_session=False,
+                               pipe_output=False) -> subprocess.Popen:
 
     # if a log level is set to DEBUG - additional information from creation of a proxy are sent to console
     std_output_destination = None if get_verbosity_level == logging.DEBUG else subprocess.DEVNULL
     std_error_destination = subprocess.STDOUT if get_verbosity_level == logging.DEBUG else subprocess.DEVNULL
+    if pipe_output:
+        std_output_destination, std_error_destination = subprocess.PIPE, subprocess.STDOUT
 
     if join:
         final_command = ' '.join(command)
@@ -137,7 +141,8 @@ def execute_subprocess_command(command: List[str],
         env=env,
         cwd=cwd,
         encoding='utf-8',
-        shell=shell)
+        shell=shell,
+        start_new_session=start_new_session)
 
     if not process or process.poll() != (0 or None):
         log.error(f'COMMAND execution FAIL: {command}')
@@ -0,0 +1,108 @@
+#
+# Copyright (c) 2019 Intel Corporation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import time
+
+import pytest
+
+from util.content_cache import ContentCache, UNUSED_FILE_MAX_AGE_SECONDS
+
+
+@pytest.fixture()
+def src_dir(tmpdir):
+    src_dir = tmpdir.mkdir('src')
+    src_dir.join('training.py').write('print("training")')
+    src_dir.mkdir('data').join('data.csv').write('1,2,3')
+    src_dir.mkdir('charts').join('values.yaml').write('podCount: 1')
+    return src_dir
+
+
+def test_copy_tree(tmpdir, src_dir):
+    cache = ContentCache(cache_path=tmpdir.join('cache').strpath)
+
+    cache.copy_tree(src_dir.strpath, tmpdir.join('dst').strpath, ignored_objects=['charts'])
+
+    assert tmpdir.join('dst', 'training.py').read() == 'print("training")'
+    assert tmpdir.join('dst', 'data', 'data.csv').read() == '1,2,3'
+    assert not tmpdir.join('dst', 'charts').exists()
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_copy_tree_unchanged_files_linked(tmpdir, src_dir):
+    cache_path = tmpdir.join('cache').strpath
+    ContentCache(cache_path=cache_path).copy_tree(src_dir.strpath, tmpdir.join('dst-1').strpath)
+    src_dir.join('training.py').write('print("changed training")')
+
+    cache = ContentCache(cache_path=cache_path)
+    cache.copy_tree(src_dir.strpath, tmpdir.join('dst-2').strpath)
+
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert tmpdir.join('dst-2', 'training.py').read() == 'print("changed training")'
+    assert tmpdir.join('dst-1', 'training.py').read() == 'print("training")'
+    assert os.path.samefile(tmpdir.join('dst-1', 'data', 'data.csv').strpath,
+                            tmpdir.join('dst-2', 'data', 'data.csv').strpath)
+
+
+def test_copy_tree_existing_file_replaced(tmpdir, src_dir):
+    cache_path = tmpdir.join('cache').strpath
+    ContentCache(cache_path=cache_path).copy_tree(src_dir.strpath, tmpdir.join('dst').strpath)
+    other_src_dir = tmpdir.mkdir('other-src')
+    other_src_dir.join('training.py').write('print("other training")')
+
+    ContentCache(cache_path=cache_path).copy_tree(other_src_dir.strpath, tmpdir.join('dst').strpath)
+
+    assert tmpdir.join('dst', 'training.py').read() == 'print("other training")'
+    # file linked from the cache was replaced, not overwritten
+    cache = ContentCache(cache_path=cache_path)
+    cache.copy_tree(src_dir.strpath, tmpdir.join('dst-2').strpath)
+    assert tmpdir.join('dst-2', 'training.py').read() == 'print("training")'
+    assert cache.hits == 3
+
+
+def test_copy_tree_unused_files_pruned(mocker, tmpdir, src_dir):
+    cache_path = tmpdir.join('cache').strpath
+    ContentCache(cache_path=cache_path).copy_tree(src_dir.strpath, tmpdir.join('dst').strpath)
+    tmpdir.join('dst').remove()
+    os.remove(os.path.join(cache_path, 'pruned'))
+    mocker.patch('util.content_cache.time.time', return_value=time.time() + UNUSED_FILE_MAX_AGE_SECONDS + 1)
+
+    cache = ContentCache(cache_path=cache_path)
+    cache.copy_tree(tmpdir.mkdir('empty').strpath, tmpdir.join('dst').strpath)
+
+    assert not any(filenames for dirpath, _, filenames in os.walk(cache_path) if dirpath != cache_path)
+
+
+def test_copy_tree_concurrent_index_updates_merged(mocker, tmpdir, src_dir):
+    cache_path = tmpdir.join('cache').strpath
+    other_src_dir = tmpdir.mkdir('other-src')
+    other_src_dir.join('evaluation.py').write('print("evaluation")')
+    cache = ContentCache(cache_path=cache_path)
+    copy_file = cache.copy_file
+
+    def copy_file_concurrently(src: str, dst: str):
+        # other cache stores its index while the first cache is copying files
+        if not os.path.exists(tmpdir.join('dst-2').strpath):
+            ContentCache(cache_path=cache_path).copy_tree(other_src_dir.strpath, tmpdir.join('dst-2').strpath)
+        copy_file(src, dst)
+
+    mocker.patch.object(cache, 'copy_file', side_effect=copy_file_concurrently)
+    cache.copy_tree(src_dir.strpath, tmpdir.join('dst-1').strpath)
+
+    new_cache = ContentCache(cache_path=cache_path)
+    new_cache.copy_tree(other_src_dir.strpath, tmpdir.join('dst-3').strpath)
+    new_cache.copy_tree(src_dir.strpath, tmpdir.join('dst-4').strpath)
+    assert new_cache.misses == 0
@@ -17,7 +17,7 @@
 import pytest
 from http import HTTPStatus
 
-from util.docker import get_tags_list, delete_tag, delete_images_for_experiment
+from util.docker import get_tags_list, delete_tag, delete_images_for_experiment, get_image_digest
 
 SERVER_ADDRESS = "127.0.0.1:5000"
 EXP_NAME = "exp_name"
@@ -95,3 +95,19 @@ def test_delete_images_for_experiment(mocker):
 
     assert gtl_mock.call_count == 1
     assert dtg_mock.call_count == 2
+
+
+def test_get_image_digest_success(mocker):
+    req_mock = mocker.patch('requests.head')
+    req_mock.return_value.status_code = HTTPStatus.OK
+    req_mock.return_value.headers = {"Docker-Content-Digest": "sha256:digest"}
+
+    assert get_image_digest(server_address=SERVER_ADDRESS, image_name=EXP_NAME, tag=TAG_NAME) == "sha256:digest"
+
+
+def test_get_image_digest_failure(mocker):
+    req_mock = mocker.patch('requests.head')
+    req_mock.return_value.status_code = HTTPStatus.NOT_FOUND
+
+    with pytest.raises(RuntimeError):
+        get_image_digest(server_address=SERVER_ADDRESS, image_name=EXP_NAME, tag=TAG_NAME)
@@ -16,7 +16,7 @@
 
 import os
 
-from util.filesystem import copytree_content
+from util.filesystem import copytree_content, get_directory_digest
 
 
 def test_copytree_content(mocker):
@@ -45,3 +45,22 @@ def test_copytree_content_ignored_objects(mocker):
 
     assert shutil_copytree.call_count == 1
     assert shutil_copy2.call_count == 1
+
+
+def test_get_directory_digest(tmpdir):
+    directories = []
+    for name in ('first', 'second'):
+        directory = tmpdir.mkdir(name)
+        directory.join('Dockerfile').write('FROM nauta/tensorflow-py3')
+        directory.mkdir('folder').join('training.py').write('print("training")')
+        directories.append(directory)
+    directories[1].mkdir('charts').join('values.yaml').write('commandline: --lr=0.1')
+
+    assert get_directory_digest(directories[0].strpath) == \
+        get_directory_digest(directories[1].strpath, ignored_objects=['charts'])
+    assert get_directory_digest(directories[0].strpath) != get_directory_digest(directories[1].strpath)
+
+    directories[1].join('folder', 'training.py').write('print("other training")')
+
+    assert get_directory_digest(directories[0].strpath) != \
+        get_directory_digest(directories[1].strpath, ignored_objects=['charts'])